@@ -1,13 +1,46 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+import hashlib
+import json
 import os
 import random
-from datetime import datetime
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from urllib.parse import urlencode
 import uuid
-from pydub import AudioSegment
-import eyed3
+import zipfile
+import click
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from audio_sniff import sniff_audio_metadata
+from blob_store import BlobStore, file_digest
+from catalog import Catalog, CatalogVersion, SongRecord
+from catalog_listing import LISTING_FIELDS, ListingQuery, choose_encoding
+from chunked_uploads import DEFAULT_CHUNK_SIZE, UploadError, UploadStore
+from clip_engine import (
+    CLIP_DURATIONS_MS, DEFAULT_PROFILE, ENCODING_PROFILES, ClipExtractionError, extract_clips, ffmpeg_available,
+    missing_encoders, probe_duration_ms, transcode_clip,
+)
+from clip_store import ClipStore
+from covers import choose_variant, cover_version, generate_cover_variants, missing_variants
+from integrity import IntegrityReport, check_file, decode_audio, list_folders, older_than
+from importer import COVER_EXTENSIONS, extract_archive, find_audio_files, probe_files
+from jobs import JobQueue
+from locks import hold_lock, lock_name, try_lock
+from media import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, send_media
+from metrics import metrics
+from sampler import SongSampler
+from title_index import normalize_title
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -17,13 +50,208 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 DATABASE_URL = os.getenv('DATABASE_URL', f'sqlite:///{os.path.join(basedir, "data", "spordle.db")}')
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'  # Haupt-Upload-Ordner
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+if DATABASE_URL.startswith('sqlite'):
+    # Ein Pool offener Verbindungen pro Worker, damit die PRAGMAs nicht bei jedem Request neu gesetzt werden
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_POOL_OVERFLOW', 10)),
+        'pool_recycle': 3600,
+        'connect_args': {'timeout': 15},
+    }
+app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')  # Haupt-Upload-Ordner
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max pro Request
+
+# Chunk-Uploads für große Audio-Dateien: Ablage der Teildateien (gleiches Dateisystem
+# wie UPLOAD_FOLDER), maximale Dateigröße, Verfall unfertiger Uploads in Sekunden
+app.config['UPLOAD_STAGING_FOLDER'] = os.getenv('UPLOAD_STAGING_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], '.partial'))
+app.config['UPLOAD_MAX_BYTES'] = int(os.getenv('UPLOAD_MAX_BYTES', 1024 * 1024 * 1024))
+app.config['UPLOAD_MAX_AGE'] = int(os.getenv('UPLOAD_MAX_AGE', 24 * 60 * 60))
+
+# Inhaltsadressierte Ablage für Audio und Cover (gleiches Dateisystem wie UPLOAD_STAGING_FOLDER);
+# Dateien ohne Verweise werden nach MEDIA_GC_GRACE Sekunden gelöscht
+app.config['MEDIA_FOLDER'] = os.getenv('MEDIA_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], 'blobs'))
+app.config['MEDIA_GC_GRACE'] = int(os.getenv('MEDIA_GC_GRACE', 60 * 60))
+
+# Clip-Ablage pro Spiel-Session (Größe in Bytes, Alter in Sekunden)
+app.config['CLIP_STORE_FOLDER'] = os.getenv('CLIP_STORE_FOLDER', os.path.join(basedir, 'data', 'temp_audio'))
+app.config['CLIP_STORE_MAX_BYTES'] = int(os.getenv('CLIP_STORE_MAX_BYTES', 512 * 1024 * 1024))
+app.config['CLIP_STORE_MAX_AGE'] = int(os.getenv('CLIP_STORE_MAX_AGE', 6 * 60 * 60))
+
+# Beim Hochladen vorberechnete Clips. Ein Offset belegt mit start, hint3 und
+# reveal (52 s) im mp3-Profil bei 128 kbit/s etwa 830 KB, ein Song also
+# CLIPS_PER_SONG * 830 KB. Über SONG_CLIP_MAX_BYTES werden die am längsten
+# nicht gespielten Clips verdrängt, ein Spiel rendert dann bei Bedarf neu.
+app.config['SONG_CLIP_FOLDER'] = os.getenv('SONG_CLIP_FOLDER', os.path.join(basedir, 'data', 'song_clips'))
+app.config['SONG_CLIP_MAX_BYTES'] = int(os.getenv('SONG_CLIP_MAX_BYTES', 10 * 1024 * 1024 * 1024))
+app.config['CLIPS_PER_SONG'] = int(os.getenv('CLIPS_PER_SONG', 5))
+app.config['CLIP_JOB_WORKERS'] = int(os.getenv('CLIP_JOB_WORKERS', 1))
+# Encodier-Profile, in denen Clips ausgeliefert werden (siehe clip_engine.ENCODING_PROFILES).
+# Vorab gerendert wird nur das mp3-Profil, die anderen beim ersten Abruf aus dem mp3-Clip
+app.config['CLIP_PROFILES'] = [
+    profile for profile in os.getenv('CLIP_PROFILES', 'opus,aac,mp3').split(',') if profile in ENCODING_PROFILES
+]
+if DEFAULT_PROFILE not in app.config['CLIP_PROFILES']:
+    app.config['CLIP_PROFILES'].append(DEFAULT_PROFILE)
+
+# Massenimport: Quellordner auf dem Server, Prozess-Pool-Größe (None = Anzahl CPUs), Songs pro Transaktion;
+# ZIP-Archive kommen über die Chunk-Uploads und dürfen bis zu IMPORT_MAX_BYTES groß sein
+app.config['IMPORT_FOLDER'] = os.getenv('IMPORT_FOLDER', os.path.join(basedir, 'import'))
+app.config['IMPORT_MAX_BYTES'] = int(os.getenv('IMPORT_MAX_BYTES', 50 * 1024 * 1024 * 1024))
+app.config['IMPORT_WORKERS'] = int(os.getenv('IMPORT_WORKERS', 0)) or None
+app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', 200))
+
+# Aufräumen von Spiel-Sessions (Sekunden): beendete bzw. nie beendete Spiele
+app.config['SESSION_FINISHED_TTL'] = int(os.getenv('SESSION_FINISHED_TTL', 24 * 60 * 60))
+app.config['SESSION_ABANDONED_TTL'] = int(os.getenv('SESSION_ABANDONED_TTL', 7 * 24 * 60 * 60))
+app.config['SESSION_PURGE_INTERVAL'] = int(os.getenv('SESSION_PURGE_INTERVAL', 15 * 60))
+
+# Vorrat fertig vorbereiteter Sessions (0 = aus); ältere Einträge werden verworfen,
+# bevor der clip_store ihre Clips verdrängt
+app.config['SESSION_POOL_SIZE'] = int(os.getenv('SESSION_POOL_SIZE', 20))
+app.config['SESSION_POOL_MAX_AGE'] = int(os.getenv('SESSION_POOL_MAX_AGE', 3 * 60 * 60))
+
+# Tagesrätsel: Zeitzone für den Datumswechsel, Seed für die Songauswahl,
+# Anzahl Tage ohne Wiederholung eines Songs
+app.config['DAILY_TIMEZONE'] = os.getenv('DAILY_TIMEZONE', 'UTC')
+app.config['DAILY_SEED'] = os.getenv('DAILY_SEED', 'spordle')
+app.config['DAILY_NO_REPEAT_DAYS'] = int(os.getenv('DAILY_NO_REPEAT_DAYS', 60))
+
+# Songauswahl: Gewichtung 'uniform', 'genre' (gleicher Anteil pro Genre, Quoten z.B.
+# "pop=2,rock=1") oder 'recency' (in den letzten Tagen oft gespielte Songs seltener);
+# Anzahl zuletzt gespielter Songs pro Spieler, die nicht erneut gezogen werden
+app.config['SAMPLER_WEIGHTING'] = os.getenv('SAMPLER_WEIGHTING', 'uniform')
+
+def parse_genre_quotas(value):
+    # "pop=2,rock=1" -> {'pop': 2.0, 'rock': 1.0}; ungültige Einträge werden gemeldet und ignoriert
+    quotas = {}
+    for part in value.split(','):
+        name, _, quota = part.partition('=')
+        if not part.strip():
+            continue
+        try:
+            quota = float(quota)
+        except ValueError:
+            quota = None
+        if not name.strip() or quota is None or not 0 < quota < float('inf'):
+            print(f"SAMPLER_GENRE_QUOTAS: ungültiger Eintrag {part.strip()!r} wird ignoriert")
+            continue
+        quotas[name.strip().lower()] = quota
+    return quotas
+
+app.config['SAMPLER_GENRE_QUOTAS'] = parse_genre_quotas(os.getenv('SAMPLER_GENRE_QUOTAS', ''))
+app.config['SAMPLER_RECENCY_DAYS'] = int(os.getenv('SAMPLER_RECENCY_DAYS', 7))
+app.config['SAMPLER_REFRESH_INTERVAL'] = int(os.getenv('SAMPLER_REFRESH_INTERVAL', 10 * 60))
+app.config['PLAYER_HISTORY_SIZE'] = int(os.getenv('PLAYER_HISTORY_SIZE', 20))
+
+# Mindestens so viel freier Platz pro Ablage, sonst meldet /readyz nicht bereit
+app.config['READY_MIN_FREE_BYTES'] = int(os.getenv('READY_MIN_FREE_BYTES', 100 * 1024 * 1024))
+
+# Sperrdateien für Hintergrund-Jobs, damit mehrere Worker-Prozesse denselben Job nicht doppelt ausführen
+app.config['LOCK_FOLDER'] = os.getenv('LOCK_FOLDER', os.path.join(basedir, 'data', 'locks'))
+
+# Metrik-Stände der Worker-Prozesse für /metrics, Schreibintervall in Sekunden
+app.config['METRICS_FOLDER'] = os.getenv('METRICS_FOLDER', os.path.join(basedir, 'data', 'metrics'))
+app.config['METRICS_FLUSH_INTERVAL'] = int(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+# Versionsdatei des Song-Katalogs, von allen Workern gemeinsam genutzt
+app.config['CATALOG_VERSION_FILE'] = os.getenv('CATALOG_VERSION_FILE', os.path.join(basedir, 'data', 'catalog.version'))
 
 # Stelle sicher, dass JSON-Antworten korrekt sind
 app.config['JSONIFY_MIMETYPE'] = 'application/json'
 
-db = SQLAlchemy(app)
+# Wird in create_app() an die App gebunden, beim Import entsteht noch keine Engine
+db = SQLAlchemy()
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL erlaubt Lesen während geschrieben wird; NORMAL reicht mit WAL für Crash-Sicherheit
+    if type(dbapi_connection).__module__ != 'sqlite3':
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=15000')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-16000')
+    cursor.execute('PRAGMA mmap_size=134217728')
+    cursor.close()
+
+# Dauer jeder SQL-Anweisung; Stapel, da Verbindungen verschachtelt ausführen können
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    metrics.observe('spordle_stage_duration_seconds', time.perf_counter() - conn.info['query_started'].pop(), stage='db_query')
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(context):
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+metrics.describe('spordle_errors_total', 'counter', 'Abgefangene Fehler pro Stelle')
+metrics.describe('spordle_session_pool_total', 'counter', 'Starts aus dem Session-Vorrat und dessen Pflege')
+metrics.describe('spordle_clip_store_bytes', 'gauge', 'Belegter Speicher der Clip-Ablagen')
+metrics.describe('spordle_game_sessions', 'gauge', 'Spiel-Sessions in der Datenbank')
+metrics.describe('spordle_session_pool_depth', 'gauge', 'Vorbereitete Sessions im Vorrat')
+metrics.describe('spordle_job_queue_pending', 'gauge', 'Wartende oder laufende Hintergrund-Jobs')
+metrics.describe('spordle_clip_responses_total', 'counter', 'Ausgelieferte Clips pro Encodier-Profil')
+metrics.describe('spordle_clip_bytes_total', 'counter', 'Ausgelieferte Clip-Bytes pro Encodier-Profil')
+metrics.describe('spordle_listing_responses_total', 'counter', 'Antworten der Songlisten: 304, aus dem Cache oder neu serialisiert')
+
+def log_exception(where):
+    # Traceback ins Log statt stillem Verschlucken, dazu ein Zähler pro Stelle
+    app.logger.exception(f'Fehler in {where}')
+    metrics.inc('spordle_errors_total', where=where)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Die Routen-Regel statt des Pfads hält die Anzahl der Zeitreihen klein
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe(
+            'spordle_request_duration_seconds', time.perf_counter() - started,
+            route=route, method=request.method, status=str(response.status_code),
+        )
+    metrics.set_live('spordle_job_queue_pending', clip_jobs.pending())
+    metrics.start_flusher()
+    return response
+
+# Ablagen und Hintergrund-Jobs legen ihre Ordner an und entstehen daher
+# erst in create_app(), ein bloßes ``import app`` schreibt nichts
+clip_store = None
+song_clip_store = None
+media_store = None
+uploads = None
+clip_jobs = None
+
+def init_storage():
+    global clip_store, song_clip_store, media_store, uploads, clip_jobs
+    metrics.configure(app.config['METRICS_FOLDER'], app.config['METRICS_FLUSH_INTERVAL'])
+    clip_store = ClipStore(
+        app.config['CLIP_STORE_FOLDER'],
+        max_bytes=app.config['CLIP_STORE_MAX_BYTES'],
+        max_age=app.config['CLIP_STORE_MAX_AGE'],
+    )
+    song_clip_store = ClipStore(app.config['SONG_CLIP_FOLDER'], max_bytes=app.config['SONG_CLIP_MAX_BYTES'])
+    media_store = BlobStore(app.config['MEDIA_FOLDER'])
+    uploads = UploadStore(
+        app.config['UPLOAD_STAGING_FOLDER'],
+        max_bytes=app.config['UPLOAD_MAX_BYTES'],
+        max_age=app.config['UPLOAD_MAX_AGE'],
+    )
+    clip_jobs = JobQueue(
+        max_workers=app.config['CLIP_JOB_WORKERS'],
+        context_factory=app.app_context,
+        name='clip-jobs',
+        lock_dir=app.config['LOCK_FOLDER'],
+    )
 
 # Datenbank-Modelle
 class Song(db.Model):
@@ -40,18 +268,487 @@ class Song(db.Model):
     hint2 = db.Column(db.String(500))
     hint3_audio_path = db.Column(db.String(500))
     root_path = db.Column(db.String(500))
+    # Ergebnis von scan-library: True = Audio vollständig dekodierbar,
+    # False = fehlt oder kaputt, None = seit dem letzten Audio-Wechsel ungeprüft
+    playable = db.Column(db.Boolean)
+    verified_at = db.Column(db.DateTime)
+
+class SongClip(db.Model):
+    # Vorberechnetes Clip-Tripel (start/hint3/reveal) ab einem Offset im Song
+    id = db.Column(db.Integer, primary_key=True)
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), index=True, nullable=False)
+    offset_ms = db.Column(db.Integer, nullable=False)
+    clip_key = db.Column(db.String(100), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class GameSession(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     song_id = db.Column(db.Integer, db.ForeignKey('song.id'))
     attempts = db.Column(db.Integer, default=0)
     solved = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Gesetzt, sobald das Spiel gewonnen oder verloren ist
+    finished_at = db.Column(db.DateTime, index=True)
+    # Schlüssel im song_clip_store; None = Clips liegen pro Session im clip_store
+    clip_key = db.Column(db.String(100))
+    # 'random' oder 'daily'
+    mode = db.Column(db.String(20), default='random')
+    # Anonyme Spieler-Kennung aus dem Cookie, für den Wiederholungsschutz
+    player_id = db.Column(db.String(32))
+
+    __table_args__ = (db.Index('ix_game_session_player_created', 'player_id', 'created_at'),)
+
+class PreparedSession(db.Model):
+    # Session im Vorrat: Song gewählt, Clips liegen bereit. Die ID wird beim Start zur Session-ID.
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), index=True, nullable=False)
+    clip_key = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class DailyPuzzle(db.Model):
+    # Ein Song und Clip pro Tag, für alle Spieler gleich
+    date = db.Column(db.Date, primary_key=True)
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), index=True, nullable=False)
+    offset_ms = db.Column(db.Integer, nullable=False)
+    clip_key = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class MediaBlob(db.Model):
+    # Datei im media_store; refs zählt die Verweise aus Song.audio_path und Song.cover_path
+    path = db.Column(db.String(500), primary_key=True)
+    sha256 = db.Column(db.String(64), index=True, nullable=False)
+    size = db.Column(db.Integer)
+    refs = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Seit wann die Datei nicht mehr verwendet wird
+    released_at = db.Column(db.DateTime, index=True)
+
+# Spielstatistik: Zähler, die beim Start und bei jedem Rateversuch in derselben
+# Transaktion fortgeschrieben werden, damit Auswertungen nicht über game_session laufen
+class SongStats(db.Model):
+    song_id = db.Column(db.Integer, primary_key=True)
+    started = db.Column(db.Integer, nullable=False, default=0)
+    solved = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    # Summe der Versuche aller beendeten Spiele
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Spiele, in denen der Text-, Cover- bzw. Audio-Hinweis freigeschaltet wurde
+    hint_text = db.Column(db.Integer, nullable=False, default=0)
+    hint_cover = db.Column(db.Integer, nullable=False, default=0)
+    hint_audio = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyStats(db.Model):
+    # Pro UTC-Tag des Ereignisses: Starts am Starttag, Ergebnisse am Tag des Spielendes
+    day = db.Column(db.Date, primary_key=True)
+    mode = db.Column(db.String(20), primary_key=True)
+    started = db.Column(db.Integer, nullable=False, default=0)
+    solved = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+class AttemptStats(db.Model):
+    # Verteilung der beendeten Spiele nach Anzahl der Versuche
+    attempts = db.Column(db.Integer, primary_key=True)
+    solved = db.Column(db.Boolean, primary_key=True)
+    games = db.Column(db.Integer, nullable=False, default=0)
+
+def load_song_records():
+    rows = db.session.query(
+        Song.id, Song.title, Song.artist, Song.year, Song.genre, Song.type, Song.length,
+        Song.audio_path, Song.cover_path, Song.hint1, Song.hint2, Song.playable,
+    ).order_by(Song.id).all()
+    return [SongRecord(*row) for row in rows]
+
+catalog = Catalog(load_song_records, CatalogVersion(app.config['CATALOG_VERSION_FILE']))
+
 # Hilfsfunktionen
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+# Medienablage: Song.audio_path und Song.cover_path zeigen in den media_store,
+# die Verweise werden in MediaBlob in derselben Transaktion mitgezählt.
+def acquire_media(path, digest):
+    increment = db.update(MediaBlob).where(MediaBlob.path == path).values(refs=MediaBlob.refs + 1, released_at=None)
+    if not db.session.execute(increment).rowcount:
+        try:
+            with db.session.begin_nested():
+                db.session.add(MediaBlob(path=path, sha256=digest, size=os.path.getsize(path), refs=1))
+        except IntegrityError:
+            # Parallel von einem anderen Request angelegt
+            db.session.execute(increment)
+    return path
+
+def media_lock_path(digest):
+    """Sperre zwischen Ablegen und Löschen eines Blobs. Ablegen und Verweis
+    zählen passieren unter der Sperre, collect_media_garbage und scan_library
+    löschen nur, wenn sie sie bekommen. Eine Sperrdatei pro SHA-256-Präfix."""
+    return os.path.join(app.config['LOCK_FOLDER'], f"{lock_name(('media', digest[:2]))}.lock")
+
+def store_media_file(source, extension, digest=None, move=False):
+    digest = digest or file_digest(source)
+    with hold_lock(media_lock_path(digest)):
+        digest, path = media_store.put_file(source, extension, digest=digest, move=move)
+        return acquire_media(path, digest)
+
+def store_media_bytes(data, extension):
+    digest = hashlib.sha256(data).hexdigest()
+    with hold_lock(media_lock_path(digest)):
+        digest, path = media_store.put_bytes(data, extension, digest=digest)
+        return acquire_media(path, digest)
+
+def store_uploaded_file(file_storage):
+    tmp_path = media_store.staging_path()
+    file_storage.save(tmp_path)
+    return store_media_file(tmp_path, file_extension(file_storage.filename), move=True)
+
+def release_media(path):
+    """Gibt einen Verweis frei. Unbenutzte Blobs löscht collect_media_garbage
+    nach MEDIA_GC_GRACE; Dateien aus alten Song-Ordnern werden sofort gelöscht."""
+    if not path:
+        return
+    if media_store.contains(path):
+        db.session.execute(db.update(MediaBlob).where(MediaBlob.path == path).values(
+            refs=MediaBlob.refs - 1,
+            released_at=db.case((MediaBlob.refs <= 1, datetime.utcnow()), else_=None),
+        ))
+    elif os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            app.logger.warning(f"Datei konnte nicht gelöscht werden: {e}")
+
+def legacy_song_folder(song):
+    # Ordner uploads/<Titel>_<id> aus der Zeit vor dem media_store
+    folder = song.root_path or os.path.dirname(song.audio_path or song.cover_path or '')
+    if not folder or media_store.contains(song.audio_path) or media_store.contains(song.cover_path):
+        return None
+    upload_root = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    if os.path.dirname(os.path.abspath(folder)) != upload_root:
+        return None
+    if os.path.abspath(folder) in (os.path.abspath(app.config['MEDIA_FOLDER']), os.path.abspath(app.config['UPLOAD_STAGING_FOLDER'])):
+        return None
+    return folder
+
+def store_embedded_cover(audio_path):
+    # Erstes eingebettetes Bild der Audio-Datei als Cover ablegen
+    import eyed3
+    with metrics.span('id3_parse'):
+        audiofile = eyed3.load(audio_path)
+    if audiofile and audiofile.tag and audiofile.tag.images:
+        for image in audiofile.tag.images:
+            if image.image_data:
+                return store_media_bytes(image.image_data, COVER_EXTENSIONS.get(image.mime_type, 'jpg'))
+    return None
+
+def collect_media_garbage(now=None):
+    """Löscht Blobs, die seit MEDIA_GC_GRACE von keinem Song mehr verwendet
+    werden. Die Zeile wird nur gelöscht, wenn refs noch 0 ist, ein
+    zwischenzeitlich neu angelegter Verweis verhindert das Löschen. Legt
+    gerade jemand denselben Inhalt ab, bleibt der Blob bis zum nächsten Lauf."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=app.config['MEDIA_GC_GRACE'])
+    paths = [path for (path,) in db.session.query(MediaBlob.path).filter(MediaBlob.refs <= 0, MediaBlob.released_at < cutoff)]
+    removed = 0
+    for path in paths:
+        deleted = db.session.execute(
+            db.delete(MediaBlob).where(MediaBlob.path == path, MediaBlob.refs <= 0)
+        ).rowcount
+        if not deleted:
+            db.session.rollback()
+            continue
+        # Nicht blockierend: store_media_* wartet unter der Sperre ggf. auf
+        # die Datenbank, die diese Transaktion gerade hält
+        with try_lock(media_lock_path(media_store.digest_of(path))) as acquired:
+            if not acquired:
+                db.session.rollback()
+                continue
+            db.session.commit()
+            media_store.remove(path)
+        removed += 1
+    return removed
+
+@app.cli.command('gc-media')
+def gc_media_command():
+    print(f"{collect_media_garbage()} unbenutzte Dateien gelöscht")
+
+@app.cli.command('migrate-media')
+def migrate_media_command():
+    """Übernimmt Audio und Cover aus den alten Song-Ordnern in den media_store."""
+    migrated = 0
+    for song in Song.query.order_by(Song.id):
+        folder = legacy_song_folder(song)
+        changed = False
+        for attr in ('audio_path', 'cover_path'):
+            path = getattr(song, attr)
+            if path and not media_store.contains(path) and os.path.exists(path):
+                setattr(song, attr, store_media_file(path, file_extension(path)))
+                changed = True
+        if not changed:
+            continue
+        song.root_path = None
+        db.session.commit()
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+        migrated += 1
+    catalog.invalidate()
+    print(f"{migrated} Songs in den media_store übernommen, Cover-Varianten mit backfill-covers neu erzeugen")
+
+def song_media_references():
+    # Anzahl der Verweise aus der Song-Tabelle pro media_store-Pfad
+    references = {}
+    for audio_path, cover_path in db.session.query(Song.audio_path, Song.cover_path):
+        for path in (audio_path, cover_path):
+            if media_store.contains(path):
+                references[path] = references.get(path, 0) + 1
+    return references
+
+def counted_references(path_column):
+    # Verweise zum Zeitpunkt des UPDATE, als korrelierte Unterabfrage
+    return (
+        db.select(db.func.count()).where(Song.audio_path == path_column).scalar_subquery()
+        + db.select(db.func.count()).where(Song.cover_path == path_column).scalar_subquery()
+    )
+
+def remove_stale_file(path, category, grace, report):
+    # Wie bei verwaisten Ordnern und Blobs erst nach der Schonfrist, ein
+    # Upload kann die Datei gerade erst geschrieben haben
+    try:
+        if older_than(os.path.getmtime(path), grace):
+            os.remove(path)
+            report.repaired[category] += 1
+    except OSError as e:
+        report.add(category, f'Löschen fehlgeschlagen: {e}', path=path)
+
+def scan_library(repair=False, verify_hashes=True, decode=True, only_unverified=False, workers=None):
+    """Gleicht Song-Tabelle, uploads/ und die Clip-Ablagen ab.
+
+    stat und SHA-256 laufen in einem Thread-Pool, das Dekodieren der
+    Audio-Dateien mit ffmpeg in einem Prozess-Pool. Das Ergebnis landet in
+    Song.playable, dem der Sampler ohne eigene Dateiprüfung vertraut. Mit
+    ``repair`` werden Befunde behoben; Dateien ohne Datenbankeintrag werden
+    erst nach MEDIA_GC_GRACE angefasst, da laufende Uploads und Renderings
+    sie kurz vor ihrem Eintrag anlegen.
+    """
+    report = IntegrityReport()
+    workers = workers or os.cpu_count() or 1
+    grace = app.config['MEDIA_GC_GRACE']
+    now = datetime.utcnow()
+    upload_root = app.config['UPLOAD_FOLDER']
+    internal_folders = (app.config['MEDIA_FOLDER'], app.config['UPLOAD_STAGING_FOLDER'])
+
+    with ThreadPoolExecutor(max_workers=2 * workers) as threads:
+        # Dateisystem ablaufen, während die Datenbank gelesen wird
+        store_future = threads.submit(media_store.scan)
+        folders_future = threads.submit(list_folders, upload_root, internal_folders)
+        song_clips_future = threads.submit(song_clip_store.keys)
+        session_clips_future = threads.submit(clip_store.keys)
+
+        songs = Song.query.order_by(Song.id).all()
+        blob_rows = {blob.path: blob for blob in MediaBlob.query}
+        clip_rows = SongClip.query.all() + DailyPuzzle.query.all()
+        session_ids = {session_id for (session_id,) in db.session.query(GameSession.id)}
+        session_ids.update(session_id for (session_id,) in db.session.query(PreparedSession.id))
+        report.checked['songs'] = len(songs)
+
+        expected = {}
+        for song in songs:
+            deep = not only_unverified or song.playable is None
+            for path in (song.audio_path, song.cover_path):
+                if path:
+                    digest = media_store.digest_of(path) if verify_hashes and deep else None
+                    expected[path] = expected.get(path) or digest
+        checks = dict(zip(expected, threads.map(lambda path: check_file(path, expected[path]), expected)))
+        report.checked['files'] = len(checks)
+        blob_paths, derived = store_future.result()
+        folders = folders_future.result()
+        song_clip_keys = song_clips_future.result()
+        session_clip_keys = session_clips_future.result()
+
+    # Audio: fehlt, Prüfsumme falsch oder nicht dekodierbar
+    audio_ok = {}
+    song_ids = {}
+    previous = {}
+    for song in songs:
+        song_ids.setdefault(song.audio_path, []).append(song.id)
+        # Bei --only-unverified gilt das letzte Ergebnis weiter, solange es eines gibt
+        previous.setdefault(song.audio_path, set()).add(song.playable if only_unverified else None)
+    for path, ids in song_ids.items():
+        check = checks.get(path)
+        if not path:
+            report.add('missing_audio', 'Keine Audio-Datei eingetragen', song_ids=ids)
+        elif not check['exists']:
+            report.add('missing_audio', 'Audio-Datei fehlt', path=path, song_ids=ids)
+        elif check['digest_ok'] is False:
+            report.add('corrupt_audio', 'Prüfsumme passt nicht zum Inhalt', path=path, song_ids=ids)
+        else:
+            audio_ok[path] = None if decode and None in previous[path] else False not in previous[path]
+    to_decode = sorted(path for path, ok in audio_ok.items() if ok is None)
+    if to_decode:
+        # Erst hier importieren, multiprocessing braucht nur der Scan
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as processes:
+            for path, error in processes.map(decode_audio, to_decode):
+                audio_ok[path] = error is None
+                if error:
+                    report.add('corrupt_audio', error, path=path, song_ids=song_ids[path])
+        report.checked['decoded'] = len(to_decode)
+
+    catalog_changed = False
+    for song in songs:
+        playable = bool(song.audio_path and audio_ok.get(song.audio_path))
+        report.playable += playable
+        if song.playable != playable:
+            song.playable = playable
+            catalog_changed = True
+        song.verified_at = now
+
+        # Cover fehlt oder ist beschädigt
+        check = checks.get(song.cover_path)
+        if song.cover_path and (not check['exists'] or check['digest_ok'] is False):
+            report.add('stale_covers', 'Cover fehlt oder ist beschädigt', song_id=song.id, path=song.cover_path)
+            if repair:
+                release_media(song.cover_path)
+                song.cover_path = None
+                if playable:
+                    try:
+                        song.cover_path = store_embedded_cover(song.audio_path)
+                    except Exception as e:
+                        app.logger.warning(f"Cover für Song {song.id} nicht wiederhergestellt: {e}")
+                report.repaired['stale_covers'] += 1
+                catalog_changed = True
+    db.session.commit()
+
+    # Alte Song-Ordner: ohne Verweis verwaist, sonst nicht mehr verwendete Dateien darin
+    used_files = {}
+    for song in songs:
+        folder = legacy_song_folder(song)
+        if folder:
+            used_files.setdefault(os.path.abspath(folder), set()).update(
+                os.path.abspath(path) for path in (song.audio_path, song.cover_path) if path
+            )
+    for folder in folders:
+        used = used_files.get(os.path.abspath(folder))
+        if used is None:
+            report.add('orphan_folders', 'Kein Song verweist auf diesen Ordner', path=folder)
+            if repair and older_than(os.path.getmtime(folder), grace):
+                shutil.rmtree(folder, ignore_errors=True)
+                report.repaired['orphan_folders'] += 1
+            continue
+        cover_roots = [os.path.splitext(path)[0] + '.' for path in used]
+        with os.scandir(folder) as entries:
+            files = [entry for entry in entries if not entry.is_dir(follow_symlinks=False)]
+        for entry in files:
+            path = os.path.abspath(entry.path)
+            if path in used or any(path.startswith(root) for root in cover_roots):
+                continue
+            category = 'stale_covers' if entry.name.startswith('cover_') else 'stale_files'
+            report.add(category, 'Datei wird von keinem Song verwendet', path=path)
+            if repair:
+                remove_stale_file(path, category, grace, report)
+
+    # media_store: Dateien ohne Eintrag, Einträge ohne Datei, falsche Verweiszähler
+    for path in blob_paths:
+        if path in blob_rows:
+            continue
+        report.add('orphan_blobs', 'Datei ohne Datenbankeintrag', path=path)
+        if repair:
+            with try_lock(media_lock_path(media_store.digest_of(path))) as acquired:
+                # Unter der Sperre erneut prüfen, die Datei kann inzwischen wieder verwendet werden
+                if (acquired and older_than(os.path.getmtime(path), grace)
+                        and not db.session.query(MediaBlob.query.filter_by(path=path).exists()).scalar()):
+                    media_store.remove(path)
+                    report.repaired['orphan_blobs'] += 1
+    for path, blobs in derived.items():
+        if not blobs:
+            report.add('stale_covers', 'Cover-Variante ohne Original', path=path)
+            if repair:
+                remove_stale_file(path, 'stale_covers', grace, report)
+    on_disk = set(blob_paths)
+    for path, blob in blob_rows.items():
+        if path not in on_disk and blob.refs <= 0:
+            report.add('orphan_blobs', 'Datenbankeintrag ohne Datei', path=path)
+            if repair:
+                db.session.execute(db.delete(MediaBlob).where(MediaBlob.path == path, MediaBlob.refs <= 0))
+                report.repaired['orphan_blobs'] += 1
+    references = song_media_references()
+    for path in set(references) | set(blob_rows):
+        counted = blob_rows[path].refs if path in blob_rows else None
+        if counted == references.get(path, 0):
+            continue
+        report.add('refcount_drift', f"refs={counted}, tatsächlich {references.get(path, 0)}", path=path)
+        if not repair:
+            continue
+        if path in blob_rows:
+            refs = counted_references(MediaBlob.path)
+            db.session.execute(db.update(MediaBlob).where(MediaBlob.path == path).values(
+                refs=refs,
+                released_at=db.case((refs <= 0, db.func.coalesce(MediaBlob.released_at, now)), else_=None),
+            ))
+        elif path in on_disk:
+            db.session.add(MediaBlob(path=path, sha256=media_store.digest_of(path), size=os.path.getsize(path),
+                                     refs=references[path]))
+        report.repaired['refcount_drift'] += 1
+    db.session.commit()
+
+    # Clips: Einträge ohne Datenbankzeile und Zeilen ohne vollständige Clips
+    known_keys = {row.clip_key for row in clip_rows}
+    for key, mtime in song_clip_keys:
+        if key not in known_keys and older_than(mtime, grace):
+            report.add('stale_clips', 'Clip ohne Datenbankeintrag', path=song_clip_store.path(key, ''))
+            if repair:
+                song_clip_store.remove(key)
+                report.repaired['stale_clips'] += 1
+    songs_by_id = {song.id: song for song in songs}
+    for row in clip_rows:
+        if all(song_clip_store.get(row.clip_key, name) for name in CLIP_FILES.values()):
+            continue
+        report.add('stale_clips', 'Clips fehlen oder sind unvollständig', song_id=row.song_id, clip_key=row.clip_key)
+        if not repair:
+            continue
+        song = songs_by_id.get(row.song_id)
+        if song and song.playable:
+            # Gleicher Schlüssel und Offset, Sessions und Tagesrätsel bleiben gültig
+            try:
+                with song_clip_store.staging(row.clip_key) as staging_dir:
+                    render_clips(song.audio_path, row.offset_ms, staging_dir)
+            except ClipExtractionError as e:
+                app.logger.warning(f"Clips {row.clip_key} nicht neu gerendert: {e}")
+                continue
+        elif isinstance(row, SongClip):
+            db.session.delete(row)
+        else:
+            continue
+        report.repaired['stale_clips'] += 1
+    for key, mtime in session_clip_keys:
+        if key not in session_ids and older_than(mtime, grace):
+            report.add('stale_clips', 'Session-Clip ohne Session', path=clip_store.path(key, ''))
+            if repair:
+                clip_store.remove(key)
+                report.repaired['stale_clips'] += 1
+    db.session.commit()
+
+    if catalog_changed:
+        catalog.invalidate()
+    report.finish()
+    return report
+
+@app.cli.command('scan-library')
+@click.option('--repair', is_flag=True, help='Befunde beheben statt nur zu melden')
+@click.option('--hash/--no-hash', 'verify_hashes', default=True, help='SHA-256 der Dateien im media_store prüfen')
+@click.option('--decode/--no-decode', default=True, help='Audio-Dateien mit ffmpeg vollständig dekodieren')
+@click.option('--only-unverified', is_flag=True, help='Nur Songs ohne Prüfergebnis hashen und dekodieren')
+@click.option('--workers', type=int, default=None, help='Parallele Prüfungen (Standard: Anzahl CPUs)')
+@click.option('--json', 'as_json', is_flag=True, help='Vollständigen Bericht als JSON ausgeben')
+def scan_library_command(repair, verify_hashes, decode, only_unverified, workers, as_json):
+    report = scan_library(repair, verify_hashes, decode, only_unverified, workers)
+    if as_json:
+        print(json.dumps(report.as_dict(), indent=2, ensure_ascii=False))
+    else:
+        print('\n'.join(report.summary_lines()))
+
 def init_database():
     # Erstelle data Verzeichnis im gleichen Ordner wie app.py
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
@@ -67,8 +764,61 @@ def init_database():
 
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         print("Datenbank initialisiert")
 
+# Spalten, die nach dem ersten Release hinzugekommen sind. create_all legt
+# nur fehlende Tabellen an, bestehende Tabellen werden hier ergänzt.
+SCHEMA_UPGRADES = [
+    ('game_session', 'clip_key', 'VARCHAR(100)'),
+    ('game_session', 'finished_at', 'DATETIME'),
+    ('game_session', 'mode', "VARCHAR(20) DEFAULT 'random'"),
+    ('game_session', 'player_id', 'VARCHAR(32)'),
+    ('song', 'playable', 'BOOLEAN'),
+    ('song', 'verified_at', 'DATETIME'),
+]
+
+# Indizes, die create_all auf bestehenden Tabellen nicht anlegt
+INDEX_UPGRADES = [
+    'CREATE INDEX IF NOT EXISTS ix_game_session_created_at ON game_session (created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_game_session_finished_at ON game_session (finished_at)',
+    'CREATE INDEX IF NOT EXISTS ix_game_session_player_created ON game_session (player_id, created_at)',
+]
+
+def upgrade_schema():
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table, column, column_type in SCHEMA_UPGRADES:
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            if column not in existing:
+                connection.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+                print(f"Spalte {table}.{column} ergänzt")
+        for statement in INDEX_UPGRADES:
+            connection.execute(db.text(statement))
+
+_initialized = False
+
+def create_app():
+    """Einstiegspunkt für gunicorn, die CLI (``app:create_app()``) und Skripte.
+
+    Bindet die Datenbank an die App, legt Ablagen und Ordner an, ergänzt
+    fehlende Tabellen, Spalten und Indizes und gibt die App zurück. Mit
+    gunicorn --preload läuft das einmal im Master; die Worker entstehen per
+    fork und importieren und initialisieren nichts mehr. Ohne --preload
+    wartet jeder weitere Prozess an der Sperre und findet ein fertiges Schema.
+    """
+    global _initialized
+    if not _initialized:
+        db.init_app(app)
+        init_storage()
+        with hold_lock(os.path.join(app.config['LOCK_FOLDER'], 'schema.lock')):
+            init_database()
+        with app.app_context():
+            # Keine offenen Verbindungen an geforkte Worker vererben
+            db.engine.dispose()
+        _initialized = True
+    return app
+
 # Fehlerbehandlung
 @app.errorhandler(404)
 def not_found(error):
@@ -80,112 +830,897 @@ def internal_error(error):
     return jsonify({'error': 'Interner Serverfehler'}), 500
 
 # API-Routen
+# Öffentlich sichtbare Felder der Songliste (Hinweise bleiben dem Admin vorbehalten)
+PUBLIC_LISTING_FIELDS = ('id', 'title', 'artist', 'year', 'genre')
+
+def send_listing(allowed_fields, default_fields, cache_control):
+    """Eine Seite der Katalogliste (Parameter siehe ListingQuery). Der ETag
+    ergibt sich aus Katalogversion und Anfrage, ein passendes If-None-Match
+    wird also ohne Serialisierung mit 304 beantwortet. Die nächste Seite steht
+    im Link-Header und in X-Next-Cursor."""
+    try:
+        query = ListingQuery(request.args, allowed_fields, default_fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    snapshot = catalog.snapshot()
+    # Schwach, weil gzip/br/unkomprimiert denselben ETag tragen
+    etag = hashlib.sha1(f'{snapshot.version}:{query.key!r}'.encode('utf-8')).hexdigest()
+    headers = {'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+    if request.if_none_match.contains_weak(etag):
+        metrics.inc('spordle_listing_responses_total', result='not_modified')
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag, weak=True)
+        return response
+
+    try:
+        page, cached = snapshot.listing.page(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    metrics.inc('spordle_listing_responses_total', result='cached' if cached else 'rendered')
+    encoding = choose_encoding(request.accept_encodings)
+    response = Response(page.encoded(encoding), mimetype='application/json', headers=headers)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if page.next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = page.next_cursor
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    response.set_etag(etag, weak=True)
+    return response
+
 @app.route('/api/songs', methods=['GET'])
 def get_songs():
     try:
-        songs = Song.query.all()
-        return jsonify([{
-            'id': s.id,
-            'title': s.title,
-            'artist': s.artist
-        } for s in songs])
+        return send_listing(PUBLIC_LISTING_FIELDS, ('id', 'title', 'artist'), REVALIDATE_CACHE_CONTROL)
     except Exception as e:
+        log_exception('get_songs')
         return jsonify({'error': 'Fehler beim Abrufen der Songs'}), 500
 
-def create_temp_audio_files(song):
-    temp_directory = os.path.join(basedir, 'data', 'temp_audio')
-
-    os.makedirs(temp_directory, exist_ok=True)
+# Dateinamen der Clips innerhalb eines Clip-Store-Eintrags (mp3-Profil)
+CLIP_FILES = {
+    'start': 'start.mp3',
+    'hint3': 'hint3.mp3',
+    'reveal': 'reveal.mp3',
+}
 
-    # Lösche die momentanen dateien in dem temp ordner.
-    for filename in os.listdir(temp_directory):
-        file_path = os.path.join(temp_directory, filename)
-        if os.path.isfile(file_path):
-            os.remove(file_path)
+def clip_filename(kind, profile):
+    return f"{kind}.{ENCODING_PROFILES[profile]['extension']}"
 
-    try:
-        audio = AudioSegment.from_mp3(song.audio_path)
-        audio_start_time = random.randint(0, max(0, (song.length*1000) - 30000))
+def get_song_duration_ms(song):
+    if song.length:
+        return song.length * 1000
+    return probe_duration_ms(song.audio_path)
 
-        if audio_start_time > (song.length*1000) - 30000:
-            audio_start_time = (song.length*1000) - 30000
+def random_clip_offset(duration_ms):
+    return random.randint(0, max(0, duration_ms - CLIP_DURATIONS_MS['reveal']))
 
-        start = audio[audio_start_time : audio_start_time+7000]
-        hint3 = audio[audio_start_time : audio_start_time+15000]
-        reveal = audio[audio_start_time : audio_start_time+30000]
-
-        # Speicher im temp directory
-        start.export(os.path.join(temp_directory, "start.mp3"), format="mp3")
-        hint3.export(os.path.join(temp_directory, "hint3.mp3"), format="mp3")
-        reveal.export(os.path.join(temp_directory, "reveal.mp3"), format="mp3")
+def render_clips(audio_path, offset_ms, target_dir):
+    # Alle Clips im mp3-Profil, ein ffmpeg-Lauf; andere Profile rendert send_clip bei Bedarf
+    extract_clips(audio_path, offset_ms, {
+        kind: os.path.join(target_dir, filename) for kind, filename in CLIP_FILES.items()
+    })
 
+@app.route('/api/songs/search', methods=['GET'])
+def search_songs():
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        snapshot = catalog.snapshot()
+        results = snapshot.search_index.search(query, limit) if query else []
+        response = jsonify([{
+            'id': s.id,
+            'title': s.title,
+            'artist': s.artist
+        } for s in results])
+        # Ergebnis hängt nur von Katalogversion und Anfrage ab
+        response.set_etag(hashlib.sha1(f'{snapshot.version}:{limit}:{query.casefold()}'.encode('utf-8')).hexdigest())
+        response.cache_control.public = True
+        response.cache_control.max_age = 60
+        return response.make_conditional(request)
     except Exception as e:
-        print(f"Fehler beim Erstellen der Temp-Audio-Dateien: {e}")
-        raise
+        log_exception('search_songs')
+        return jsonify({'error': 'Fehler bei der Suche'}), 500
+
+def primary_genre(song):
+    return (song.genre or '').split(',')[0].strip().lower()
+
+def song_weight_function(songs):
+    # Gewicht pro Song für den Sampler, None = gleichverteilt
+    weighting = app.config['SAMPLER_WEIGHTING']
+    if weighting == 'genre':
+        quotas = app.config['SAMPLER_GENRE_QUOTAS']
+        counts = {}
+        for song in songs:
+            counts[primary_genre(song)] = counts.get(primary_genre(song), 0) + 1
+        return lambda song: quotas.get(primary_genre(song), 1.0) / counts[primary_genre(song)]
+    if weighting == 'recency':
+        cutoff = datetime.utcnow() - timedelta(days=app.config['SAMPLER_RECENCY_DAYS'])
+        plays = dict(
+            db.session.query(GameSession.song_id, db.func.count())
+            .filter(GameSession.created_at >= cutoff).group_by(GameSession.song_id)
+        )
+        return lambda song: 1.0 / (1 + plays.get(song.id, 0))
+    return None
 
-@app.route('/api/game/start', methods=['POST'])
-def start_game():
+_sampler = None
+_sampler_lock = threading.Lock()
+
+def _sampler_stale(sampler, snapshot):
+    if sampler is None or sampler.version != snapshot.version:
+        return True
+    # Die Spielhäufigkeiten für 'recency' ändern sich auch ohne Katalogänderung
+    return (app.config['SAMPLER_WEIGHTING'] == 'recency'
+            and time.monotonic() - sampler.built_at > app.config['SAMPLER_REFRESH_INTERVAL'])
+
+def song_sampler():
+    """Sampler über alle spielbaren Songs, neu aufgebaut nach jeder
+    Katalogänderung (ein os.path.exists pro Song und Aufbau)."""
+    global _sampler
+    snapshot = catalog.snapshot()
+    if _sampler_stale(_sampler, snapshot):
+        with _sampler_lock:
+            if _sampler_stale(_sampler, snapshot):
+                _sampler = SongSampler(snapshot.songs, song_weight_function(snapshot.songs), version=snapshot.version)
+    return _sampler
+
+PLAYER_COOKIE = 'spordle_player'
+_PLAYER_ID = re.compile(r'^[0-9a-f]{32}$')
+
+def player_id():
+    value = request.cookies.get(PLAYER_COOKIE, '')
+    return value if _PLAYER_ID.match(value) else None
+
+def recent_song_ids(player):
+    # Zuletzt gespielte Songs des Spielers, über den Index (player_id, created_at)
+    limit = app.config['PLAYER_HISTORY_SIZE']
+    if not player or limit <= 0:
+        return frozenset()
+    rows = (db.session.query(GameSession.song_id).filter(GameSession.player_id == player)
+            .order_by(GameSession.created_at.desc()).limit(limit))
+    return frozenset(song_id for (song_id,) in rows)
+
+def create_temp_audio_files(song, session_id):
+    # Fehler gehen an den Aufrufer, der sie protokolliert (log_exception) oder den Song überspringt
+    audio_start_time = random_clip_offset(get_song_duration_ms(song))
+
+    # Clips in einen Staging-Ordner schreiben, erst danach für die Session sichtbar machen
+    with clip_store.staging(session_id) as staging_dir:
+        render_clips(song.audio_path, audio_start_time, staging_dir)
+
+def choose_clip_offsets(duration_ms, count):
+    # Song in gleich große Abschnitte teilen und pro Abschnitt einen zufälligen
+    # Startpunkt wählen, damit sich die Clips eines Songs nicht ähneln
+    max_start = max(0, duration_ms - CLIP_DURATIONS_MS['reveal'])
+    if max_start == 0:
+        return [0]
+    step = max_start / count
+    return sorted({int(i * step + random.random() * step) for i in range(count)})
+
+def precompute_song_clips(song_id):
+    song = Song.query.get(song_id)
+    if not song or not song.audio_path or not os.path.exists(song.audio_path):
+        return 0
+
+    old_clips = SongClip.query.filter_by(song_id=song.id).all()
+
+    # Echte Dateilänge verwenden, die Angabe im Formular kann abweichen
+    duration_ms = probe_duration_ms(song.audio_path)
+    new_clips = []
+    for offset in choose_clip_offsets(duration_ms, app.config['CLIPS_PER_SONG']):
+        # Zufälliger Schlüssel, da er in Clip-URLs öffentlich wird und den Song nicht verraten darf
+        clip_key = f"clip-{uuid.uuid4().hex}"
+        with song_clip_store.staging(clip_key) as staging_dir:
+            render_clips(song.audio_path, offset, staging_dir)
+        new_clips.append(SongClip(song_id=song.id, offset_ms=offset, clip_key=clip_key))
+
+    # Alte Clips (z.B. nach neuem Audio-Upload) durch die neuen ersetzen
+    new_keys = {clip.clip_key for clip in new_clips}
+    for clip in old_clips:
+        db.session.delete(clip)
+    db.session.flush()
+    db.session.add_all(new_clips)
+    db.session.commit()
+    for clip in old_clips:
+        if clip.clip_key not in new_keys:
+            song_clip_store.remove(clip.clip_key)
+    print(f"{len(new_clips)} Clips für Song {song.id} vorberechnet")
+    return len(new_clips)
+
+def queue_clip_precompute(song_id):
+    return clip_jobs.submit(('clips', song_id), precompute_song_clips, song_id)
+
+def delete_song_clips(song_id):
+    clips = SongClip.query.filter_by(song_id=song_id).all()
+    clips += DailyPuzzle.query.filter_by(song_id=song_id).all()
+    for clip in clips:
+        song_clip_store.remove(clip.clip_key)
+        db.session.delete(clip)
+
+@app.cli.command('precompute-clips')
+def precompute_clips_command():
+    # Clips für alle Songs erzeugen, die noch keine haben (z.B. Bestandsdaten)
+    song_ids = [song_id for (song_id,) in db.session.query(Song.id).filter(Song.audio_path.isnot(None))]
+    with_clips = {song_id for (song_id,) in db.session.query(SongClip.song_id).distinct()}
+    for song_id in song_ids:
+        if song_id in with_clips:
+            continue
+        try:
+            precompute_song_clips(song_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Fehler beim Vorberechnen der Clips für Song {song_id}: {e}")
+
+@app.cli.command('backfill-covers')
+def backfill_covers_command():
+    # Vorschaubilder für alle vorhandenen Cover erzeugen, z.B. für die bestehende Bibliothek
+    for song_id, cover_path in db.session.query(Song.id, Song.cover_path).filter(Song.cover_path.isnot(None)):
+        if not os.path.exists(cover_path) or not missing_variants(cover_path):
+            continue
+        try:
+            created = generate_cover_variants(cover_path)
+            print(f"{created} Cover-Varianten für Song {song_id} erzeugt")
+        except Exception as e:
+            print(f"Fehler beim Erzeugen der Cover-Varianten für Song {song_id}: {e}")
+
+def daily_date():
     try:
-        songs = Song.query.all()
-        if not songs:
-            return jsonify({'error': 'Keine Songs verfügbar'}), 400
+        timezone = ZoneInfo(app.config['DAILY_TIMEZONE'])
+    except ZoneInfoNotFoundError:
+        timezone = None
+    return datetime.now(timezone).date()
+
+def choose_daily_song(day):
+    """Song und Offset für einen Tag, abgeleitet aus Seed und Datum.
+
+    Songs der letzten DAILY_NO_REPEAT_DAYS Tage werden ausgelassen, solange
+    noch andere übrig sind.
+    """
+    seed = hashlib.sha256(f"{app.config['DAILY_SEED']}:{day.isoformat()}".encode()).digest()
+    rng = random.Random(seed)
+    recent = {song_id for (song_id,) in db.session.query(DailyPuzzle.song_id).filter(
+        DailyPuzzle.date >= day - timedelta(days=app.config['DAILY_NO_REPEAT_DAYS']),
+        DailyPuzzle.date < day,
+    )}
+    candidates = song_sampler().playable()
+    if not candidates:
+        return None, None
+    song = rng.choice([song for song in candidates if song.id not in recent] or candidates)
+    max_start = max(0, probe_duration_ms(song.audio_path) - CLIP_DURATIONS_MS['reveal'])
+    return song, rng.randint(0, max_start)
+
+# Tage, deren Rätsel in diesem Prozess schon als fertig bekannt sind
+_daily_ready = set()
+
+def prepare_daily_puzzle(day):
+    """Wählt das Rätsel eines Tages und rendert seine Clips. Der Eintrag wird
+    erst nach dem Rendern angelegt, ein vorhandener Eintrag hat also immer Clips."""
+    puzzle = DailyPuzzle.query.get(day)
+    if puzzle and song_clip_store.exists(puzzle.clip_key):
+        _daily_ready.add(day)
+        return puzzle
+
+    if puzzle:
+        # Clips verloren gegangen (z.B. Volume geleert oder verdrängt). /api/clips/<key>
+        # ist immutable gecacht, daher unter neuem Schlüssel rendern und umhängen
+        song = Song.query.get(puzzle.song_id)
+        old_key, clip_key = puzzle.clip_key, f"daily-{uuid.uuid4().hex}"
+        with song_clip_store.staging(clip_key) as staging_dir:
+            render_clips(song.audio_path, puzzle.offset_ms, staging_dir)
+        updated = DailyPuzzle.query.filter_by(date=day, clip_key=old_key).update({'clip_key': clip_key})
+        # Laufende Sessions des Tages bekommen die neuen Clips
+        GameSession.query.filter_by(clip_key=old_key).update({'clip_key': clip_key})
+        db.session.commit()
+        if updated:
+            song_clip_store.remove(old_key)
+        else:
+            # Ein anderer Prozess hat schon neu gerendert
+            song_clip_store.remove(clip_key)
+        db.session.expire(puzzle)
+        _daily_ready.add(day)
+        return puzzle
+
+    song, offset = choose_daily_song(day)
+    if not song:
+        return None
+    clip_key = f"daily-{uuid.uuid4().hex}"
+    with song_clip_store.staging(clip_key) as staging_dir:
+        render_clips(song.audio_path, offset, staging_dir)
+    puzzle = DailyPuzzle(date=day, song_id=song.id, offset_ms=offset, clip_key=clip_key)
+    db.session.add(puzzle)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Ein anderer Prozess war schneller (z.B. CLI und Server gleichzeitig)
+        db.session.rollback()
+        song_clip_store.remove(clip_key)
+        puzzle = DailyPuzzle.query.get(day)
+    print(f"Tagesrätsel für {day.isoformat()} vorbereitet")
+    _daily_ready.add(day)
+    return puzzle
+
+def queue_daily_puzzle(day):
+    if day in _daily_ready:
+        return None
+    return clip_jobs.submit(('daily', day.isoformat()), prepare_daily_puzzle, day)
+
+@app.cli.command('prepare-daily')
+@click.option('--days', default=2, show_default=True, help='Anzahl Tage ab heute.')
+def prepare_daily_command(days):
+    today = daily_date()
+    for i in range(days):
+        prepare_daily_puzzle(today + timedelta(days=i))
+
+def clip_url(clip_key, kind):
+    return f'/api/clips/{clip_key}/{kind}'
+
+def session_audio_url(session, kind):
+    # Clips des Tagesrätsels sind für alle Spieler gleich und damit über ihren Schlüssel cachebar
+    if session.mode == 'daily':
+        return clip_url(session.clip_key, kind)
+    return f'/api/audio/{session.id}/{kind}'
+
+def start_daily_game():
+    # Keine Audio-Arbeit im Request: die Clips wurden vorab gerendert
+    today = daily_date()
+    puzzle = DailyPuzzle.query.get(today)
+    if not puzzle or not song_clip_store.exists(puzzle.clip_key):
+        # Heute vor morgen, die Auswahl berücksichtigt die Vortage
+        _daily_ready.discard(today)
+        queue_daily_puzzle(today)
+        queue_daily_puzzle(today + timedelta(days=1))
+        response = jsonify({'error': 'Das Tagesrätsel wird gerade vorbereitet, bitte versuche es gleich noch einmal'})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    queue_daily_puzzle(today + timedelta(days=1))
+    song_clip_store.touch(puzzle.clip_key)
+
+    session = GameSession(song_id=puzzle.song_id, clip_key=puzzle.clip_key, mode='daily')
+    db.session.add(session)
+    record_game_started(puzzle.song_id, 'daily')
+    db.session.commit()
+    return jsonify({
+        'session_id': session.id,
+        'audio_url': session_audio_url(session, 'start'),
+        'mode': 'daily',
+        'date': today.isoformat(),
+    })
+
+def pick_song_clip(song_id):
+    """Zufälliger vorberechneter Clip des Songs, dessen Dateien noch da sind.
+    Verdrängte Clips werden dabei aus der Datenbank entfernt; der Aufrufer
+    rendert ohne Treffer für die Session und plant die Vorberechnung neu."""
+    for clip in SongClip.query.filter_by(song_id=song_id).order_by(db.func.random()):
+        if song_clip_store.exists(clip.clip_key):
+            # Zuletzt gespielte Clips werden zuletzt verdrängt
+            song_clip_store.touch(clip.clip_key)
+            return clip
+        db.session.delete(clip)
+    return None
 
-        song = random.choice(songs)
+def prepare_session(song):
+    # Vorberechnete Clips bevorzugen, sonst Clips für genau diese Session rendern
+    clip = pick_song_clip(song.id)
+    prepared = PreparedSession(id=str(uuid.uuid4()), song_id=song.id, clip_key=clip.clip_key if clip else None)
+    if not clip:
+        create_temp_audio_files(song, prepared.id)
+        queue_clip_precompute(song.id)
+    db.session.add(prepared)
+    db.session.commit()
+    return prepared
+
+def discard_prepared_sessions(*conditions):
+    prepared = PreparedSession.query.filter(*conditions).all()
+    for entry in prepared:
+        if not entry.clip_key:
+            clip_store.remove(entry.id)
+        db.session.delete(entry)
+    return len(prepared)
+
+def refill_session_pool():
+    """Füllt den Vorrat auf SESSION_POOL_SIZE auf. Läuft als Hintergrund-Job,
+    über die Job-Sperre in höchstens einem Worker-Prozess gleichzeitig."""
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['SESSION_POOL_MAX_AGE'])
+    expired = discard_prepared_sessions(PreparedSession.created_at < cutoff)
+    db.session.commit()
+    metrics.inc('spordle_session_pool_total', expired, result='expired')
+
+    missing = app.config['SESSION_POOL_SIZE'] - PreparedSession.query.count()
+    sampler = song_sampler()
+    attempts = 0
+    while missing > 0 and len(sampler) and attempts < 2 * app.config['SESSION_POOL_SIZE']:
+        attempts += 1
+        song = sampler.draw()
+        try:
+            prepare_session(song)
+        except ClipExtractionError:
+            db.session.rollback()
+            sampler.mark_unplayable(song.id)
+            continue
+        metrics.inc('spordle_session_pool_total', result='prepared')
+        missing -= 1
+
+def queue_session_pool_refill():
+    if app.config['SESSION_POOL_SIZE'] > 0:
+        clip_jobs.submit('session-pool', refill_session_pool)
+
+def pop_prepared_session(player=None, exclude=frozenset()):
+    """Nimmt die älteste vorbereitete Session aus dem Vorrat, deren Song nicht
+    in ``exclude`` liegt, und legt sie als GameSession an. DELETE ... RETURNING
+    ist atomar, zwei Worker können denselben Eintrag also nicht beide bekommen."""
+    candidates = db.select(PreparedSession.id)
+    if exclude:
+        candidates = candidates.where(PreparedSession.song_id.not_in(exclude))
+    oldest = candidates.order_by(PreparedSession.created_at).limit(1).scalar_subquery()
+    for _ in range(3):
+        row = db.session.execute(
+            db.delete(PreparedSession)
+            .where(PreparedSession.id == oldest)
+            .returning(PreparedSession.id, PreparedSession.song_id, PreparedSession.clip_key)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if not row:
+            break
+        if row.clip_key:
+            ready = song_clip_store.get(row.clip_key, CLIP_FILES['start'])
+            if ready:
+                song_clip_store.touch(row.clip_key)
+        else:
+            ready = clip_store.get(row.id, CLIP_FILES['start'])
+        if not ready:
+            # Clips inzwischen ersetzt oder verdrängt
+            db.session.commit()
+            continue
+        session = GameSession(id=row.id, song_id=row.song_id, clip_key=row.clip_key, player_id=player)
+        db.session.add(session)
+        record_game_started(row.song_id, 'random')
+        db.session.commit()
+        metrics.inc('spordle_session_pool_total', result='hit')
+        return session
+    db.session.rollback()
+    metrics.inc('spordle_session_pool_total', result='miss')
+    return None
 
-        if not song.audio_path or not os.path.exists(song.audio_path):
-            return jsonify({'error': 'Song hat keine gültige Audio-Datei'}), 400
+@app.cli.command('fill-session-pool')
+def fill_session_pool_command():
+    refill_session_pool()
+    print(f"{PreparedSession.query.count()} Sessions im Vorrat")
+
+@app.route('/api/admin/session-pool', methods=['GET'])
+def get_session_pool_stats():
+    # Zähler summiert über alle Worker (Stand bis zu METRICS_FLUSH_INTERVAL alt)
+    return jsonify({
+        'size': app.config['SESSION_POOL_SIZE'],
+        'depth': PreparedSession.query.count(),
+        'hits': metrics.counter_value('spordle_session_pool_total', result='hit'),
+        'misses': metrics.counter_value('spordle_session_pool_total', result='miss'),
+        'prepared': metrics.counter_value('spordle_session_pool_total', result='prepared'),
+        'expired': metrics.counter_value('spordle_session_pool_total', result='expired'),
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    active = GameSession.query.filter(GameSession.finished_at.is_(None)).count()
+    finished = GameSession.query.filter(GameSession.finished_at.isnot(None)).count()
+    gauges = [
+        ('spordle_clip_store_bytes', {'store': 'sessions'}, clip_store.usage()),
+        ('spordle_clip_store_bytes', {'store': 'songs'}, song_clip_store.usage()),
+        ('spordle_game_sessions', {'state': 'active'}, active),
+        ('spordle_game_sessions', {'state': 'finished'}, finished),
+        ('spordle_session_pool_depth', {}, PreparedSession.query.count()),
+    ]
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    # Lebt der Prozess? Keine Datenbank- oder Dateizugriffe, damit ein
+    # ausgelasteter Worker nicht als tot gilt
+    return jsonify({'status': 'ok'})
+
+def readiness_checks():
+    checks = {}
+    try:
+        # Fragt eine der zuletzt ergänzten Spalten ab und erkennt so auch ein veraltetes Schema
+        db.session.execute(db.select(Song.id, Song.playable).limit(1)).all()
+        checks['database'] = {'ok': True}
+    except Exception as e:
+        db.session.rollback()
+        checks['database'] = {'ok': False, 'error': str(e).splitlines()[0]}
+
+    folders = {
+        'uploads': app.config['UPLOAD_FOLDER'],
+        'media': app.config['MEDIA_FOLDER'],
+        'upload_staging': app.config['UPLOAD_STAGING_FOLDER'],
+        'session_clips': app.config['CLIP_STORE_FOLDER'],
+        'song_clips': app.config['SONG_CLIP_FOLDER'],
+    }
+    storage = {'ok': True, 'folders': {}}
+    for name, folder in folders.items():
+        writable = os.access(folder, os.W_OK)
+        free = shutil.disk_usage(folder).free if writable else 0
+        ok = writable and free >= app.config['READY_MIN_FREE_BYTES']
+        storage['folders'][name] = {'ok': ok, 'free_bytes': free}
+        storage['ok'] = storage['ok'] and ok
+    checks['storage'] = storage
+
+    missing = missing_encoders(app.config['CLIP_PROFILES']) if ffmpeg_available() else None
+    checks['clip_pipeline'] = {
+        'ok': missing == [],
+        'ffmpeg': missing is not None,
+        'missing_encoders': missing or [],
+        'pending_jobs': clip_jobs.pending(),
+    }
+    return checks
+
+@app.route('/readyz')
+def readyz():
+    """Kann dieser Worker Spiele ausliefern? Prüft Datenbank samt Schema,
+    beschreibbare Ablagen mit genug freiem Platz und ffmpeg mit den Encodern
+    der Clip-Profile. 503, sobald eine Prüfung fehlschlägt."""
+    checks = readiness_checks()
+    ready = all(check['ok'] for check in checks.values())
+    response = jsonify({'status': 'ready' if ready else 'not_ready', 'checks': checks})
+    response.status_code = 200 if ready else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def start_random_session(player, recent):
+    """Zieht einen Song, den der Spieler zuletzt nicht hatte, und legt die
+    Session an. Lässt sich die Audio-Datei nicht schneiden, wird der Song bis
+    zum nächsten Katalogstand übersprungen und neu gezogen."""
+    sampler = song_sampler()
+    for _ in range(3):
+        song = sampler.draw(exclude=recent)
+        if not song:
+            return None
+
+        # Vorberechnete Clips nutzen, sonst einmalig für diese Session rendern
+        clip = pick_song_clip(song.id)
 
-        session = GameSession(song_id=song.id)
+        session = GameSession(song_id=song.id, clip_key=clip.clip_key if clip else None, player_id=player)
         db.session.add(session)
+        record_game_started(song.id, 'random')
         db.session.commit()
-        create_temp_audio_files(song)
-        return jsonify({
+        if clip:
+            return session
+        try:
+            create_temp_audio_files(song, session.id)
+        except ClipExtractionError as e:
+            app.logger.warning(f"Song {song.id} wird übersprungen: {e}")
+            sampler.mark_unplayable(song.id)
+            record_game_started(song.id, 'random', session.created_at, count=-1)
+            db.session.delete(session)
+            db.session.commit()
+            continue
+        queue_clip_precompute(song.id)
+        return session
+    return None
+
+@app.route('/api/game/start', methods=['POST'])
+def start_game():
+    try:
+        mode = request.args.get('mode', 'random')
+        if mode == 'daily':
+            return start_daily_game()
+        if mode != 'random':
+            return jsonify({'error': 'Unbekannter Spielmodus'}), 400
+
+        player = player_id()
+        new_player = player is None
+        if new_player:
+            player = uuid.uuid4().hex
+        recent = frozenset() if new_player else recent_song_ids(player)
+
+        session = pop_prepared_session(player, recent) if app.config['SESSION_POOL_SIZE'] > 0 else None
+        if not session:
+            session = start_random_session(player, recent)
+            if not session:
+                return jsonify({'error': 'Keine Songs verfügbar'}), 400
+        queue_session_pool_refill()
+        maybe_purge_sessions()
+        response = jsonify({
             'session_id': session.id,
             'audio_url': f'/api/audio/{session.id}/start'
         })
+        if new_player:
+            response.set_cookie(PLAYER_COOKIE, player, max_age=365 * 24 * 60 * 60, httponly=True, samesite='Lax')
+        return response
     except Exception as e:
+        log_exception('start_game')
         return jsonify({'error': 'Fehler beim Starten des Spiels'}), 500
 
+def choose_clip_profile():
+    """Format der Clips: ?format= hat Vorrang, danach der Accept-Header.
+    Dort zählen nur ausdrücklich genannte Typen; */* oder audio/*, wie sie
+    die meisten <audio>-Elemente schicken, ergeben das mp3-Profil."""
+    requested = request.args.get('format')
+    if requested in app.config['CLIP_PROFILES']:
+        return requested
+    best, best_quality = DEFAULT_PROFILE, 0
+    for profile in app.config['CLIP_PROFILES']:
+        mimetype = ENCODING_PROFILES[profile]['mimetype']
+        quality = max((q for value, q in request.accept_mimetypes if value.split(';')[0].strip() == mimetype), default=0)
+        if quality > best_quality:
+            best, best_quality = profile, quality
+    return best
+
+def transcode_missing_clip(lookup, kind, profile):
+    """Erzeugt den Clip in ``profile`` beim ersten Abruf aus dem mp3-Clip
+    desselben Eintrags. Die Antwort ist immutable und nach Accept gecacht,
+    ein Ausweichen auf mp3 bliebe also hängen; deshalb wird synchron
+    umcodiert (ein kurzer ffmpeg-Lauf) und nur bei Fehlern mp3 geliefert."""
+    source = lookup(clip_filename(kind, DEFAULT_PROFILE))
+    if not source:
+        return None
+    target = os.path.join(os.path.dirname(source), clip_filename(kind, profile))
+    try:
+        transcode_clip(source, target, profile)
+    except (ClipExtractionError, OSError) as e:
+        app.logger.warning(f"Clip {kind} nicht als {profile} verfügbar: {e}")
+        return None
+    return lookup(clip_filename(kind, profile))
+
+def send_clip(lookup, kind):
+    """Liefert den Clip im ausgehandelten Profil. ``lookup(dateiname)`` gibt
+    den Pfad im Clip-Store zurück oder None."""
+    profile = choose_clip_profile()
+    path = lookup(clip_filename(kind, profile))
+    if not path and profile != DEFAULT_PROFILE:
+        path = transcode_missing_clip(lookup, kind, profile)
+        if not path:
+            profile = DEFAULT_PROFILE
+            path = lookup(clip_filename(kind, profile))
+    if not path:
+        return None
+    response = send_media(path, ENCODING_PROFILES[profile]['mimetype'], IMMUTABLE_CACHE_CONTROL)
+    response.vary.add('Accept')
+    metrics.inc('spordle_clip_responses_total', profile=profile)
+    metrics.inc('spordle_clip_bytes_total', response.content_length or 0, profile=profile)
+    return response
+
+def session_clip_lookup(session_id):
+    session = GameSession.query.get(session_id)
+    if not session:
+        return None
+    if session.clip_key:
+        return lambda filename: song_clip_store.get(session.clip_key, filename)
+    return lambda filename: clip_store.get(session.id, filename)
+
 #---------Getter für temp audio files-----------
 @app.route('/api/audio/<session_id>/start')
 def get_start_audio(session_id):
     try:
-        temp_directory = os.path.join(basedir, 'data', 'temp_audio')
-        audio_path = os.path.join(temp_directory, 'start.mp3')
-        if os.path.exists(audio_path):
-            return send_file(audio_path, mimetype='audio/mpeg')
+        lookup = session_clip_lookup(session_id)
+        response = lookup and send_clip(lookup, 'start')
+        if response:
+            # Clips einer Session ändern sich nie
+            return response
         else:
             return jsonify({'error': 'Audio-Datei nicht gefunden'}), 404
     except Exception as e:
+        log_exception('get_start_audio')
         return jsonify({'error': 'Fehler beim Abrufen der Audio-Datei'}), 500
 
 
 @app.route('/api/audio/<session_id>/hint3')
 def get_hint3_audio(session_id):
     try:
-        temp_directory = os.path.join(basedir, 'data', 'temp_audio')
-        hint3_path = os.path.join(temp_directory, 'hint3.mp3')
+        lookup = session_clip_lookup(session_id)
+        response = lookup and send_clip(lookup, 'hint3')
 
-        if os.path.exists(hint3_path):
-            return send_file(hint3_path, mimetype='audio/mpeg')
+        if response:
+            return response
         else:
             return jsonify({'error': 'Hint-Audio nicht gefunden'}), 404
     except Exception as e:
+        log_exception('get_hint3_audio')
         return jsonify({'error': 'Fehler beim Abrufen der Hint-Audio'}), 500
 
 @app.route('/api/audio/<session_id>/reveal')
 def get_reveal_audio(session_id):
     try:
-        temp_directory = os.path.join(basedir, 'data', 'temp_audio')
-        reveal_path = os.path.join(temp_directory, 'reveal.mp3')
+        lookup = session_clip_lookup(session_id)
+        response = lookup and send_clip(lookup, 'reveal')
 
-        if os.path.exists(reveal_path):
-            return send_file(reveal_path, mimetype='audio/mpeg')
+        if response:
+            return response
         else:
             return jsonify({'error': 'Reveal-Audio nicht gefunden'}), 404
     except Exception as e:
+        log_exception('get_reveal_audio')
         return jsonify({'error': 'Fehler beim Abrufen der Reveal-Audio'}), 500
 
+# Vorberechnete Clips direkt über ihren Schlüssel, unabhängig von einer Session
+@app.route('/api/clips/<clip_key>/<kind>')
+def get_clip_audio(clip_key, kind):
+    try:
+        response = None
+        if kind in CLIP_FILES and song_clip_store.valid_key(clip_key):
+            response = send_clip(lambda filename: song_clip_store.get(clip_key, filename), kind)
+        if response:
+            return response
+        else:
+            return jsonify({'error': 'Audio-Datei nicht gefunden'}), 404
+    except Exception as e:
+        log_exception('get_clip_audio')
+        return jsonify({'error': 'Fehler beim Abrufen der Audio-Datei'}), 500
+
+MAX_ATTEMPTS = 10
+
+def purge_sessions(now=None):
+    """Löscht beendete Sessions nach SESSION_FINISHED_TTL und nie beendete
+    nach SESSION_ABANDONED_TTL. Beide Abfragen laufen über Indizes."""
+    now = now or datetime.utcnow()
+    finished_before = now - timedelta(seconds=app.config['SESSION_FINISHED_TTL'])
+    abandoned_before = now - timedelta(seconds=app.config['SESSION_ABANDONED_TTL'])
+    deleted = db.session.execute(
+        db.delete(GameSession).where(GameSession.finished_at < finished_before)
+    ).rowcount
+    deleted += db.session.execute(
+        db.delete(GameSession).where(GameSession.finished_at.is_(None), GameSession.created_at < abandoned_before)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+_last_session_purge = 0.0
+
+def maybe_purge_sessions():
+    # Höchstens alle SESSION_PURGE_INTERVAL Sekunden pro Worker, im Hintergrund
+    global _last_session_purge
+    now = time.monotonic()
+    if now - _last_session_purge < app.config['SESSION_PURGE_INTERVAL']:
+        return
+    _last_session_purge = now
+    clip_jobs.submit('purge-sessions', purge_sessions)
+    clip_jobs.submit('media-gc', collect_media_garbage)
+
+# Versuche, ab denen die Hinweise freigeschaltet werden (siehe make_guess)
+HINT_THRESHOLDS = {'hint_text': 3, 'hint_cover': 6, 'hint_audio': 9}
+SONG_STATS_COLUMNS = ('started', 'solved', 'failed', 'attempts', *HINT_THRESHOLDS)
+
+def bump_stats(model, keys, **counts):
+    # INSERT ... ON CONFLICT DO UPDATE, ohne Commit: läuft in der Transaktion des Aufrufers
+    table = model.__table__
+    db.session.execute(
+        sqlite_insert(table)
+        .values(**keys, **counts)
+        .on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + value for name, value in counts.items()},
+        )
+    )
+
+def record_game_started(song_id, mode, now=None, count=1):
+    # count=-1 nimmt einen Start zurück, dessen Session wieder gelöscht wurde
+    now = now or datetime.utcnow()
+    bump_stats(SongStats, {'song_id': song_id}, started=count)
+    bump_stats(DailyStats, {'day': now.date(), 'mode': mode or 'random'}, started=count)
+
+def record_guess(session, attempts, is_correct, now=None):
+    """Schreibt die Zähler für einen gezählten Versuch fort. Jede Schwelle
+    wird genau einmal erreicht, weil ``attempts`` aus dem atomaren UPDATE in
+    make_guess stammt."""
+    now = now or datetime.utcnow()
+    song_counts = {name: 1 for name, threshold in HINT_THRESHOLDS.items() if attempts == threshold}
+    finished = attempts <= MAX_ATTEMPTS and (is_correct or attempts == MAX_ATTEMPTS)
+    if finished:
+        outcome = 'solved' if is_correct else 'failed'
+        song_counts.update({outcome: 1, 'attempts': attempts})
+        bump_stats(DailyStats, {'day': now.date(), 'mode': session.mode or 'random'}, **{outcome: 1, 'attempts': attempts})
+        bump_stats(AttemptStats, {'attempts': attempts, 'solved': is_correct}, games=1)
+    if song_counts:
+        bump_stats(SongStats, {'song_id': session.song_id}, **song_counts)
+
+def backfill_stats():
+    """Baut alle Zähler aus den noch vorhandenen Sessions neu auf. Das DELETE
+    kommt zuerst, damit die ganze Neuberechnung in einer Schreibtransaktion
+    läuft und keine parallel gezählten Versuche verloren gehen. Bereits
+    gelöschte Sessions (purge-sessions) fehlen danach in der Statistik."""
+    for model in (SongStats, DailyStats, AttemptStats):
+        db.session.execute(db.delete(model))
+
+    # Gleiche Regel wie record_guess: das Spiel endet mit dem richtigen Tipp oder
+    # nach MAX_ATTEMPTS Versuchen. Alte Sessions haben noch kein finished_at.
+    solved = GameSession.solved.is_(True) & (GameSession.attempts <= MAX_ATTEMPTS)
+    failed = ~solved & (GameSession.attempts >= MAX_ATTEMPTS)
+    finished = solved | failed
+    final_attempts = db.func.min(GameSession.attempts, MAX_ATTEMPTS)
+    def count_if(condition, value=1):
+        return db.func.coalesce(db.func.sum(db.case((condition, value), else_=0)), 0)
+
+    # Reihenfolge wie SONG_STATS_COLUMNS
+    song_rows = db.session.query(
+        GameSession.song_id,
+        db.func.count(),
+        count_if(solved),
+        count_if(failed),
+        count_if(finished, final_attempts),
+        *[count_if(GameSession.attempts >= threshold) for threshold in HINT_THRESHOLDS.values()],
+    ).filter(GameSession.song_id.isnot(None)).group_by(GameSession.song_id).all()
+    for song_id, *counts in song_rows:
+        db.session.add(SongStats(song_id=song_id, **dict(zip(SONG_STATS_COLUMNS, counts))))
+
+    daily = {}
+    mode = db.func.coalesce(GameSession.mode, 'random')
+    started_day = db.func.date(GameSession.created_at)
+    for day, day_mode, started in db.session.query(started_day, mode, db.func.count()).group_by(started_day, mode):
+        daily[(day, day_mode)] = {'started': started, 'solved': 0, 'failed': 0, 'attempts': 0}
+    finished_day = db.func.date(db.func.coalesce(GameSession.finished_at, GameSession.created_at))
+    rows = db.session.query(
+        finished_day, mode, solved, db.func.count(), db.func.sum(final_attempts),
+    ).filter(finished).group_by(finished_day, mode, solved)
+    for day, day_mode, was_solved, games, attempts in rows:
+        entry = daily.setdefault((day, day_mode), {'started': 0, 'solved': 0, 'failed': 0, 'attempts': 0})
+        entry['solved' if was_solved else 'failed'] += games
+        entry['attempts'] += attempts
+    for (day, day_mode), counts in daily.items():
+        db.session.add(DailyStats(day=datetime.strptime(day, '%Y-%m-%d').date(), mode=day_mode, **counts))
+
+    buckets = db.session.query(final_attempts, solved, db.func.count()).filter(finished)
+    for attempts, was_solved, games in buckets.group_by(final_attempts, solved):
+        db.session.add(AttemptStats(attempts=attempts, solved=bool(was_solved), games=games))
+    db.session.commit()
+    return len(song_rows)
+
+@app.cli.command('backfill-stats')
+def backfill_stats_command():
+    print(f"Statistik für {backfill_stats()} Songs aus den vorhandenen Sessions neu berechnet")
+
+def rate(part, total):
+    return round(part / total, 3) if total else None
+
+@app.route('/api/admin/stats', methods=['GET'])
+def get_game_stats():
+    """Liest nur die Zählertabellen, die Kosten hängen also von der Zahl der
+    Songs und Tage ab, nicht von der Zahl der Sessions. ?song_id= liefert
+    einen einzelnen Song, ?days= begrenzt die Tagesstatistik (Standard 30)."""
+    try:
+        song_query = SongStats.query
+        if request.args.get('song_id', type=int) is not None:
+            song_query = song_query.filter(SongStats.song_id == request.args.get('song_id', type=int))
+        snapshot = catalog.snapshot()
+        songs = []
+        for stats in song_query.order_by(SongStats.song_id):
+            record = snapshot.get(stats.song_id)
+            finished = stats.solved + stats.failed
+            songs.append({
+                'song_id': stats.song_id,
+                'title': record.title if record else None,
+                'artist': record.artist if record else None,
+                'started': stats.started,
+                'solved': stats.solved,
+                'failed': stats.failed,
+                'solve_rate': rate(stats.solved, finished),
+                'avg_attempts': rate(stats.attempts, finished),
+                'hint_rates': {name: rate(getattr(stats, name), stats.started) for name in HINT_THRESHOLDS},
+            })
+
+        days = request.args.get('days', 30, type=int)
+        since = datetime.utcnow().date() - timedelta(days=max(days, 1) - 1)
+        daily = [{
+            'date': row.day.isoformat(),
+            'mode': row.mode,
+            'started': row.started,
+            'solved': row.solved,
+            'failed': row.failed,
+            'avg_attempts': rate(row.attempts, row.solved + row.failed),
+        } for row in DailyStats.query.filter(DailyStats.day >= since).order_by(DailyStats.day, DailyStats.mode)]
+
+        attempts = [{
+            'attempts': row.attempts,
+            'solved': row.solved,
+            'games': row.games,
+        } for row in AttemptStats.query.order_by(AttemptStats.solved.desc(), AttemptStats.attempts)]
+
+        return jsonify({'songs': songs, 'daily': daily, 'attempts': attempts})
+    except Exception as e:
+        log_exception('get_game_stats')
+        return jsonify({'error': 'Fehler beim Abrufen der Statistik'}), 500
+
+@app.cli.command('purge-sessions')
+def purge_sessions_command():
+    print(f"{purge_sessions()} Sessions gelöscht")
+
 @app.route('/api/game/<session_id>/guess', methods=['POST'])
 def make_guess(session_id):
     try:
@@ -196,8 +1731,13 @@ def make_guess(session_id):
         data = request.json
         guess_title = data.get('title', '').strip()
 
-        # Finde Song mit diesem Titel
-        guessed_song = Song.query.filter(Song.title.ilike(f'%{guess_title}%')).first()
+        # Finde Song per ID (Auswahl aus der Liste) oder über den Titel-Index
+        snapshot = catalog.snapshot()
+        guessed_song = None
+        if isinstance(data.get('song_id'), int):
+            guessed_song = snapshot.get(data['song_id'])
+        if not guessed_song:
+            guessed_song = snapshot.title_index.resolve(guess_title)
 
         if not guessed_song:
             return jsonify({
@@ -205,152 +1745,161 @@ def make_guess(session_id):
                 'message': 'Unbekannter Song. Bitte wähle einen Song aus der Liste.'
             })
 
-        session.attempts += 1
-        db.session.commit()
-
-        correct_song = Song.query.get(session.song_id)
+        correct_song = snapshot.get(session.song_id)
         is_correct = guessed_song.id == correct_song.id
 
-        if is_correct:
-            session.solved = True
-            db.session.commit()
+        # Versuch zählen und Ergebnis speichern in einem einzigen UPDATE;
+        # die Bedingung auf solved verhindert doppelte Lösungen bei parallelen Requests
+        now = datetime.utcnow()
+        attempts = db.session.execute(
+            db.update(GameSession)
+            .where(GameSession.id == session.id, GameSession.solved.is_(False))
+            .values(
+                attempts=GameSession.attempts + 1,
+                solved=is_correct,
+                finished_at=now if is_correct else db.case(
+                    (GameSession.attempts + 1 >= MAX_ATTEMPTS, now),
+                    else_=GameSession.finished_at,
+                ),
+            )
+            .returning(GameSession.attempts)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if attempts is not None:
+            record_guess(session, attempts, is_correct, now)
+        db.session.commit()
+        if attempts is None:
+            return jsonify({'error': 'Spiel bereits gelöst'}), 400
 
         # Erstelle Antwort mit Vergleichen
         response = {
             'valid': True,
             'correct': is_correct,
-            'attempts': session.attempts,
+            'attempts': attempts,
             'guess': {
                 'title': guessed_song.title,
-                'cover_url': f'/api/cover/{guessed_song.id}' if guessed_song.cover_path else None,
-                'artist': {
-                    'value': guessed_song.artist or 'Unbekannt',
-                    'status': 'correct' if guessed_song.artist == correct_song.artist else
-                    'partial' if correct_song.artist and guessed_song.artist and (
-                            any(word.strip().lower() in correct_song.artist.lower()
-                                for word in guessed_song.artist.split()
-                                if len(word.strip()) > 2) or
-                            any(word.strip().lower() in guessed_song.artist.lower()
-                                for word in correct_song.artist.split()
-                                if len(word.strip()) > 2)
-                    ) else 'wrong'
-                },
-                'year': {
-                    'value': guessed_song.year or 'Unbekannt',
-                    'status': 'correct' if guessed_song.year == correct_song.year else 'wrong',
-                    'direction': 'up' if guessed_song.year and correct_song.year and guessed_song.year < correct_song.year else
-                    'down' if guessed_song.year and correct_song.year and guessed_song.year > correct_song.year else None
-                },
-                'genre': {
-                    'value': guessed_song.genre or 'Unbekannt',
-                    'status': 'correct' if guessed_song.genre == correct_song.genre else
-                    'partial' if correct_song.genre and guessed_song.genre and
-                                 any(g.strip().lower() in [cg.strip().lower() for cg in correct_song.genre.split(',')]
-                                     for g in guessed_song.genre.split(',')) else 'wrong'
-                },
-                'type': {
-                    'value': guessed_song.type or 'Unbekannt',
-                    'status': 'correct' if guessed_song.type == correct_song.type else
-                    'partial' if correct_song.type and guessed_song.type and
-                                 any(t.strip() in correct_song.type.split(', ') for t in guessed_song.type.split(', ')) else 'wrong'
-                },
-                'length': {
-                    'value': f"{guessed_song.length//60}:{guessed_song.length%60:02d}" if guessed_song.length else 'Unbekannt',
-                    'status': 'correct' if guessed_song.length == correct_song.length else 'wrong',
-                    'direction': 'up' if guessed_song.length and correct_song.length and guessed_song.length < correct_song.length else
-                    'down' if guessed_song.length and correct_song.length and guessed_song.length > correct_song.length else None
-                }
+                'cover_url': cover_url(guessed_song, size=128),
+                **snapshot.features.compare(guessed_song.id, correct_song.id)
             }
         }
 
         # Füge Hints hinzu basierend auf Versuchen
         hints = []
-        if session.attempts >= 3 and correct_song.hint1:
+        if attempts >= 3 and correct_song.hint1:
             hints.append(correct_song.hint1)
-        if session.attempts >= 6:
+        if attempts >= 6:
             hints.append({
                 'type': 'cover',
-                'url': f'/api/cover/{correct_song.id}' if correct_song.cover_path else None
+                'url': cover_url(correct_song, size=300)
             })
-        if session.attempts >= 9:
+        if attempts >= 9:
             hints.append({
                 'type': 'audio',
-                'url': f'/api/audio/{session_id}/hint3'
+                'url': session_audio_url(session, 'hint3')
             })
 
         if hints:
             response['hints'] = hints
 
         # Bei 10 Versuchen ist das Spiel verloren
-        if session.attempts >= 10 and not is_correct:
+        if attempts >= MAX_ATTEMPTS and not is_correct:
 
             response['solution'] = {
                 'title': correct_song.title,
                 'artist': correct_song.artist
             }
 
+        if is_correct or attempts >= MAX_ATTEMPTS:
+            response['reveal_url'] = session_audio_url(session, 'reveal')
+
         return jsonify(response)
     except Exception as e:
+        log_exception('make_guess')
         return jsonify({'error': 'Fehler beim Verarbeiten der Antwort'}), 500
 
+def cover_url(song, size=None):
+    # Versionierte URL, damit Browser und nginx das Cover dauerhaft cachen können
+    if not song.cover_path:
+        return None
+    size_param = f'&size={size}' if size else ''
+    try:
+        return f'/api/cover/{song.id}?v={cover_version(song.cover_path)}{size_param}'
+    except OSError:
+        return f'/api/cover/{song.id}?{size_param[1:]}' if size else f'/api/cover/{song.id}'
+
+def queue_cover_variants(song_id, cover_path):
+    return clip_jobs.submit(('covers', song_id), generate_cover_variants, cover_path)
+
 @app.route('/api/cover/<int:song_id>')
 def get_cover(song_id):
     try:
-        song = Song.query.get_or_404(song_id)
-        if song.cover_path and os.path.exists(song.cover_path):
-            return send_file(song.cover_path)
+        song = catalog.snapshot().get(song_id)
+        if song and song.cover_path and os.path.exists(song.cover_path):
+            version = request.args.get('v')
+            cache_control = REVALIDATE_CACHE_CONTROL
+            if version and version == cover_version(song.cover_path):
+                cache_control = IMMUTABLE_CACHE_CONTROL
+
+            # Passende Vorschaugröße wählen, fehlende Varianten im Hintergrund nachziehen
+            variant = choose_variant(song.cover_path, request.args.get('size', type=int), request.headers.get('Accept'))
+            if variant:
+                path, mimetype = variant
+            else:
+                path, mimetype = song.cover_path, None
+                if request.args.get('size'):
+                    queue_cover_variants(song.id, song.cover_path)
+            response = send_media(path, mimetype, cache_control=cache_control)
+            response.vary.add('Accept')
+            return response
         # Wenn kein Cover vorhanden, sende einen 404 Status
         return '', 404
     except Exception as e:
+        log_exception('get_cover')
         return jsonify({'error': 'Fehler beim Abrufen des Covers'}), 500
 
 @app.route('/api/admin/metadata', methods=['POST'])
 def get_audio_metadata():
+    """Metadaten-Vorschau beim Upload. Der Client schickt den Anfang der Datei
+    als Body und die Gesamtgröße im Header X-File-Size; gelesen wird direkt
+    aus dem Request-Stream, nichts wird zwischengespeichert."""
     try:
-        if 'audio' not in request.files:
+        if request.mimetype == 'multipart/form-data':
+            # werkzeug würde große Teile in eine temporäre Datei auslagern
+            return jsonify({'error': 'Bitte den Dateianfang als Body senden, nicht als Formular'}), 415
+        if not request.content_length:
             return jsonify({'error': 'Keine Audio-Datei gefunden'}), 400
+        stream = request.stream
+        total_size = request.headers.get('X-File-Size', type=int) or request.content_length
 
-        audio_file = request.files['audio']
-        if not audio_file or not audio_file.filename:
-            return jsonify({'error': 'Ungültige Audio-Datei'}), 400
+        with metrics.span('id3_parse'):
+            sniffed = sniff_audio_metadata(stream, total_size)
 
-        # Temporäre Datei erstellen
-        temp_path = os.path.join('/tmp', secure_filename(audio_file.filename))
-        audio_file.save(temp_path)
+        metadata = {
+            'title': sniffed['title'],
+            'artist': sniffed['artist'],
+            'year': str(sniffed['year']) if sniffed['year'] else '',
+            'has_cover': sniffed['has_cover'],
+        }
+        # Dauer in MM:SS Format
+        if sniffed['duration_ms']:
+            total_secs = sniffed['duration_ms'] // 1000
+            metadata['duration'] = f"{total_secs // 60}:{total_secs % 60:02d}"
+        else:
+            metadata['duration'] = ''
 
-        try:
-            # Metadaten mit eyed3 extrahieren
-            audiofile = eyed3.load(temp_path)
-            metadata = {}
-
-            if audiofile and audiofile.tag:
-                metadata['title'] = audiofile.tag.title or ''
-                metadata['artist'] = audiofile.tag.artist or ''
-                metadata['year'] = str(audiofile.tag.getBestDate().year) if audiofile.tag.getBestDate() else ''
-
-                # Dauer in MM:SS Format
-                if audiofile.info and audiofile.info.time_secs:
-                    minutes = int(audiofile.info.time_secs // 60)
-                    seconds = int(audiofile.info.time_secs % 60)
-                    metadata['duration'] = f"{minutes}:{seconds:02d}"
-                else:
-                    metadata['duration'] = ''
-
-            return jsonify(metadata)
-
-        finally:
-            # Temporäre Datei löschen
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        return jsonify(metadata)
 
     except Exception as e:
+        log_exception('get_audio_metadata')
         return jsonify({'error': f'Fehler beim Lesen der Metadaten: {str(e)}'}), 500
 
 def create_cover_from_mp3(song):
     try:
         if not song.audio_path or not os.path.exists(song.audio_path):
             return None
-        audio = eyed3.load(song.audio_path)
+        import eyed3
+        with metrics.span('id3_parse'):
+            audio = eyed3.load(song.audio_path)
         if audio and audio.tag and audio.tag.images:
             cover_file = audio.tag.images[0]
             if cover_file:
@@ -360,26 +1909,125 @@ def create_cover_from_mp3(song):
     return None
 
 
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'ogg'}
+
+def upload_error_response(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+@app.route('/api/admin/uploads', methods=['POST'])
+def create_upload():
+    """Startet einen Chunk-Upload. Erwartet JSON mit filename, size und
+    optional sha256 (wird beim Abschluss geprüft). Neben Audio-Dateien
+    sind ZIP-Archive für /api/admin/import erlaubt."""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = data.get('filename') or ''
+        is_archive = allowed_file(filename, {'zip'})
+        if not is_archive and not allowed_file(filename, AUDIO_EXTENSIONS):
+            return jsonify({'error': 'Ungültige Audio-Datei'}), 400
+        try:
+            size = int(data.get('size'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Dateigröße fehlt'}), 400
+
+        max_bytes = app.config['IMPORT_MAX_BYTES'] if is_archive else None
+        info = uploads.create(filename, size, data.get('sha256'), max_bytes=max_bytes)
+        return jsonify({
+            'upload_id': info['upload_id'],
+            'offset': 0,
+            'size': size,
+            'chunk_size': DEFAULT_CHUNK_SIZE,
+        }), 201
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        log_exception('create_upload')
+        return jsonify({'error': f'Fehler beim Anlegen des Uploads: {str(e)}'}), 500
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    # Stand zum Fortsetzen nach einem Abbruch
+    try:
+        info = uploads.status(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    response = jsonify({
+        'upload_id': upload_id,
+        'filename': info['filename'],
+        'size': info['size'],
+        'offset': info['offset'],
+    })
+    response.headers['Upload-Offset'] = str(info['offset'])
+    return response
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    """Nimmt den nächsten Chunk als Body entgegen. Der Header Upload-Offset
+    muss dem aktuellen Stand entsprechen, sonst 409 mit dem richtigen Offset."""
+    try:
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None or offset < 0:
+            return jsonify({'error': 'Header Upload-Offset fehlt'}), 400
+        if request.content_length is None:
+            return jsonify({'error': 'Content-Length fehlt'}), 411
+
+        with metrics.span('upload_chunk'):
+            new_offset = uploads.append(upload_id, offset, request.stream, request.content_length)
+        info = uploads.status(upload_id)
+        response = jsonify({'offset': new_offset, 'complete': new_offset == info['size']})
+        response.headers['Upload-Offset'] = str(new_offset)
+        return response
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        log_exception('append_upload')
+        return jsonify({'error': f'Fehler beim Schreiben des Chunks: {str(e)}'}), 500
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    try:
+        uploads.abort(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify({'message': 'Upload verworfen'})
+
+def receive_audio():
+    """Legt die Audio-Datei des Requests im media_store ab: entweder als
+    abgeschlossener Chunk-Upload (Feld upload_id) oder direkt im Formular
+    (Feld audio). Liefert den Pfad (mit gezähltem Verweis) oder None."""
+    upload_id = request.form.get('upload_id')
+    if upload_id:
+        info = uploads.status(upload_id)
+        if not allowed_file(info['filename'], AUDIO_EXTENSIONS):
+            raise UploadError('Upload ist keine Audio-Datei')
+        tmp_path = media_store.staging_path()
+        digest = uploads.finalize(upload_id, tmp_path)
+        return store_media_file(tmp_path, file_extension(info['filename']), digest=digest, move=True)
+
+    audio_file = request.files.get('audio')
+    if audio_file and audio_file.filename and allowed_file(audio_file.filename, AUDIO_EXTENSIONS):
+        return store_uploaded_file(audio_file)
+    return None
+
 @app.route('/api/admin/songs', methods=['GET'])
 def get_all_songs():
     try:
-        songs = Song.query.all()
-        return jsonify([{
-            'id': s.id,
-            'title': s.title,
-            'artist': s.artist,
-            'year': s.year,
-            'genre': s.genre,
-            'type': s.type,
-            'length': s.length,
-            'has_audio': bool(s.audio_path),
-            'has_cover': bool(s.cover_path),
-            'hint1': s.hint1,
-            'hint2': s.hint2
-        } for s in songs])
+        return send_listing(LISTING_FIELDS, tuple(LISTING_FIELDS), 'private, no-cache')
     except Exception as e:
+        log_exception('get_all_songs')
         return jsonify({'error': 'Fehler beim Abrufen der Songs'}), 500
 
+@app.route('/api/admin/songs/<int:song_id>', methods=['GET'])
+def get_song(song_id):
+    # Alle Felder eines Songs, z.B. die Hinweise für das Bearbeiten-Formular
+    song = catalog.snapshot().get(song_id)
+    if not song:
+        return jsonify({'error': 'Song nicht gefunden'}), 404
+    return jsonify({name: getter(song) for name, getter in LISTING_FIELDS.items()})
+
 @app.route('/api/admin/songs/<int:song_id>', methods=['PUT'])
 def update_song(song_id):
     try:
@@ -405,81 +2053,55 @@ def update_song(song_id):
         if 'hint2' in request.form:
             song.hint2 = request.form.get('hint2') or None
 
+        audio_changed = False
+
         # Update Audio wenn neue Datei hochgeladen wurde
-        if 'audio' in request.files:
-            audio_file = request.files['audio']
-            if audio_file and audio_file.filename and allowed_file(audio_file.filename, {'mp3', 'wav', 'ogg'}):
-                # Lösche alte Audio-Datei
-                if song.audio_path and os.path.exists(song.audio_path):
-                    try:
-                        os.remove(song.audio_path)
-                    except:
-                        pass
-
-                # Erstelle neuen Song-Ordner
-                safe_folder_name = secure_filename(song.title.replace(' ', '_'))
-                unique_folder_name = f"{safe_folder_name}_{song.id}"
-                song_folder = os.path.join(app.config['UPLOAD_FOLDER'], unique_folder_name)
-                os.makedirs(song_folder, exist_ok=True)
-
-                filename = secure_filename(f"audio_{audio_file.filename}")
-                audio_path = os.path.join(song_folder, filename)
-                audio_file.save(audio_path)
+        if 'audio' in request.files or request.form.get('upload_id'):
+            audio_path = receive_audio()
+            if audio_path:
+                # Alte Audio-Datei erst freigeben, wenn die neue vollständig da ist
+                release_media(song.audio_path)
                 song.audio_path = audio_path
+                song.playable = None
+                song.verified_at = None
+                audio_changed = True
 
-            try:
-            # Lösche altes Cover falls vorhanden
-                if song.cover_path and os.path.exists(song.cover_path):
-                    try:
-                        os.remove(song.cover_path)
-                        song.cover_path = None
-                    except:
-                        pass
-
-                audiofile = eyed3.load(audio_path)
-                if audiofile and audiofile.tag and audiofile.tag.images:
-                    for image in audiofile.tag.images:
-                        if image.image_data:
-                            cover_filename = f"cover_{song.id}.jpg"
-                            cover_path = os.path.join(song_folder, cover_filename)
-
-                            with open(cover_path, 'wb') as cover_file:
-                                cover_file.write(image.image_data)
-
-                            song.cover_path = cover_path
-                            break
-            except Exception as e:
-                print(f"Warnung: Cover konnte nicht extrahiert werden: {e}")
+                # Altes Cover durch das eingebettete der neuen Datei ersetzen
+                release_media(song.cover_path)
+                song.cover_path = None
+                try:
+                    song.cover_path = store_embedded_cover(audio_path)
+                except Exception as e:
+                    print(f"Warnung: Cover konnte nicht extrahiert werden: {e}")
 
         # Update Cover wenn neue Datei hochgeladen wurde
         if 'cover' in request.files:
             cover_file = request.files['cover']
             if cover_file and cover_file.filename and allowed_file(cover_file.filename, {'jpg', 'jpeg', 'png', 'gif'}):
-                # Lösche altes Cover
-                if song.cover_path and os.path.exists(song.cover_path):
-                    try:
-                        os.remove(song.cover_path)
-                    except:
-                        pass
-
-                # Nutze denselben Song-Ordner
-                safe_folder_name = secure_filename(song.title.replace(' ', '_'))
-                unique_folder_name = f"{safe_folder_name}_{song.id}"
-                song_folder = os.path.join(app.config['UPLOAD_FOLDER'], unique_folder_name)
-                os.makedirs(song_folder, exist_ok=True)
-
-                filename = secure_filename(f"cover_{cover_file.filename}")
-                cover_path = os.path.join(song_folder, filename)
-                cover_file.save(cover_path)
+                cover_path = store_uploaded_file(cover_file)
+                release_media(song.cover_path)
                 song.cover_path = cover_path
 
+        if audio_changed:
+            # Vorbereitete Sessions mit Clips aus dem alten Audio verwerfen
+            discard_prepared_sessions(PreparedSession.song_id == song.id)
         db.session.commit()
+        catalog.invalidate()
+
+        if audio_changed:
+            queue_clip_precompute(song.id)
+        if song.cover_path:
+            queue_cover_variants(song.id, song.cover_path)
 
         return jsonify({
             'message': 'Song erfolgreich aktualisiert',
             'song_id': song.id
         })
+    except UploadError as e:
+        db.session.rollback()
+        return upload_error_response(e)
     except Exception as e:
+        log_exception('update_song')
         db.session.rollback()
         return jsonify({'error': f'Fehler beim Aktualisieren: {str(e)}'}), 500
 
@@ -488,35 +2110,25 @@ def delete_song(song_id):
 
     try:
         song = Song.query.get_or_404(song_id)
-
-        # Lösche den kompletten Song-Ordner
-        safe_folder_name = secure_filename(song.title.replace(' ', '_'))
-        unique_folder_name = f"{safe_folder_name}_{song.id}"
-        song_folder = os.path.join(app.config['UPLOAD_FOLDER'], unique_folder_name)
-
-        if os.path.exists(song_folder):
-            import shutil
-            try:
-                shutil.rmtree(song_folder)
-            except:
-                # Falls das nicht klappt, lösche einzelne Dateien
-                if song.audio_path and os.path.exists(song.audio_path):
-                    try:
-                        os.remove(song.audio_path)
-                    except:
-                        pass
-                if song.cover_path and os.path.exists(song.cover_path):
-                    try:
-                        os.remove(song.cover_path)
-                    except:
-                        pass
+        folder = legacy_song_folder(song)
+        release_media(song.audio_path)
+        release_media(song.cover_path)
 
         # Lösche aus Datenbank
+        discard_prepared_sessions(PreparedSession.song_id == song.id)
+        delete_song_clips(song.id)
+        db.session.execute(db.delete(SongStats).where(SongStats.song_id == song.id))
         db.session.delete(song)
         db.session.commit()
+        catalog.invalidate()
+
+        if folder:
+            # Reste aus dem alten Song-Ordner, z.B. Cover-Varianten
+            shutil.rmtree(folder, ignore_errors=True)
 
         return jsonify({'message': 'Song erfolgreich gelöscht'})
     except Exception as e:
+        log_exception('delete_song')
         db.session.rollback()
         return jsonify({'error': f'Fehler beim Löschen: {str(e)}'}), 500
 
@@ -532,16 +2144,6 @@ def add_song():
         # Erstelle neuen Song
         song = Song(title=title)
 
-        # Erstelle einen sicheren Ordnernamen basierend auf dem Songtitel
-        safe_folder_name = secure_filename(title.replace(' ', '_'))
-        unique_folder_name = f"{safe_folder_name}_{uuid.uuid4().hex[:8]}"
-
-        # Erstelle den Song-spezifischen Ordner
-        song_folder = os.path.join(app.config['UPLOAD_FOLDER'], unique_folder_name)
-        os.makedirs(song_folder, exist_ok=True)
-
-        song.root_path = song_folder
-
         # Setze optionale Felder
         artist = request.form.get('artist')
         song.artist = artist if artist else None
@@ -565,46 +2167,195 @@ def add_song():
         song.hint2 = hint2 if hint2 else None
 
         # Speicher Audio-Datei
-        if 'audio' in request.files:
-            audio_file = request.files['audio']
-            if audio_file and audio_file.filename and allowed_file(audio_file.filename, {'mp3', 'wav', 'ogg'}):
-                filename = secure_filename(f"audio_{audio_file.filename}")
-                audio_path = os.path.join(song_folder, filename)
-                audio_file.save(audio_path)
-                song.audio_path = audio_path
+        audio_path = receive_audio()
+        if audio_path:
+            song.audio_path = audio_path
 
-                try:
-                    audiofile = eyed3.load(audio_path)
-                    if audiofile and audiofile.tag and audiofile.tag.images:
-                        for image in audiofile.tag.images:
-                            if image.image_data:
-                                # Cover-Datei speichern
-                                cover_filename = f"cover_{song.id}.jpg"
-                                cover_path = os.path.join(song_folder, cover_filename)
-
-                                with open(cover_path, 'wb') as cover_file:
-                                    cover_file.write(image.image_data)
-
-                                song.cover_path = cover_path
-                                break  # Nur das erste Bild verwenden
-                except Exception as e:
-                    print(f"Warnung: Cover konnte nicht extrahiert werden: {e}")
+            try:
+                song.cover_path = store_embedded_cover(audio_path)
+            except Exception as e:
+                print(f"Warnung: Cover konnte nicht extrahiert werden: {e}")
 
         # Speichere in Datenbank
         db.session.add(song)
         db.session.commit()
+        catalog.invalidate()
+
+        if song.audio_path:
+            queue_clip_precompute(song.id)
+        if song.cover_path:
+            queue_cover_variants(song.id, song.cover_path)
 
         return jsonify({
             'message': 'Song erfolgreich hinzugefügt',
             'song_id': song.id
         }), 201
 
+    except UploadError as e:
+        db.session.rollback()
+        return upload_error_response(e)
     except Exception as e:
+        log_exception('add_song')
         db.session.rollback()
         return jsonify({'error': f'Fehler beim Speichern: {str(e)}'}), 500
 
 
+def song_dedupe_key(title, artist):
+    return normalize_title(title), normalize_title(artist)
+
+def import_library(directory, batch_size=None, workers=None):
+    """Importiert alle Audiodateien eines Ordners und liefert Fortschritts-Events.
+
+    Metadaten, Cover und Dauer werden im Prozess-Pool gelesen. Bereits
+    vorhandene Songs (gleicher Titel und Künstler) und doppelte Dateien
+    werden übersprungen, neue Songs in Batches pro Transaktion gespeichert.
+    """
+    batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+    files = find_audio_files(directory)
+    yield {'event': 'start', 'total': len(files)}
+
+    known = {song_dedupe_key(s.title, s.artist) for s in catalog.snapshot().songs}
+    seen_hashes = set()
+    counts = {'imported': 0, 'duplicates': 0, 'errors': 0}
+    batch = []
+    imported_ids = []
+
+    def flush_batch():
+        db.session.add_all(batch)
+        db.session.commit()
+        imported_ids.extend(song.id for song in batch)
+        batch.clear()
+
+    for processed, info in enumerate(probe_files(files, workers or app.config['IMPORT_WORKERS']), start=1):
+        relative_path = os.path.relpath(info['path'], directory)
+        if 'error' in info:
+            counts['errors'] += 1
+            yield {'event': 'error', 'file': relative_path, 'error': info['error'], 'processed': processed}
+            continue
+
+        key = song_dedupe_key(info['title'], info['artist'])
+        if key in known or info['sha256'] in seen_hashes:
+            counts['duplicates'] += 1
+            yield {'event': 'duplicate', 'file': relative_path, 'title': info['title'], 'processed': processed}
+            continue
+        known.add(key)
+        seen_hashes.add(info['sha256'])
+
+        # Wie beim Upload über add_song im media_store ablegen, der SHA-256 ist schon bekannt
+        audio_path = store_media_file(info['path'], file_extension(info['path']), digest=info['sha256'])
+        cover_path = None
+        if info['cover']:
+            cover_path = store_media_bytes(info['cover'], COVER_EXTENSIONS.get(info['cover_mime'], 'jpg'))
+
+        song = Song(
+            title=info['title'], artist=info['artist'], year=info['year'], genre=info['genre'],
+            length=info['length'], audio_path=audio_path, cover_path=cover_path,
+        )
+        batch.append(song)
+        counts['imported'] += 1
+        if len(batch) >= batch_size:
+            flush_batch()
+            catalog.invalidate()
+            yield {'event': 'progress', 'processed': processed, **counts}
+
+    if batch:
+        flush_batch()
+    catalog.invalidate()
+
+    for song_id in imported_ids:
+        queue_clip_precompute(song_id)
+    for song_id, cover_path in db.session.query(Song.id, Song.cover_path).filter(Song.id.in_(imported_ids), Song.cover_path.isnot(None)):
+        queue_cover_variants(song_id, cover_path)
+
+    yield {'event': 'done', 'total': len(files), **counts}
+
+def resolve_import_directory(path):
+    # Nur Unterordner von IMPORT_FOLDER zulassen
+    import_root = os.path.realpath(app.config['IMPORT_FOLDER'])
+    directory = os.path.realpath(os.path.join(import_root, path or ''))
+    if os.path.commonpath([import_root, directory]) != import_root or not os.path.isdir(directory):
+        return None
+    return directory
+
+@app.route('/api/admin/import', methods=['POST'])
+def bulk_import():
+    """Importiert einen Ordner unter IMPORT_FOLDER (JSON ``path``) oder ein
+    ZIP-Archiv, das vorher über /api/admin/uploads hochgeladen wurde (JSON
+    ``upload_id``). Das Archiv läuft so nicht durch MAX_CONTENT_LENGTH und
+    wird nicht ein zweites Mal zwischengespeichert."""
+    try:
+        if request.mimetype == 'multipart/form-data':
+            return jsonify({'error': 'Archive bitte als Chunk-Upload senden und die upload_id übergeben'}), 415
+        data = request.get_json(silent=True) or {}
+        archive_path = temp_dir = None
+        if data.get('upload_id'):
+            info = uploads.status(data['upload_id'])
+            if not allowed_file(info['filename'], {'zip'}):
+                return jsonify({'error': 'Ungültiges Archiv'}), 400
+            # Gleiches Dateisystem wie die Teildatei, finalize verschiebt per rename
+            archive_path = media_store.staging_path()
+            uploads.finalize(data['upload_id'], archive_path)
+            if not zipfile.is_zipfile(archive_path):
+                os.remove(archive_path)
+                return jsonify({'error': 'Ungültiges Archiv'}), 400
+            directory = temp_dir = tempfile.mkdtemp(prefix='spordle-import-')
+        else:
+            directory = resolve_import_directory(data.get('path'))
+            if not directory:
+                return jsonify({'error': 'Import-Ordner nicht gefunden'}), 400
+
+        def generate():
+            # Fortschritt als NDJSON, eine Zeile pro Ereignis
+            try:
+                if archive_path:
+                    yield json.dumps({'event': 'extracting'}) + '\n'
+                    extract_archive(archive_path, temp_dir)
+                    os.remove(archive_path)
+                for item in import_library(directory):
+                    yield json.dumps(item) + '\n'
+            except Exception as e:
+                db.session.rollback()
+                yield json.dumps({'event': 'failed', 'error': str(e)}) + '\n'
+
+        def cleanup():
+            # Auch wenn der Client die Antwort nie liest
+            if archive_path and os.path.exists(archive_path):
+                os.remove(archive_path)
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        response.call_on_close(cleanup)
+        return response
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        log_exception('bulk_import')
+        return jsonify({'error': f'Fehler beim Import: {str(e)}'}), 500
+
+@app.cli.command('import-library')
+@click.argument('source')
+@click.option('--batch-size', type=int, default=None, help='Songs pro Transaktion')
+@click.option('--workers', type=int, default=None, help='Prozesse für das Auslesen der Metadaten')
+def import_library_command(source, batch_size, workers):
+    # Ordner oder ZIP-Archiv importieren
+    temp_dir = None
+    try:
+        if os.path.isfile(source) and zipfile.is_zipfile(source):
+            temp_dir = tempfile.mkdtemp(prefix='spordle-import-')
+            source = extract_archive(source, temp_dir)
+        for item in import_library(source, batch_size, workers):
+            if item['event'] in ('error', 'duplicate'):
+                print(f"{item['event']}: {item['file']} {item.get('error', '')}")
+            else:
+                print(json.dumps(item))
+        print("Clips und Cover-Varianten werden im Hintergrund erzeugt...")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
 # Starte die App
 if __name__ == '__main__':
-    init_database()
+    create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,267 @@
+import re
+import struct
+
+# Obergrenze für den Bereich nach dem Tag, in dem der erste MPEG-Frame gesucht wird
+FRAME_SEARCH_BYTES = 64 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+# ID3v2-Frames, die gelesen werden; alles andere wird übersprungen
+_TEXT_FRAMES = {
+    'TIT2': 'title', 'TT2': 'title',
+    'TPE1': 'artist', 'TP1': 'artist',
+    'TDRC': 'date', 'TYER': 'date', 'TYE': 'date', 'TDOR': 'original_date', 'TORY': 'original_date',
+    'TLEN': 'length', 'TLE': 'length',
+}
+_PICTURE_FRAMES = {'APIC', 'PIC'}
+
+_TEXT_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+# Bitraten in kbit/s nach (MPEG-Version 1?, Layer)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Abtastraten nach Versions-Bits (3 = MPEG 1, 2 = MPEG 2, 0 = MPEG 2.5)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+_YEAR = re.compile(r'\d{4}')
+
+
+class _Reader:
+    """Liest sequentiell aus einem Stream, ohne zurückzuspringen. Übersprungene
+    Bytes werden gelesen und verworfen, da Request-Bodies nicht seekbar sind."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def read(self, size):
+        chunks = []
+        while size > 0:
+            chunk = self.stream.read(min(size, _CHUNK_SIZE))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        data = b''.join(chunks)
+        self.position += len(data)
+        return data
+
+    def skip(self, size):
+        while size > 0:
+            chunk = self.stream.read(min(size, _CHUNK_SIZE))
+            if not chunk:
+                return
+            self.position += len(chunk)
+            size -= len(chunk)
+
+
+class _Prefixed:
+    """Reader, der zuerst bereits gelesene Bytes liefert (den Tag-Header)."""
+
+    def __init__(self, prefix, reader):
+        self._prefix = prefix
+        self._reader = reader
+        self.position = reader.position - len(prefix)
+
+    def read(self, size):
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        if len(data) < size:
+            data += self._reader.read(size - len(data))
+        self.position += len(data)
+        return data
+
+    def skip(self, size):
+        taken = min(size, len(self._prefix))
+        self._prefix = self._prefix[taken:]
+        self.position += taken
+        if size > taken:
+            before = self._reader.position
+            self._reader.skip(size - taken)
+            self.position += self._reader.position - before
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _unsynchronise(data):
+    return data.replace(b'\xff\x00', b'\xff')
+
+
+def _decode_text(body):
+    if not body:
+        return ''
+    encoding = _TEXT_ENCODINGS.get(body[0], 'latin-1')
+    try:
+        text = body[1:].decode(encoding)
+    except UnicodeDecodeError:
+        text = body[1:].decode('latin-1')
+    # Mehrere Werte (ID3v2.4) sind durch Nullbytes getrennt, der erste zählt
+    return text.split('\x00')[0].strip()
+
+
+def _read_id3v2(reader, result):
+    """Liest einen ID3v2-Tag ab der aktuellen Position. Nur benötigte Frames
+    werden in den Speicher gelesen, Cover-Daten werden übersprungen."""
+    header = reader.read(10)
+    major, flags, tag_size = header[3], header[5], _syncsafe(header[6:10])
+    end = reader.position + tag_size
+    if flags & 0x10:
+        # Footer (nur v2.4) gehört nicht zu tag_size
+        end += 10
+    tag_unsync = bool(flags & 0x80) and major < 4
+
+    if flags & 0x40:
+        size_bytes = reader.read(4)
+        extended_size = _syncsafe(size_bytes) - 4 if major >= 4 else struct.unpack('>I', size_bytes)[0]
+        reader.skip(extended_size)
+
+    id_length, header_length = (3, 6) if major == 2 else (4, 10)
+    while reader.position + header_length <= end - (10 if flags & 0x10 else 0):
+        frame_header = reader.read(header_length)
+        if len(frame_header) < header_length or frame_header[0] == 0:
+            # Padding erreicht
+            break
+        frame_id = frame_header[:id_length].decode('latin-1', 'replace')
+        if major == 2:
+            frame_size = int.from_bytes(frame_header[3:6], 'big')
+            frame_flags = 0
+        elif major == 3:
+            frame_size = struct.unpack('>I', frame_header[4:8])[0]
+            frame_flags = 0
+        else:
+            frame_size = _syncsafe(frame_header[4:8])
+            frame_flags = frame_header[9]
+
+        if frame_id in _PICTURE_FRAMES:
+            result['has_cover'] = True
+            reader.skip(frame_size)
+        elif frame_id in _TEXT_FRAMES and frame_size <= 4096:
+            body = reader.read(frame_size)
+            if tag_unsync or frame_flags & 0x02:
+                body = _unsynchronise(body)
+            if major >= 4 and frame_flags & 0x01:
+                # Data-Length-Indikator vor dem eigentlichen Inhalt
+                body = body[4:]
+            if major >= 3 and frame_flags & 0x0C:
+                # Komprimiert oder verschlüsselt: nicht lesbar ohne den ganzen Frame zu dekodieren
+                continue
+            result.setdefault(_TEXT_FRAMES[frame_id], _decode_text(body))
+        else:
+            reader.skip(frame_size)
+    reader.skip(end - reader.position)
+
+
+def _parse_frame_header(data, offset):
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version_bits, layer_bits = (b1 >> 3) & 3, (b1 >> 1) & 3
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    if layer == 1:
+        samples = 384
+    elif layer == 2 or mpeg1:
+        samples = 1152
+    else:
+        samples = 576
+    return {
+        'mpeg1': mpeg1,
+        'layer': layer,
+        'bitrate': _BITRATES[(mpeg1, layer)][bitrate_index] * 1000,
+        'sample_rate': _SAMPLE_RATES[version_bits][rate_index],
+        'mono': b3 >> 6 == 3,
+        'samples': samples,
+    }
+
+
+def _mpeg_duration_ms(data, audio_start, total_size):
+    """Dauer aus dem ersten MPEG-Frame: Xing/Info- oder VBRI-Header mit
+    Frame-Anzahl, sonst Hochrechnung über Bitrate und Dateigröße (CBR)."""
+    for offset in range(len(data) - 4):
+        frame = _parse_frame_header(data, offset)
+        if frame:
+            break
+    else:
+        return None
+
+    if frame['mpeg1']:
+        side_info = 17 if frame['mono'] else 32
+    else:
+        side_info = 9 if frame['mono'] else 17
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x01:
+            frames = struct.unpack('>I', data[xing + 8:xing + 12])[0]
+            return frames * frame['samples'] * 1000 // frame['sample_rate']
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        frames = struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+        return frames * frame['samples'] * 1000 // frame['sample_rate']
+
+    if total_size:
+        audio_bytes = total_size - audio_start - offset
+        return audio_bytes * 8 * 1000 // frame['bitrate']
+    return None
+
+
+def _wav_duration_ms(data):
+    # RIFF-Chunks bis zum data-Chunk durchgehen, Dauer = Datengröße / Byterate
+    position, byte_rate = 12, None
+    while position + 8 <= len(data):
+        chunk_id, chunk_size = data[position:position + 4], struct.unpack('<I', data[position + 4:position + 8])[0]
+        if chunk_id == b'fmt ' and len(data) >= position + 20:
+            byte_rate = struct.unpack('<I', data[position + 16:position + 20])[0]
+        elif chunk_id == b'data':
+            return chunk_size * 1000 // byte_rate if byte_rate else None
+        position += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def sniff_audio_metadata(stream, total_size=None):
+    """Liest Titel, Künstler, Jahr, Dauer und ob ein Cover eingebettet ist,
+    direkt aus einem Stream (z.B. dem Request-Body).
+
+    Gelesen werden nur der ID3v2-Tag (ohne Bilddaten) und bis zu
+    FRAME_SEARCH_BYTES danach; der Rest des Streams bleibt unangetastet.
+    ``total_size`` ist die Größe der ganzen Datei und wird für die
+    Dauer-Schätzung bei MP3s ohne Xing-Header gebraucht.
+    """
+    reader = _Reader(stream)
+    result = {}
+    head = reader.read(10)
+
+    if head[:3] == b'ID3' and len(head) == 10:
+        _read_id3v2(_Prefixed(head, reader), result)
+        head = b''
+
+    audio_start = reader.position - len(head)
+    data = head + reader.read(FRAME_SEARCH_BYTES - len(head))
+
+    duration_ms = None
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        duration_ms = _wav_duration_ms(data)
+    elif data[:4] != b'OggS':
+        duration_ms = _mpeg_duration_ms(data, audio_start, total_size)
+    if not duration_ms and result.get('length', '').isdigit():
+        duration_ms = int(result['length'])
+
+    date = result.get('date') or result.get('original_date') or ''
+    year = _YEAR.match(date)
+    return {
+        'title': result.get('title', ''),
+        'artist': result.get('artist', ''),
+        'year': int(year.group()) if year else None,
+        'duration_ms': duration_ms,
+        'has_cover': result.get('has_cover', False),
+    }
+
@@ -0,0 +1,232 @@
+"""Latenz-Perzentile und Durchsatz der Spiel-API pro Route.
+
+Läuft gegen einen synthetischen Katalog (siehe synthetic_catalog.py) und
+wahlweise über Flasks Test-Client im selben Prozess oder über einen lokal
+gestarteten gunicorn. Pro Route und Parallelität werden ``--requests``
+Anfragen von ``--concurrency`` Threads gestellt.
+
+Aufruf aus backend/:
+    python benchmarks/bench_api.py [--workdir /tmp/spordle-bench] [--songs 500]
+        [--transport testclient gunicorn] [--concurrency 1 8] [--requests 200]
+        [--routes start guess ...] [--gunicorn-workers 2] [--json out.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR, print_result, result, run_metadata, use_workdir, workdir_env, write_results  # noqa: E402
+from synthetic_catalog import seed_catalog  # noqa: E402
+
+
+class TestClientTransport:
+    name = 'testclient'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        data = response.get_data()
+        response.close()
+        return response.status_code, data
+
+    def close(self):
+        pass
+
+
+class GunicornTransport:
+    name = 'gunicorn'
+
+    def __init__(self, workdir, workers, threads):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ, **workdir_env(workdir))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{self.port}', '--workers', str(workers),
+             '--threads', str(threads), '--timeout', '120', '--preload', 'app:create_app()'],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self._local = threading.local()
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                if self.request('GET', '/readyz')[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.close()
+        raise RuntimeError('gunicorn ist nicht gestartet')
+
+    def request(self, method, path, body=None):
+        # Eine Keep-Alive-Verbindung pro Thread, bei Abbruch einmal neu verbinden
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            try:
+                headers = {'Content-Type': 'application/json'} if body is not None else {}
+                connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Fixtures:
+    """Zufällige Eingaben für die Routen: Song-IDs, Suchpräfixe und laufende
+    Sessions samt Ziel-Song, damit Rateversuche immer falsch (also
+    wiederholbar) sind."""
+
+    def __init__(self, transport, sessions):
+        from app import GameSession, app, catalog
+        with app.app_context():
+            self.songs = catalog.snapshot().songs
+        self.song_ids = [song.id for song in self.songs]
+        self.sessions = []
+        for _ in range(sessions):
+            status, body = transport.request('POST', '/api/game/start', {})
+            if status == 200:
+                self.sessions.append(json.loads(body)['session_id'])
+        with app.app_context():
+            targets = dict(GameSession.query.with_entities(GameSession.id, GameSession.song_id)
+                           .filter(GameSession.id.in_(self.sessions)))
+        self.targets = [(session_id, targets[session_id]) for session_id in self.sessions]
+
+    def search_query(self):
+        title = random.choice(self.songs).title
+        return title[:random.randint(2, min(6, len(title)))]
+
+    def wrong_guess(self):
+        session_id, target = random.choice(self.targets)
+        song_id = random.choice(self.song_ids)
+        while song_id == target and len(self.song_ids) > 1:
+            song_id = random.choice(self.song_ids)
+        return session_id, song_id
+
+
+def guess_request(fixtures):
+    session_id, song_id = fixtures.wrong_guess()
+    return 'POST', f'/api/game/{session_id}/guess', {'title': '', 'song_id': song_id}
+
+
+ROUTES = {
+    'songs': lambda f: ('GET', '/api/songs', None),
+    'search': lambda f: ('GET', f'/api/songs/search?q={quote(f.search_query())}&limit=5', None),
+    'start': lambda f: ('POST', '/api/game/start', {}),
+    'audio': lambda f: ('GET', f'/api/audio/{random.choice(f.sessions)}/start', None),
+    'guess': guess_request,
+    'cover': lambda f: ('GET', f'/api/cover/{random.choice(f.song_ids)}?size=128', None),
+    'admin_songs': lambda f: ('GET', '/api/admin/songs', None),
+}
+
+
+def run_route(transport, fixtures, route, concurrency, requests):
+    specs = queue.Queue()
+    for _ in range(requests):
+        specs.put(ROUTES[route](fixtures))
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            try:
+                method, path, body = specs.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            try:
+                status, _ = transport.request(method, path, body)
+            except Exception as e:
+                status = str(e)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return result(
+        route, f'api/{transport.name}', latencies,
+        params={'concurrency': concurrency, 'requests': requests},
+        throughput_per_s=len(latencies) / wall if wall else None,
+        errors=len(errors),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workdir', default='/tmp/spordle-bench')
+    parser.add_argument('--songs', type=int, default=500)
+    parser.add_argument('--audio-files', type=int, default=8)
+    parser.add_argument('--precompute', type=int, default=50)
+    parser.add_argument('--transport', nargs='+', choices=('testclient', 'gunicorn'), default=['testclient', 'gunicorn'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--routes', nargs='+', choices=sorted(ROUTES), default=list(ROUTES))
+    parser.add_argument('--sessions', type=int, default=20, help='vorab gestartete Sessions für audio/guess')
+    parser.add_argument('--gunicorn-workers', type=int, default=2)
+    parser.add_argument('--gunicorn-threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    seed_catalog(args.workdir, args.songs, args.audio_files, precompute=args.precompute)
+    use_workdir(args.workdir)
+    from app import app
+
+    results = []
+    for name in args.transport:
+        if name == 'testclient':
+            transport = TestClientTransport(app)
+        else:
+            transport = GunicornTransport(args.workdir, args.gunicorn_workers, args.gunicorn_threads)
+        try:
+            fixtures = Fixtures(transport, args.sessions)
+            for route in args.routes:
+                # Aufwärmen: Katalog-Snapshot, Indizes, Verbindungen
+                run_route(transport, fixtures, route, 1, 5)
+                for concurrency in args.concurrency:
+                    row = run_route(transport, fixtures, route, concurrency, args.requests)
+                    row['name'] = f"{route} c={concurrency}"
+                    results.append(row)
+                    print_result(row)
+        finally:
+            transport.close()
+
+    if args.json_path:
+        meta = run_metadata(**{k: v for k, v in vars(args).items() if k != 'json_path'})
+        write_results(args.json_path, meta, results)
+
+
+if __name__ == '__main__':
+    main()
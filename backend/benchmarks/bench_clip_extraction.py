@@ -0,0 +1,138 @@
+"""Vergleicht die Clip-Erzeugung über pydub (kompletter Decode) mit clip_engine
+(Seek + Decode nur des 30s-Fensters).
+
+Jede Messung läuft in einem eigenen Python-Prozess, damit Spitzen-RSS von
+Python und ffmpeg-Kindprozessen sauber getrennt gemessen werden.
+
+Aufruf aus backend/:
+    python benchmarks/bench_clip_extraction.py [DATEI_ODER_ORDNER ...] [--repeat 3] [--json out.json]
+
+Ohne Pfade werden alle MP3-Dateien unter uploads/ verwendet. pydub ist nur
+für diesen Vergleich nötig: pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+METHODS = ('pydub', 'engine')
+
+
+def run_pydub(audio_path, offset_ms, out_dir):
+    from pydub import AudioSegment
+    audio = AudioSegment.from_mp3(audio_path)
+    audio[offset_ms:offset_ms + 7000].export(os.path.join(out_dir, 'start.mp3'), format='mp3')
+    audio[offset_ms:offset_ms + 15000].export(os.path.join(out_dir, 'hint3.mp3'), format='mp3')
+    audio[offset_ms:offset_ms + 30000].export(os.path.join(out_dir, 'reveal.mp3'), format='mp3')
+
+
+def run_engine(audio_path, offset_ms, out_dir):
+    from clip_engine import extract_clips
+    extract_clips(audio_path, offset_ms, {
+        'start': os.path.join(out_dir, 'start.mp3'),
+        'hint3': os.path.join(out_dir, 'hint3.mp3'),
+        'reveal': os.path.join(out_dir, 'reveal.mp3'),
+    })
+
+
+def worker(method, audio_path, offset_ms):
+    # Läuft im Kindprozess und gibt eine JSON-Zeile aus
+    with tempfile.TemporaryDirectory() as out_dir:
+        started = time.perf_counter()
+        (run_pydub if method == 'pydub' else run_engine)(audio_path, offset_ms, out_dir)
+        elapsed = time.perf_counter() - started
+        output_bytes = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    # ru_maxrss ist unter Linux in KiB
+    print(json.dumps({
+        'seconds': elapsed,
+        'python_peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'ffmpeg_peak_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        'output_bytes': output_bytes,
+    }))
+
+
+def measure(method, audio_path, offset_ms):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', method, audio_path, str(offset_ms)],
+        capture_output=True, text=True, cwd=BACKEND_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unbekannter Fehler')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def collect_files(paths):
+    if not paths:
+        paths = [os.path.join(BACKEND_DIR, 'uploads')]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '**', '*.mp3'), recursive=True))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', dest='json_path')
+    parser.add_argument('--worker', nargs=3, metavar=('METHOD', 'PATH', 'OFFSET'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        method, audio_path, offset = args.worker
+        worker(method, audio_path, int(offset))
+        return
+
+    from clip_engine import probe_duration_ms
+
+    results = []
+    for audio_path in collect_files(args.paths):
+        try:
+            duration_ms = probe_duration_ms(audio_path)
+        except Exception as e:
+            print(f'übersprungen {audio_path}: {e}')
+            continue
+        offset_ms = max(0, duration_ms // 2 - 15000)
+        row = {'file': os.path.relpath(audio_path, BACKEND_DIR), 'duration_ms': duration_ms,
+               'size_bytes': os.path.getsize(audio_path)}
+        try:
+            for method in METHODS:
+                runs = [measure(method, audio_path, offset_ms) for _ in range(args.repeat)]
+                row[method] = {
+                    'median_seconds': statistics.median(r['seconds'] for r in runs),
+                    'peak_rss_kb': max(r['python_peak_rss_kb'] + r['ffmpeg_peak_rss_kb'] for r in runs),
+                    'output_bytes': runs[-1]['output_bytes'],
+                }
+        except RuntimeError as e:
+            print(f'übersprungen {audio_path}: {e}')
+            continue
+        results.append(row)
+        print(f"{row['file']}: {duration_ms / 1000:.0f}s | "
+              f"pydub {row['pydub']['median_seconds']:.2f}s / {row['pydub']['peak_rss_kb'] / 1024:.0f} MiB | "
+              f"engine {row['engine']['median_seconds']:.2f}s / {row['engine']['peak_rss_kb'] / 1024:.0f} MiB")
+
+    if results:
+        speedup = statistics.median(r['pydub']['median_seconds'] / r['engine']['median_seconds'] for r in results)
+        print(f'{len(results)} Dateien, Median-Speedup engine vs. pydub: {speedup:.1f}x')
+    else:
+        print('Keine dekodierbaren MP3-Dateien gefunden')
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'benchmark': 'clip_extraction', 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Micro-Benchmarks der heißen Pfade ohne HTTP:
+
+- clip_extraction: extract_clips für ein Clip-Tripel aus einer erzeugten MP3
+- scoring: FeatureTable.compare, TitleIndex.resolve, SearchIndex.search
+- catalog: load_song_records (DB), Aufbau von Snapshot und Indizes, /api/admin/songs
+
+Aufruf aus backend/:
+    python benchmarks/bench_micro.py [--workdir /tmp/spordle-bench] [--songs 500]
+        [--only clip_extraction scoring catalog] [--repeat 20] [--json out.json]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import print_result, result, run_metadata, timed, use_workdir, write_results  # noqa: E402
+from synthetic_catalog import seed_catalog  # noqa: E402
+
+GROUPS = ('clip_extraction', 'scoring', 'catalog')
+
+
+def bench_clip_extraction(app, repeat):
+    from app import catalog, render_clips
+    from clip_engine import CLIP_DURATIONS_MS, DEFAULT_PROFILE, probe_duration_ms
+
+    with app.app_context():
+        audio_path = catalog.snapshot().songs[0].audio_path
+    duration_ms = probe_duration_ms(audio_path)
+    max_start = max(0, duration_ms - CLIP_DURATIONS_MS['reveal'])
+    with tempfile.TemporaryDirectory() as out_dir:
+        # Alle Clips im mp3-Profil, wie beim Vorberechnen
+        times = timed(lambda: render_clips(audio_path, random.randint(0, max_start), out_dir), repeat)
+    params = {'duration_ms': duration_ms, 'profiles': DEFAULT_PROFILE}
+    return [result('render_clips', 'micro/clips', times, params=params)]
+
+
+def bench_scoring(app, repeat):
+    from app import catalog
+
+    with app.app_context():
+        catalog.invalidate()
+        snapshot = catalog.snapshot()
+    songs = snapshot.songs
+    # Indizes vorab aufbauen, gemessen wird nur die Abfrage
+    features, title_index = snapshot.features, snapshot.title_index
+    batch = 1000
+    pairs = [(random.choice(songs).id, random.choice(songs).id) for _ in range(batch)]
+    titles = [random.choice(songs).title.lower() for _ in range(batch)]
+    prefixes = [song.title[:random.randint(2, 6)] for song in random.sample(songs, min(len(songs), batch))]
+
+    def compare_all():
+        for guess_id, target_id in pairs:
+            features.compare(guess_id, target_id)
+
+    def resolve_all():
+        for title in titles:
+            title_index.resolve(title)
+
+    def search_uncached():
+        # Eigener Index ohne warmen LRU-Cache, sonst misst man nur Dict-Zugriffe
+        from search_index import SearchIndex
+        index = SearchIndex(songs)
+        started = time.perf_counter()
+        for prefix in prefixes:
+            index.search(prefix, 5)
+        return time.perf_counter() - started
+
+    def per_call(times, calls):
+        return [t / calls for t in times]
+
+    params = {'songs': len(songs), 'batch': batch}
+    return [
+        result('features.compare', 'micro/scoring', per_call(timed(compare_all, repeat), batch), params=params),
+        result('title_index.resolve', 'micro/scoring', per_call(timed(resolve_all, repeat), batch), params=params),
+        result('search_index.search (kalt)', 'micro/scoring',
+               per_call([search_uncached() for _ in range(repeat)], len(prefixes)),
+               params={'songs': len(songs), 'batch': len(prefixes)}),
+    ]
+
+
+def bench_catalog(app, repeat):
+    from app import catalog, load_song_records
+    from catalog import CatalogSnapshot
+
+    with app.app_context():
+        load_times = timed(load_song_records, repeat)
+        records = load_song_records()
+        version = catalog.snapshot().version
+
+    def build_snapshot():
+        snapshot = CatalogSnapshot(records, version)
+        snapshot.title_index, snapshot.features, snapshot.search_index
+
+    client = app.test_client()
+    client.get('/api/admin/songs')
+    listing_times = timed(lambda: client.get('/api/admin/songs').close(), repeat)
+    params = {'songs': len(records)}
+    return [
+        result('load_song_records', 'micro/catalog', load_times, params=params),
+        result('snapshot + indizes', 'micro/catalog', timed(build_snapshot, repeat), params=params),
+        result('/api/admin/songs', 'micro/catalog', listing_times, params=params),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workdir', default='/tmp/spordle-bench')
+    parser.add_argument('--songs', type=int, default=500)
+    parser.add_argument('--audio-files', type=int, default=8)
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    seed_catalog(args.workdir, args.songs, args.audio_files)
+    use_workdir(args.workdir)
+    from app import app
+
+    benchmarks = {'clip_extraction': bench_clip_extraction, 'scoring': bench_scoring, 'catalog': bench_catalog}
+    results = []
+    for group in args.only:
+        for row in benchmarks[group](app, args.repeat):
+            results.append(row)
+            print_result(row)
+
+    if args.json_path:
+        meta = run_metadata(**{k: v for k, v in vars(args).items() if k != 'json_path'})
+        write_results(args.json_path, meta, results)
+
+
+if __name__ == '__main__':
+    main()
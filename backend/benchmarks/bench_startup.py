@@ -0,0 +1,169 @@
+"""Startzeiten des Backends:
+
+- import: ``import app`` in einem frischen Interpreter, dazu die Liste der
+  schweren Module (eyed3, PIL, pydub, multiprocessing), die dabei schon
+  geladen werden; sie soll leer bleiben
+- create_app: Schema-Prüfung auf einer bestehenden Datenbank
+- cli: Wanduhrzeit eines ``flask``-Aufrufs bis zur Ausgabe
+- gunicorn_ready: Start von gunicorn (--preload) bis /readyz mit 200 antwortet,
+  entspricht einem Container-Neustart ohne die Hintergrund-Jobs
+- worker_respawn: SIGKILL an einen Worker, bis der Master wieder alle Worker hat
+
+Aufruf aus backend/:
+    python benchmarks/bench_startup.py [--workdir /tmp/spordle-bench] [--songs 500]
+        [--workers 2] [--repeat 10] [--json out.json]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR, print_result, result, run_metadata, use_workdir, write_results  # noqa: E402
+from synthetic_catalog import seed_catalog  # noqa: E402
+
+HEAVY_MODULES = ('eyed3', 'PIL', 'pydub', 'multiprocessing')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+ready = time.perf_counter()
+print(json.dumps({{
+    'import': imported - started,
+    'create_app': ready - imported,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe_import(repeat):
+    imports, creates, heavy = [], [], set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        probe = json.loads(output)
+        imports.append(probe['import'])
+        creates.append(probe['create_app'])
+        heavy.update(probe['heavy'])
+    return imports, creates, sorted(heavy)
+
+
+def time_cli(repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'app:create_app()', 'purge-sessions'],
+            cwd=BACKEND_DIR, capture_output=True, check=True,
+        )
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/readyz', timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    raise RuntimeError('/readyz wurde nicht rechtzeitig bereit')
+
+
+def worker_pids(master_pid):
+    path = f'/proc/{master_pid}/task/{master_pid}/children'
+    with open(path) as f:
+        return {int(pid) for pid in f.read().split()}
+
+
+def wait_workers(master_pid, workers, exclude=(), timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        pids = worker_pids(master_pid) - set(exclude)
+        if len(pids) >= workers:
+            return pids
+        time.sleep(0.005)
+    raise RuntimeError('Worker wurden nicht rechtzeitig gestartet')
+
+
+def time_gunicorn(workers, repeat):
+    ready_times, respawn_times = [], []
+    for _ in range(repeat):
+        port = free_port()
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+             '--preload', 'app:create_app()'],
+            cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(f'http://127.0.0.1:{port}')
+            ready_times.append(time.perf_counter() - started)
+
+            pids = wait_workers(process.pid, workers)
+            victim = min(pids)
+            started = time.perf_counter()
+            os.kill(victim, signal.SIGKILL)
+            wait_workers(process.pid, workers, exclude=[victim])
+            respawn_times.append(time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait()
+    return ready_times, respawn_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workdir', default='/tmp/spordle-bench')
+    parser.add_argument('--songs', type=int, default=500)
+    parser.add_argument('--audio-files', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    seed_catalog(args.workdir, args.songs, args.audio_files)
+    # Die Kindprozesse erben das Arbeitsverzeichnis über die Umgebung
+    use_workdir(args.workdir)
+
+    imports, creates, heavy = probe_import(args.repeat)
+    ready_times, respawn_times = time_gunicorn(args.workers, max(1, args.repeat // 2))
+    params = {'songs': args.songs}
+    results = [
+        result('import app', 'startup', imports, params={**params, 'heavy_modules': heavy}),
+        result('create_app', 'startup', creates, params=params),
+        result('flask CLI (purge-sessions)', 'startup', time_cli(args.repeat), params=params),
+        result('gunicorn bis /readyz', 'startup', ready_times, params={**params, 'workers': args.workers}),
+        result('Worker-Neustart', 'startup', respawn_times, params={**params, 'workers': args.workers}),
+    ]
+    for row in results:
+        print_result(row)
+    if heavy:
+        print(f"Beim Import geladen, obwohl erst bei Bedarf nötig: {', '.join(heavy)}")
+
+    if args.json_path:
+        meta = run_metadata(**{k: v for k, v in vars(args).items() if k != 'json_path'})
+        write_results(args.json_path, meta, results)
+
+
+if __name__ == '__main__':
+    main()
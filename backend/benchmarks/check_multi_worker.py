@@ -0,0 +1,173 @@
+"""Startet gunicorn mit mehreren Workern auf denselben Daten und spielt
+parallel Spiele durch (Start, Clip laden, raten bis gelöst oder verloren,
+Hint- und Reveal-Clip laden).
+
+Jede Anfrage öffnet eine neue Verbindung, gunicorn verteilt sie also auf
+beliebige Worker. Jeder Fehlerstatus zählt als Fehler; das Skript endet mit
+Exit-Code 1, sobald einer auftritt oder ein Durchlauf kein Spiel schafft.
+Zusätzlich werden Spiele pro Sekunde je Worker-Anzahl ausgegeben, um die
+Skalierung zu prüfen.
+
+Datenbank und Ablage liegen in einem eigenen Arbeitsverzeichnis mit
+synthetischem Katalog; ohne --workdir ist es ein temporärer Ordner, der am
+Ende gelöscht wird. Die echten Daten unter backend/data bleiben unberührt.
+
+Aufruf aus backend/:
+    python benchmarks/check_multi_worker.py [--workdir /tmp/spordle-check] [--songs 50]
+        [--workers 1 4] [--clients 16] [--duration 20] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR  # noqa: E402
+from synthetic_catalog import seed_catalog  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(base_url, path, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method='POST' if data is not None else 'GET')
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    with urllib.request.urlopen(req, timeout=60) as response:
+        body = response.read()
+    return json.loads(body) if response.headers.get_content_type() == 'application/json' else body
+
+
+def start_server(workers, threads, port):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+         '--threads', str(threads), '--timeout', '120', '--preload', 'app:create_app()'],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            request(base_url, '/readyz')
+            return process, base_url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn ist nicht gestartet')
+
+
+def play_game(base_url, song_ids):
+    game = request(base_url, '/api/game/start', {})
+    session_id = game['session_id']
+    if not request(base_url, game['audio_url']):
+        raise RuntimeError(f'Leerer Start-Clip für {session_id}')
+    for song_id in random.sample(song_ids, min(10, len(song_ids))):
+        result = request(base_url, f'/api/game/{session_id}/guess', {'title': '', 'song_id': song_id})
+        if result.get('correct') or 'solution' in result:
+            break
+    for kind in ('hint3', 'reveal'):
+        if not request(base_url, f'/api/audio/{session_id}/{kind}'):
+            raise RuntimeError(f'Leerer {kind}-Clip für {session_id}')
+
+
+def run(workers, threads, clients, duration):
+    process, base_url = start_server(workers, threads, free_port())
+    try:
+        song_ids = [song['id'] for song in request(base_url, '/api/songs?fields=id')]
+        games, errors = [], []
+        lock = threading.Lock()
+        stop_at = time.time() + duration
+
+        def client():
+            while time.time() < stop_at:
+                started = time.perf_counter()
+                try:
+                    play_game(base_url, song_ids)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    games.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+    games.sort()
+    return {
+        'workers': workers,
+        'threads': threads,
+        'clients': clients,
+        'games': len(games),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'games_per_second': len(games) / elapsed,
+        'game_p50_ms': games[len(games) // 2] * 1000 if games else None,
+        'game_p95_ms': games[int(len(games) * 0.95)] * 1000 if games else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workdir', help='Arbeitsverzeichnis behalten statt eines temporären')
+    parser.add_argument('--songs', type=int, default=50)
+    parser.add_argument('--audio-files', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 2])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='spordle-check-')
+    try:
+        # Setzt auch die Umgebung, die die gunicorn-Prozesse erben
+        seed_catalog(workdir, args.songs, args.audio_files, duration=60)
+        results = [run(workers, args.threads, args.clients, args.duration) for workers in args.workers]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for result in results:
+        workers = result['workers']
+        print(f"{workers:>3} Worker: {result['games']:>5} Spiele, {result['games_per_second']:7.1f}/s, "
+              f"p50 {result['game_p50_ms'] or 0:7.1f} ms, p95 {result['game_p95_ms'] or 0:7.1f} ms, "
+              f"{result['errors']} Fehler")
+        for sample in result['error_samples']:
+            print(f"    {sample}")
+
+    baseline = results[0]['games_per_second']
+    for result in results[1:]:
+        if baseline:
+            print(f"Skalierung {results[0]['workers']} -> {result['workers']} Worker: "
+                  f"{result['games_per_second'] / baseline:.2f}x")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if any(result['errors'] or not result['games'] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
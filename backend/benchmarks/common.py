@@ -0,0 +1,115 @@
+"""Gemeinsame Hilfen der Benchmarks: Arbeitsverzeichnis statt echter Daten,
+Perzentile und das JSON-Format der Ergebnisse.
+
+Alle Ergebnisdateien haben die Form
+    {"meta": {...}, "results": [{"name": ..., "group": ..., "params": {...},
+                                 "latency_ms": {...}, "throughput_per_s": ...}, ...]}
+und lassen sich mit compare_results.py zwischen zwei Commits vergleichen.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def workdir_env(workdir):
+    # Umgebungsvariablen, mit denen app.py nur im Arbeitsverzeichnis liest und schreibt
+    workdir = os.path.abspath(workdir)
+    return {
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'spordle.db')}",
+        'UPLOAD_FOLDER': os.path.join(workdir, 'uploads'),
+        'UPLOAD_STAGING_FOLDER': os.path.join(workdir, 'uploads', '.partial'),
+        'MEDIA_FOLDER': os.path.join(workdir, 'uploads', 'blobs'),
+        'METRICS_FOLDER': os.path.join(workdir, 'metrics'),
+        'CLIP_STORE_FOLDER': os.path.join(workdir, 'temp_audio'),
+        'SONG_CLIP_FOLDER': os.path.join(workdir, 'song_clips'),
+        'CATALOG_VERSION_FILE': os.path.join(workdir, 'catalog.version'),
+        'LOCK_FOLDER': os.path.join(workdir, 'locks'),
+        'IMPORT_FOLDER': os.path.join(workdir, 'import'),
+    }
+
+
+def use_workdir(workdir):
+    """Muss vor dem ersten ``import app`` aufgerufen werden."""
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.update(workdir_env(workdir))
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(seconds):
+    # Latenzen in Sekunden -> Kennzahlen in Millisekunden
+    values = sorted(s * 1000 for s in seconds)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': values[-1],
+    }
+
+
+def timed(fn, repeat, *args, **kwargs):
+    # Führt fn repeat-mal aus und liefert die Einzelzeiten in Sekunden
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args, **kwargs)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def result(name, group, seconds, params=None, **extra):
+    row = {'name': name, 'group': group, 'params': params or {}, 'latency_ms': summarize(seconds)}
+    row.update(extra)
+    return row
+
+
+def print_result(row):
+    latency = row['latency_ms']
+    if not latency.get('count'):
+        print(f"{row['group']:<12} {row['name']:<40} keine Messwerte")
+        return
+    throughput = row.get('throughput_per_s')
+    print(f"{row['group']:<12} {row['name']:<40} n={latency['count']:<6} "
+          f"p50 {latency['p50']:9.3f} ms  p95 {latency['p95']:9.3f} ms  p99 {latency['p99']:9.3f} ms"
+          + (f"  {throughput:9.1f}/s" if throughput is not None else '')
+          + (f"  {row['errors']} Fehler" if row.get('errors') else ''))
+
+
+def run_metadata(**params):
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'git_revision': revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+    }
+
+
+def write_results(path, meta, results):
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f'Ergebnisse geschrieben: {path}')
@@ -0,0 +1,53 @@
+"""Vergleicht zwei Ergebnisdateien von bench_api.py / bench_micro.py, z.B.
+vor und nach einer Änderung.
+
+Aufruf aus backend/:
+    python benchmarks/compare_results.py ALT.json NEU.json [--metric p50] [--threshold 10]
+
+Zeilen, deren Metrik sich um mehr als ``--threshold`` Prozent verschlechtert,
+werden markiert; dann endet das Skript mit Exit-Code 1.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data.get('meta', {}), {(row['group'], row['name']): row for row in data['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--metric', default='p50', choices=('mean', 'p50', 'p90', 'p95', 'p99', 'max'))
+    parser.add_argument('--threshold', type=float, default=10.0, help='Prozent')
+    args = parser.parse_args()
+
+    old_meta, old = load(args.old)
+    new_meta, new = load(args.new)
+    print(f"alt: {old_meta.get('git_revision')} {old_meta.get('timestamp')}")
+    print(f"neu: {new_meta.get('git_revision')} {new_meta.get('timestamp')}")
+    print(f"{'Gruppe':<16} {'Benchmark':<40} {'alt ' + args.metric:>12} {'neu ' + args.metric:>12} {'Änderung':>9}")
+
+    regressions = 0
+    for key in sorted(old.keys() | new.keys()):
+        before = old.get(key, {}).get('latency_ms', {}).get(args.metric)
+        after = new.get(key, {}).get('latency_ms', {}).get(args.metric)
+        if before is None or after is None:
+            print(f"{key[0]:<16} {key[1]:<40} {before or '-':>12} {after or '-':>12} {'':>9}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        marker = ''
+        if change > args.threshold:
+            marker = '  <- langsamer'
+            regressions += 1
+        print(f"{key[0]:<16} {key[1]:<40} {before:12.3f} {after:12.3f} {change:+8.1f}%{marker}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Legt einen synthetischen Katalog in einem eigenen Arbeitsverzeichnis an:
+SQLite-Datenbank, erzeugte MP3-Dateien (Sinustöne mit ID3-Tags) und Cover.
+
+Damit auch große Kataloge schnell entstehen, teilen sich die Songs eine
+kleine Zahl echter Audiodateien (``--audio-files``). Titel, Künstler, Jahr,
+Genre und Typ sind zufällig, aber über ``--seed`` reproduzierbar.
+
+Aufruf aus backend/:
+    python benchmarks/synthetic_catalog.py WORKDIR [--songs 500] [--audio-files 8] [--duration 180] [--precompute 20]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import use_workdir  # noqa: E402
+
+WORDS = (
+    'love night heart fire dream summer rain light dance city star blue gold wild '
+    'river shadow home road forever midnight ocean sky young free broken sweet storm '
+    'paper echo neon silver golden lonely crazy better higher electric secret'
+).split()
+FIRST_NAMES = 'Anna Ben Clara David Ella Finn Greta Hugo Ida Jonas Kim Lena Max Nora Paul'.split()
+LAST_NAMES = 'Berg Fischer Hahn Klein Lang Meyer Neumann Roth Schmidt Vogel Weber Wolf'.split()
+GENRES = ['Pop', 'Rock', 'R&B', 'Indie', 'Country', 'Rap', 'Soul', 'Dance', 'Ballad', 'Synthpop', 'Alternative']
+TYPES = ['Single', 'Album', 'EP', 'Single, Album']
+
+
+def generate_audio(path, duration, frequency, title):
+    from clip_engine import FFMPEG_BINARY
+    subprocess.run([
+        FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'sine=frequency={frequency}:duration={duration}',
+        '-c:a', 'libmp3lame', '-b:a', '128k', '-id3v2_version', '3',
+        '-metadata', f'title={title}', '-metadata', 'artist=Synthetic',
+        path,
+    ], check=True)
+
+
+def generate_cover(path, color):
+    from PIL import Image
+    Image.new('RGB', (600, 600), color).save(path, 'JPEG', quality=85)
+
+
+def random_song(rng, index):
+    title = ' '.join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+    artist = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    if rng.random() < 0.2:
+        artist += f' & {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    return {
+        # Laufende Nummer macht Titel eindeutig, wie in einer echten Bibliothek meist der Fall
+        'title': f'{title} {index}',
+        'artist': artist,
+        'year': rng.randint(1960, 2025),
+        'genre': ', '.join(rng.sample(GENRES, rng.randint(1, 3))),
+        'type': rng.choice(TYPES),
+        'hint1': f'Hinweis zu Song {index}',
+    }
+
+
+def seed_catalog(workdir, songs=500, audio_files=8, duration=180, precompute=0, seed=42):
+    """Erzeugt den Katalog und gibt die Anzahl der Songs zurück. Ein schon
+    befüllter Katalog im Arbeitsverzeichnis wird nicht verändert."""
+    use_workdir(workdir)
+    from app import Song, app, catalog, create_app, db, precompute_song_clips
+
+    create_app()
+    with app.app_context():
+        existing = Song.query.count()
+        if existing:
+            print(f'{workdir}: Katalog mit {existing} Songs vorhanden')
+            return existing
+
+        media_dir = os.path.join(os.path.abspath(workdir), 'media')
+        os.makedirs(media_dir, exist_ok=True)
+        rng = random.Random(seed)
+        media = []
+        for i in range(audio_files):
+            audio_path = os.path.join(media_dir, f'audio_{i}.mp3')
+            cover_path = os.path.join(media_dir, f'cover_{i}.jpg')
+            if not os.path.exists(audio_path):
+                generate_audio(audio_path, duration, 220 + 55 * i, f'Synthetic {i}')
+            if not os.path.exists(cover_path):
+                generate_cover(cover_path, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            media.append((audio_path, cover_path))
+
+        rows = []
+        for index in range(songs):
+            audio_path, cover_path = media[index % len(media)]
+            rows.append(Song(length=duration, audio_path=audio_path, cover_path=cover_path, **random_song(rng, index)))
+        db.session.add_all(rows)
+        db.session.commit()
+        catalog.invalidate()
+
+        for song in rows[:precompute]:
+            precompute_song_clips(song.id)
+        print(f'{workdir}: {songs} Songs, {len(media)} Audiodateien, {min(precompute, songs)} mit Clips')
+        return songs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('workdir')
+    parser.add_argument('--songs', type=int, default=500)
+    parser.add_argument('--audio-files', type=int, default=8)
+    parser.add_argument('--duration', type=int, default=180, help='Länge der Audiodateien in Sekunden')
+    parser.add_argument('--precompute', type=int, default=0, help='Anzahl Songs mit vorberechneten Clips')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    seed_catalog(args.workdir, args.songs, args.audio_files, args.duration, args.precompute, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+_CHUNK_SIZE = 1024 * 1024
+_BLOB_NAME = re.compile(r'^([0-9a-f]{64})\.([a-z0-9]{1,5})$')
+_STAGING_DIR = '.staging'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Inhaltsadressierte Ablage für Audio-Dateien und Cover.
+
+    Jede Datei liegt genau einmal unter ``<root>/<sha[:2]>/<sha[2:4]>/<sha>.<ext>``;
+    gleicher Inhalt ergibt denselben Pfad. Neue Dateien werden im
+    Staging-Ordner geschrieben und per rename veröffentlicht. Abgeleitete
+    Dateien (z.B. Cover-Varianten ``<sha>.<version>.<size>.webp``) liegen
+    daneben und werden mit dem Blob entfernt.
+
+    Wer welchen Blob verwendet, zählt der Aufrufer (siehe MediaBlob in app.py);
+    der Store selbst kennt keine Referenzen.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.staging_dir = os.path.join(root, _STAGING_DIR)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_extension(extension):
+        extension = (extension or '').lower().lstrip('.')
+        return 'jpg' if extension == 'jpeg' else extension or 'bin'
+
+    def path_for(self, digest, extension):
+        extension = self.normalize_extension(extension)
+        return os.path.join(self.root, digest[:2], digest[2:4], f'{digest}.{extension}')
+
+    def contains(self, path):
+        # Liegt der Pfad im Store und hat die Form <sha>.<ext>?
+        if not path:
+            return False
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(path)
+        return os.path.dirname(os.path.dirname(os.path.dirname(path))) == root and bool(_BLOB_NAME.match(os.path.basename(path)))
+
+    def staging_path(self):
+        """Temporärer Pfad auf demselben Dateisystem, z.B. für Uploads, die
+        danach mit ``put_file(..., move=True)`` übernommen werden."""
+        return os.path.join(self.staging_dir, uuid.uuid4().hex)
+
+    @staticmethod
+    def _reuse(target):
+        # Gleicher Inhalt liegt schon im Store. Die mtime wird erneuert, damit
+        # die Schonfrist für Blobs ohne Eintrag ab der neuen Verwendung zählt.
+        try:
+            os.utime(target)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _publish(self, tmp_path, digest, extension):
+        target = self.path_for(digest, extension)
+        if self._reuse(target):
+            os.remove(tmp_path)
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+        return target
+
+    def put_file(self, source, extension, digest=None, move=False):
+        """Übernimmt eine Datei in den Store und liefert (sha256, Pfad).
+
+        Mit ``move=True`` wird ``source`` verschoben statt kopiert; es muss
+        dann auf demselben Dateisystem liegen (z.B. ``staging_path()``).
+        ``digest`` spart das erneute Hashen, wenn der SHA-256 schon bekannt ist.
+        """
+        digest = digest or file_digest(source)
+        if move:
+            tmp_path = source
+        else:
+            tmp_path = self.staging_path()
+            try:
+                shutil.copyfile(source, tmp_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return digest, self._publish(tmp_path, digest, extension)
+
+    def put_bytes(self, data, extension, digest=None):
+        digest = digest or hashlib.sha256(data).hexdigest()
+        target = self.path_for(digest, extension)
+        if self._reuse(target):
+            return digest, target
+        tmp_path = self.staging_path()
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        return digest, self._publish(tmp_path, digest, extension)
+
+    def digest_of(self, path):
+        # SHA-256 aus dem Dateinamen eines Blobs, None für andere Pfade
+        match = _BLOB_NAME.match(os.path.basename(path)) if self.contains(path) else None
+        return match.group(1) if match else None
+
+    def scan(self):
+        """Alle Dateien im Store, aufgeteilt in Blobs und abgeleitete Dateien.
+        Liefert (Blob-Pfade, {abgeleiteter Pfad: Pfade der Blobs mit diesem SHA-256})."""
+        blobs = []
+        derived = []
+        for folder, dirs, names in os.walk(self.root):
+            dirs[:] = [d for d in dirs if os.path.join(folder, d) != self.staging_dir]
+            for name in names:
+                path = os.path.join(folder, name)
+                (blobs if _BLOB_NAME.match(name) else derived).append(path)
+        by_digest = {}
+        for path in blobs:
+            by_digest.setdefault((os.path.dirname(path), os.path.basename(path).split('.', 1)[0]), []).append(path)
+        return blobs, {
+            path: by_digest.get((os.path.dirname(path), os.path.basename(path).split('.', 1)[0]), [])
+            for path in derived
+        }
+
+    def remove(self, path):
+        # Blob samt abgeleiteter Dateien löschen
+        if not self.contains(path):
+            raise ValueError(f'Kein Blob-Pfad: {path!r}')
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        digest = os.path.basename(path).split('.', 1)[0]
+        siblings = glob.glob(os.path.join(glob.escape(os.path.dirname(path)), f'{digest}.*'))
+        if any(_BLOB_NAME.match(os.path.basename(p)) for p in siblings):
+            # Gleicher Inhalt unter anderer Endung, die Varianten gehören auch dazu
+            return
+        for sibling in siblings:
+            try:
+                os.remove(sibling)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,134 @@
+import os
+import threading
+import uuid
+from collections import namedtuple
+from functools import cached_property
+from types import MappingProxyType
+
+from catalog_listing import CatalogListing
+from locks import hold_lock
+from scoring import FeatureTable
+from search_index import SearchIndex
+from title_index import TitleIndex
+
+# Kompakter, unveränderlicher Datensatz pro Song für die Lese-Pfade
+SongRecord = namedtuple('SongRecord', [
+    'id', 'title', 'artist', 'year', 'genre', 'type', 'length',
+    'audio_path', 'cover_path', 'hint1', 'hint2', 'playable',
+])
+
+
+class CatalogVersion:
+    """Versionszähler in einer Datei, gemeinsam für alle Worker-Prozesse.
+
+    Jede Erhöhung ersetzt die Datei per rename, unter einer Sperrdatei,
+    damit zwei gleichzeitige Schreiber nicht dieselbe Nummer vergeben.
+    Leser vergleichen nur das Ergebnis von os.stat (inode, mtime, Größe)
+    und brauchen dafür kein SQL.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f'{path}.lock'
+
+    @staticmethod
+    def _stamp_of(st):
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return self._stamp_of(st)
+
+    def current(self):
+        """Stempel und Nummer derselben Dateiversion. Über den offenen
+        Deskriptor gelesen, ein gleichzeitiges rename ändert keines von beiden."""
+        try:
+            with open(self.path) as f:
+                stamp = self._stamp_of(os.fstat(f.fileno()))
+                content = f.read().strip()
+        except FileNotFoundError:
+            return None, 0
+        try:
+            return stamp, int(content or 0)
+        except ValueError:
+            return stamp, 0
+
+    def read(self):
+        return self.current()[1]
+
+    def bump(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with hold_lock(self.lock_path):
+            version = self.read() + 1
+            tmp_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(str(version))
+            os.replace(tmp_path, self.path)
+        return version
+
+
+class CatalogSnapshot:
+    def __init__(self, records, version):
+        self.version = version
+        self.songs = tuple(records)
+        self.by_id = MappingProxyType({song.id: song for song in self.songs})
+
+    def __len__(self):
+        return len(self.songs)
+
+    def get(self, song_id):
+        return self.by_id.get(song_id)
+
+    @cached_property
+    def title_index(self):
+        # Wird beim ersten Rateversuch nach einem Neuladen aufgebaut
+        return TitleIndex(self.songs)
+
+    @cached_property
+    def features(self):
+        return FeatureTable(self.songs)
+
+    @cached_property
+    def search_index(self):
+        return SearchIndex(self.songs)
+
+    @cached_property
+    def listing(self):
+        return CatalogListing(self.songs)
+
+
+class Catalog:
+    """Prozesslokaler Snapshot des Song-Katalogs.
+
+    ``loader`` liefert alle SongRecords aus der Datenbank und wird nur
+    aufgerufen, wenn sich der Versionszähler seit dem letzten Laden
+    geändert hat.
+    """
+
+    def __init__(self, loader, version):
+        self._loader = loader
+        self._version = version
+        self._snapshot = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        stamp = self._version.stamp()
+        snapshot = self._snapshot
+        if snapshot is not None and stamp == self._stamp:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or stamp != self._stamp:
+                # Stempel und Nummer vor dem Laden gemeinsam merken: ein
+                # Schreibvorgang während des Ladens erhöht beide und löst
+                # beim nächsten Zugriff erneut ein Laden aus
+                stamp, version = self._version.current()
+                self._snapshot = CatalogSnapshot(self._loader(), version)
+                self._stamp = stamp
+            return self._snapshot
+
+    def invalidate(self):
+        self._version.bump()
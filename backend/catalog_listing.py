@@ -0,0 +1,218 @@
+import base64
+import bisect
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    # Ohne das Brotli-Paket wird nur gzip angeboten
+    brotli = None
+
+# Felder pro Song; öffentliche Listen dürfen nur einen Teil davon ausgeben
+LISTING_FIELDS = {
+    'id': lambda song: song.id,
+    'title': lambda song: song.title,
+    'artist': lambda song: song.artist,
+    'year': lambda song: song.year,
+    'genre': lambda song: song.genre,
+    'type': lambda song: song.type,
+    'length': lambda song: song.length,
+    'has_audio': lambda song: bool(song.audio_path),
+    'has_cover': lambda song: bool(song.cover_path),
+    'hint1': lambda song: song.hint1,
+    'hint2': lambda song: song.hint2,
+}
+
+# Sortierschlüssel ohne None, damit Cursor und bisect vergleichbar bleiben
+SORT_KEYS = {
+    'id': lambda song: 0,
+    'title': lambda song: (song.title or '').casefold(),
+    'artist': lambda song: (song.artist or '').casefold(),
+    'year': lambda song: song.year or 0,
+}
+
+# Größte Seite; ohne limit und cursor kommt wie vor der Paginierung der ganze Katalog
+MAX_LIMIT = 500
+BLOB_CACHE_SIZE = 256
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class ListingQuery:
+    """Geprüfte Parameter einer Listenanfrage. ``key`` ist die normalisierte
+    Form und bestimmt ETag und Cache-Eintrag. Ungültige Werte lösen
+    ValueError mit einer Meldung für den Client aus. ``limit`` ist None,
+    wenn weder limit noch cursor angegeben sind: dann wird nicht geteilt."""
+
+    def __init__(self, args, allowed_fields, default_fields):
+        fields = args.get('fields')
+        self.fields = tuple(f.strip() for f in fields.split(',') if f.strip()) if fields else tuple(default_fields)
+        unknown = [f for f in self.fields if f not in allowed_fields]
+        if unknown or not self.fields:
+            raise ValueError(f"Unbekannte Felder: {', '.join(unknown) or '-'}")
+
+        sort = args.get('sort', 'id')
+        self.descending = sort.startswith('-')
+        self.sort = sort.lstrip('-')
+        if self.sort not in SORT_KEYS:
+            raise ValueError(f'Unbekannte Sortierung: {sort}')
+
+        self.cursor = args.get('cursor') or None
+        limit = args.get('limit')
+        if limit is None and self.cursor is None:
+            self.limit = None
+        else:
+            try:
+                self.limit = min(max(int(limit or MAX_LIMIT), 1), MAX_LIMIT)
+            except ValueError:
+                raise ValueError('limit muss eine Zahl sein')
+
+        self.artist = (args.get('artist') or '').strip().casefold()
+        self.genre = (args.get('genre') or '').strip().casefold()
+        self.year_from, self.year_to = self._parse_years(args.get('year'))
+        self.after = _decode_cursor(self.cursor) if self.cursor else None
+
+        self.key = (
+            self.fields, self.sort, self.descending, self.limit,
+            self.artist, self.genre, self.year_from, self.year_to, self.cursor,
+        )
+
+    @staticmethod
+    def _parse_years(value):
+        # "2020" oder Bereich "2010-2019"
+        if not value:
+            return None, None
+        first, _, last = value.partition('-')
+        try:
+            return int(first), int(last or first)
+        except ValueError:
+            raise ValueError('year muss eine Jahreszahl oder ein Bereich wie 2010-2019 sein')
+
+    def matches(self, song):
+        if self.artist and self.artist not in (song.artist or '').casefold():
+            return False
+        if self.genre and self.genre not in {g.strip().casefold() for g in (song.genre or '').split(',')}:
+            return False
+        if self.year_from is not None and not (song.year and self.year_from <= song.year <= self.year_to):
+            return False
+        return True
+
+
+def _encode_cursor(sort_key):
+    return base64.urlsafe_b64encode(json.dumps(sort_key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return tuple(value)
+    except (ValueError, TypeError):
+        raise ValueError('Ungültiger Cursor')
+
+
+class ListingPage:
+    """Fertig serialisierte Seite, komprimierte Fassungen entstehen beim
+    ersten Bedarf und bleiben mit der Seite im Cache."""
+
+    def __init__(self, body, next_cursor):
+        self.body = body
+        self.next_cursor = next_cursor
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.body
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == 'br':
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self._encoded[encoding] = data
+            return data
+
+
+class CatalogListing:
+    """Seitenweise Katalogliste mit Keyset-Paginierung.
+
+    Pro Sortierung wird einmal eine nach (Schlüssel, id) sortierte Liste
+    aufgebaut; der Cursor enthält den Schlüssel des letzten Eintrags und
+    bleibt daher auch nach Katalogänderungen gültig. Serialisierte Seiten
+    liegen pro normalisierter Anfrage in einem LRU-Cache, der mit dem
+    Snapshot verworfen wird.
+    """
+
+    def __init__(self, songs):
+        self._songs = list(songs)
+        self._orders = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _order(self, sort):
+        order = self._orders.get(sort)
+        if order is None:
+            key = SORT_KEYS[sort]
+            entries = sorted(((key(song), song.id), song) for song in self._songs)
+            order = ([entry[0] for entry in entries], [entry[1] for entry in entries])
+            with self._lock:
+                self._orders[sort] = order
+        return order
+
+    def _select(self, query):
+        keys, songs = self._order(query.sort)
+        if query.descending:
+            end = bisect.bisect_left(keys, query.after) if query.after else len(keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect.bisect_right(keys, query.after) if query.after else 0
+            positions = range(start, len(keys))
+        selected = []
+        last = None
+        for position in positions:
+            song = songs[position]
+            if not query.matches(song):
+                continue
+            if len(selected) == query.limit:
+                return selected, _encode_cursor(last)
+            selected.append(song)
+            last = keys[position]
+        return selected, None
+
+    def page(self, query):
+        with self._lock:
+            page = self._cache.get(query.key)
+            if page is not None:
+                self._cache.move_to_end(query.key)
+                return page, True
+
+        try:
+            songs, next_cursor = self._select(query)
+        except TypeError:
+            # Cursor einer anderen Sortierung
+            raise ValueError('Ungültiger Cursor')
+        getters = [(name, LISTING_FIELDS[name]) for name in query.fields]
+        body = json.dumps(
+            [{name: getter(song) for name, getter in getters} for song in songs],
+            ensure_ascii=False, separators=(',', ':'),
+        ).encode('utf-8')
+        page = ListingPage(body, next_cursor)
+
+        with self._lock:
+            self._cache[query.key] = page
+            while len(self._cache) > BLOB_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return page, False
+
+
+def choose_encoding(accept_encodings):
+    # Brotli vor gzip, sofern installiert und vom Client angeboten
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from locks import try_lock
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+_CHUNK_SIZE = 64 * 1024
+# Empfohlene Chunk-Größe für Clients, muss unter MAX_CONTENT_LENGTH bleiben
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """Fehler beim Chunk-Upload, ``status`` ist der passende HTTP-Status.
+    Bei 409 (falscher Offset) enthält ``offset`` den tatsächlichen Stand."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class UploadStore:
+    """Wiederaufnehmbare Uploads großer Dateien in Teilstücken.
+
+    Pro Upload liegen in ``root`` die Teildatei ``<id>.part``, die Angaben
+    des Clients in ``<id>.json`` und eine Sperrdatei. Chunks werden direkt
+    aus dem Request-Stream an die Teildatei angehängt; der Stand (Offset)
+    ist die Dateigröße, ein abgebrochener Chunk kann also ab dort neu
+    gesendet werden.
+
+    Der SHA-256 wird beim Schreiben fortgeschrieben. Landet der nächste
+    Chunk in einem anderen Worker-Prozess, wird der Hash dort einmal aus der
+    Teildatei nachgerechnet. ``finalize`` verschiebt die fertige Datei per
+    rename, ``root`` muss daher auf demselben Dateisystem wie das Ziel liegen.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age=24 * 60 * 60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._hashers = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, upload_id, suffix):
+        if not upload_id or not _ID_PATTERN.match(upload_id):
+            raise UploadError('Ungültige Upload-ID', 404)
+        return os.path.join(self.root, f'{upload_id}{suffix}')
+
+    def _load(self, upload_id):
+        try:
+            with open(self._path(upload_id, '.json')) as f:
+                info = json.load(f)
+            info['offset'] = os.path.getsize(self._path(upload_id, '.part'))
+        except (OSError, ValueError):
+            raise UploadError('Upload nicht gefunden', 404)
+        return info
+
+    def create(self, filename, size, sha256=None, max_bytes=None):
+        # max_bytes ersetzt die Grenze des Stores, z.B. für Import-Archive
+        max_bytes = max_bytes or self.max_bytes
+        if size <= 0:
+            raise UploadError('Ungültige Dateigröße')
+        if max_bytes and size > max_bytes:
+            raise UploadError(f'Datei zu groß (maximal {max_bytes // (1024 * 1024)} MB)', 413)
+        self.purge_expired()
+
+        upload_id = uuid.uuid4().hex
+        info = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'size': size,
+            'sha256': sha256.lower() if sha256 else None,
+            'created_at': time.time(),
+        }
+        open(self._path(upload_id, '.part'), 'wb').close()
+        tmp_path = self._path(upload_id, f'.json.{uuid.uuid4().hex}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(info, f)
+        os.replace(tmp_path, self._path(upload_id, '.json'))
+        with self._lock:
+            self._hashers[upload_id] = (0, hashlib.sha256())
+        info['offset'] = 0
+        return info
+
+    def status(self, upload_id):
+        return self._load(upload_id)
+
+    def _hasher(self, upload_id, offset):
+        # Hash-Stand aus diesem Prozess, sonst aus der Teildatei nachrechnen
+        with self._lock:
+            cached = self._hashers.pop(upload_id, None)
+        if cached and cached[0] == offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        with open(self._path(upload_id, '.part'), 'rb') as f:
+            remaining = offset
+            while remaining > 0:
+                chunk = f.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def append(self, upload_id, offset, stream, length):
+        """Hängt ``length`` Bytes aus ``stream`` an, wenn ``offset`` dem
+        aktuellen Stand entspricht. Liefert den neuen Stand."""
+        with try_lock(self._path(upload_id, '.lock')) as locked:
+            if not locked:
+                raise UploadError('Upload wird gerade geschrieben', 409)
+            info = self._load(upload_id)
+            current = info['offset']
+            if offset != current:
+                raise UploadError('Offset passt nicht zum Upload-Stand', 409, offset=current)
+            if current + length > info['size']:
+                raise UploadError('Chunk geht über die angekündigte Dateigröße hinaus')
+
+            hasher = self._hasher(upload_id, current)
+            written = current
+            try:
+                with open(self._path(upload_id, '.part'), 'r+b') as f:
+                    f.seek(current)
+                    remaining = length
+                    while remaining > 0:
+                        chunk = stream.read(min(_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        written += len(chunk)
+                        remaining -= len(chunk)
+            finally:
+                # Auch bei abgebrochener Verbindung bleibt der geschriebene Teil erhalten
+                with self._lock:
+                    self._hashers[upload_id] = (written, hasher)
+            return written
+
+    def finalize(self, upload_id, target_path):
+        """Prüft Vollständigkeit und Prüfsumme und verschiebt die Datei atomar
+        nach ``target_path``. Liefert den SHA-256."""
+        with try_lock(self._path(upload_id, '.lock')) as locked:
+            if not locked:
+                raise UploadError('Upload wird gerade geschrieben', 409)
+            info = self._load(upload_id)
+            if info['offset'] != info['size']:
+                raise UploadError(
+                    f"Upload unvollständig ({info['offset']} von {info['size']} Bytes)", 409, offset=info['offset']
+                )
+            digest = self._hasher(upload_id, info['offset']).hexdigest()
+            if info['sha256'] and info['sha256'] != digest:
+                self.abort(upload_id)
+                raise UploadError('Prüfsumme stimmt nicht, Upload wurde verworfen', 422)
+
+            os.replace(self._path(upload_id, '.part'), target_path)
+            self._remove(upload_id, ('.json',))
+        return digest
+
+    def abort(self, upload_id):
+        self._load(upload_id)
+        self._remove(upload_id, ('.part', '.json'))
+
+    def _remove(self, upload_id, suffixes):
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        for suffix in suffixes + ('.lock',):
+            try:
+                os.remove(self._path(upload_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self, now=None):
+        # Uploads, an denen seit max_age nichts mehr geschrieben wurde
+        if not self.max_age:
+            return 0
+        now = now or time.time()
+        removed = 0
+        for name in os.listdir(self.root):
+            upload_id, _, suffix = name.partition('.')
+            if suffix != 'part' or not _ID_PATTERN.match(upload_id):
+                continue
+            try:
+                if now - os.path.getmtime(os.path.join(self.root, name)) <= self.max_age:
+                    continue
+            except FileNotFoundError:
+                continue
+            with try_lock(self._path(upload_id, '.lock')) as locked:
+                if locked:
+                    self._remove(upload_id, ('.part', '.json'))
+                    removed += 1
+        return removed
@@ -0,0 +1,137 @@
+import os
+import shutil
+import subprocess
+import uuid
+
+from metrics import metrics
+
+# Länge der Clips in Millisekunden, alle beginnen am selben Offset
+CLIP_DURATIONS_MS = {
+    'start': 7000,
+    'hint3': 15000,
+    'reveal': 30000,
+}
+
+# Encodier-Profile der Clips: Dateiendung, MIME-Typ und ffmpeg-Ausgabeoptionen.
+# Für einen Teaser von wenigen Sekunden reichen niedrige Bitraten; mp3 ist die
+# Rückfallebene, die jeder Browser abspielt.
+ENCODING_PROFILES = {
+    'opus': {
+        'extension': 'opus',
+        'mimetype': 'audio/ogg',
+        'options': ['-c:a', 'libopus', '-b:a', os.getenv('CLIP_OPUS_BITRATE', '48k'), '-f', 'ogg'],
+    },
+    'aac': {
+        'extension': 'aac',
+        'mimetype': 'audio/aac',
+        'options': ['-c:a', 'aac', '-b:a', os.getenv('CLIP_AAC_BITRATE', '64k'), '-f', 'adts'],
+    },
+    'mp3': {
+        'extension': 'mp3',
+        'mimetype': 'audio/mpeg',
+        'options': ['-c:a', 'libmp3lame', '-b:a', os.getenv('CLIP_MP3_BITRATE', '128k'), '-f', 'mp3'],
+    },
+}
+DEFAULT_PROFILE = 'mp3'
+
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+FFMPEG_TIMEOUT = 60
+
+
+class ClipExtractionError(Exception):
+    pass
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+_encoders = None
+
+
+def missing_encoders(profiles):
+    """Encoder der Profile, die diese ffmpeg-Installation nicht kennt.
+    ``ffmpeg -encoders`` läuft nur beim ersten Aufruf pro Prozess."""
+    global _encoders
+    if _encoders is None:
+        result = subprocess.run(
+            [FFMPEG_BINARY, '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=FFMPEG_TIMEOUT,
+        )
+        # Zeilen der Form " A....D libopus    libopus Opus"
+        _encoders = {line.split()[1] for line in result.stdout.splitlines() if line.startswith(' A') and len(line.split()) > 1}
+    needed = {ENCODING_PROFILES[profile]['options'][1] for profile in profiles}
+    return sorted(encoder for encoder in needed if encoder not in _encoders)
+
+
+def probe_duration_ms(audio_path):
+    # Liest nur Header/Xing-Frame, dekodiert nichts
+    with metrics.span('ffprobe'):
+        result = subprocess.run(
+            [FFPROBE_BINARY, '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', audio_path],
+            capture_output=True, text=True, timeout=FFMPEG_TIMEOUT,
+        )
+    try:
+        return int(float(result.stdout.strip()) * 1000)
+    except ValueError:
+        raise ClipExtractionError(f'Dauer nicht lesbar: {audio_path}: {result.stderr.strip()}')
+
+
+def extract_clips(audio_path, offset_ms, outputs):
+    """Schneidet alle Clips ab ``offset_ms`` in einem einzigen ffmpeg-Lauf.
+
+    ``outputs`` bildet Clip-Namen aus CLIP_DURATIONS_MS auf Zieldateien ab,
+    oder (Clip-Name, Profil aus ENCODING_PROFILES) für andere Formate als
+    DEFAULT_PROFILE. ffmpeg springt per -ss vor dem Input direkt an den Offset und dekodiert
+    nur das längste benötigte Fenster; die Ausgaben werden gestreamt
+    encodiert. Der Speicherbedarf hängt damit nicht von der Songlänge ab.
+    """
+    outputs = {
+        (name if isinstance(name, tuple) else (name, DEFAULT_PROFILE)): target for name, target in outputs.items()
+    }
+    window_ms = max(CLIP_DURATIONS_MS[kind] for kind, _ in outputs)
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-ss', f'{offset_ms / 1000:.3f}', '-t', f'{window_ms / 1000:.3f}',
+        '-i', audio_path,
+    ]
+    for (kind, profile), target in outputs.items():
+        command += [
+            '-map', '0:a:0', '-map_metadata', '-1', '-vn',
+            '-t', f'{CLIP_DURATIONS_MS[kind] / 1000:.3f}',
+            *ENCODING_PROFILES[profile]['options'], target,
+        ]
+    try:
+        # Dekodieren und Encodieren laufen im selben ffmpeg-Prozess und werden zusammen gemessen
+        with metrics.span('ffmpeg_decode_encode'), metrics.in_flight('spordle_renders_in_flight'):
+            result = subprocess.run(command, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise ClipExtractionError(f'ffmpeg Timeout bei {audio_path}')
+    if result.returncode != 0:
+        raise ClipExtractionError(f'ffmpeg fehlgeschlagen für {audio_path}: {result.stderr.strip()}')
+
+
+def transcode_clip(source_path, target_path, profile):
+    """Encodiert einen fertigen Clip in ``profile`` um. Geschrieben wird in
+    eine temporäre Datei neben dem Ziel, die erst vollständig per rename
+    sichtbar wird; gleichzeitige Aufrufe für dasselbe Ziel sind harmlos."""
+    tmp_path = f'{target_path}.{uuid.uuid4().hex}.tmp'
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', source_path, '-map', '0:a:0', '-map_metadata', '-1', '-vn',
+        *ENCODING_PROFILES[profile]['options'], tmp_path,
+    ]
+    try:
+        with metrics.span('ffmpeg_decode_encode'), metrics.in_flight('spordle_renders_in_flight'):
+            result = subprocess.run(command, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+        if result.returncode != 0:
+            raise ClipExtractionError(f'ffmpeg fehlgeschlagen für {source_path}: {result.stderr.strip()}')
+        os.replace(tmp_path, target_path)
+    except subprocess.TimeoutExpired:
+        raise ClipExtractionError(f'ffmpeg Timeout bei {source_path}')
+    finally:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
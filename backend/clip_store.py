@@ -0,0 +1,177 @@
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from locks import try_lock
+
+# Erlaubte Schlüssel: Session-IDs (UUIDs) oder Clip-Schlüssel wie "clip-<hex>"
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,100}$')
+_STAGING_PREFIX = '.staging-'
+_TRASH_PREFIX = '.trash-'
+# Sperrdatei, damit bei mehreren Worker-Prozessen nur einer gleichzeitig verdrängt
+_EVICT_LOCK = '.evict.lock'
+
+
+class ClipStore:
+    """Ablage für Audio-Clips, ein Unterordner pro Schlüssel.
+
+    Clips werden zuerst in einen Staging-Ordner geschrieben und danach per
+    rename veröffentlicht, Leser sehen also nie halb geschriebene Dateien.
+    Alte Einträge werden nach Alter (max_age in Sekunden) und Gesamtgröße
+    (max_bytes) verdrängt, jeweils der Eintrag mit der ältesten mtime zuerst;
+    ``touch`` markiert einen Eintrag als benutzt. None deaktiviert die
+    jeweilige Grenze.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age=None, evict_interval=30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_interval = evict_interval
+        self._last_eviction = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def valid_key(key):
+        return bool(key) and _KEY_PATTERN.match(key) is not None
+
+    def _key_dir(self, key):
+        if not self.valid_key(key):
+            raise ValueError(f'Ungültiger Clip-Schlüssel: {key!r}')
+        return os.path.join(self.root, key)
+
+    def path(self, key, name):
+        return os.path.join(self._key_dir(key), name)
+
+    def get(self, key, name):
+        # Liefert den Pfad nur, wenn der Clip vollständig veröffentlicht wurde
+        if not self.valid_key(key):
+            return None
+        path = os.path.join(self.root, key, name)
+        return path if os.path.isfile(path) else None
+
+    def exists(self, key):
+        return self.valid_key(key) and os.path.isdir(os.path.join(self.root, key))
+
+    def touch(self, key):
+        # Verdrängt wird nach mtime, ein benutzter Eintrag rückt damit nach hinten
+        try:
+            os.utime(self._key_dir(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def staging(self, key):
+        """Stellt einen leeren Ordner bereit, der beim Verlassen atomar unter
+        ``key`` veröffentlicht wird. Bei einer Exception wird er verworfen."""
+        target = self._key_dir(key)
+        staging_dir = os.path.join(self.root, f'{_STAGING_PREFIX}{uuid.uuid4().hex}')
+        os.makedirs(staging_dir)
+        try:
+            yield staging_dir
+            self._publish(staging_dir, target)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        self.maybe_evict()
+
+    def _publish(self, staging_dir, target):
+        # Ein vorhandener Eintrag wird erst beiseitegeschoben, damit das
+        # rename des neuen Ordners atomar bleibt.
+        trash_dir = None
+        if os.path.exists(target):
+            trash_dir = os.path.join(self.root, f'{_TRASH_PREFIX}{uuid.uuid4().hex}')
+            try:
+                os.rename(target, trash_dir)
+            except FileNotFoundError:
+                trash_dir = None
+        os.rename(staging_dir, target)
+        if trash_dir:
+            shutil.rmtree(trash_dir, ignore_errors=True)
+
+    def remove(self, key):
+        if not self.valid_key(key):
+            return
+        target = os.path.join(self.root, key)
+        trash_dir = os.path.join(self.root, f'{_TRASH_PREFIX}{uuid.uuid4().hex}')
+        try:
+            os.rename(target, trash_dir)
+        except FileNotFoundError:
+            return
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name == _EVICT_LOCK:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        size = 0
+                        with os.scandir(entry.path) as files:
+                            for f in files:
+                                if f.is_file(follow_symlinks=False):
+                                    size += f.stat().st_size
+                        entries.append((entry.stat().st_mtime, size, entry.name, entry.path))
+                    else:
+                        # Lose Dateien (z.B. aus dem alten temp_audio-Layout) zählen als Altlast
+                        entries.append((0.0, entry.stat().st_size, entry.name, entry.path))
+                except FileNotFoundError:
+                    # Gleichzeitig von einem anderen Prozess entfernt oder umbenannt
+                    continue
+        return entries
+
+    def keys(self):
+        # Veröffentlichte Einträge als (Schlüssel, mtime), ohne Staging- und Papierkorb-Ordner
+        return [
+            (name, mtime) for mtime, _, name, path in self._entries()
+            if mtime and not name.startswith((_STAGING_PREFIX, _TRASH_PREFIX))
+        ]
+
+    def usage(self):
+        return sum(size for _, size, _, _ in self._entries())
+
+    def maybe_evict(self):
+        now = time.time()
+        if now - self._last_eviction < self.evict_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_eviction = now
+            with try_lock(os.path.join(self.root, _EVICT_LOCK)) as acquired:
+                if acquired:
+                    self.evict(now)
+        finally:
+            self._lock.release()
+
+    def evict(self, now=None):
+        now = now or time.time()
+        removed = 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _, _ in entries)
+        for mtime, size, name, path in entries:
+            if name.startswith(_STAGING_PREFIX) and now - mtime < 3600:
+                # Laufende Renderings anderer Threads/Prozesse nicht anfassen
+                continue
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big or name.startswith(_TRASH_PREFIX) or mtime == 0.0):
+                # Einträge sind nach Alter sortiert, alle weiteren sind jünger
+                break
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
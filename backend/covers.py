@@ -0,0 +1,87 @@
+import glob
+import os
+import uuid
+
+from media import content_etag
+
+# Kantenlängen der Vorschaubilder in Pixeln
+COVER_SIZES = (64, 128, 300)
+
+# Dateiendung -> (Pillow-Format, MIME-Typ, Speicheroptionen)
+COVER_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_path(cover_path, version, size, extension):
+    # Die Inhaltsversion im Namen verhindert, dass nach einem Cover-Wechsel alte Varianten ausgeliefert werden
+    root, _ = os.path.splitext(cover_path)
+    return f'{root}.{version}.{size}.{extension}'
+
+
+def cover_version(cover_path):
+    return content_etag(cover_path)[:12]
+
+
+def generate_cover_variants(cover_path):
+    """Erzeugt alle Größen in allen Formaten neben dem Original-Cover.
+
+    Jede Datei wird erst unter einem temporären Namen geschrieben und dann
+    per rename veröffentlicht. Varianten älterer Versionen werden entfernt.
+    """
+    from PIL import Image
+
+    version = cover_version(cover_path)
+    created = 0
+    with Image.open(cover_path) as original:
+        image = original.convert('RGB')
+    for size in COVER_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        for extension, (image_format, _, options) in COVER_FORMATS.items():
+            target = variant_path(cover_path, version, size, extension)
+            if os.path.exists(target):
+                continue
+            tmp_path = f'{target}.{uuid.uuid4().hex}.tmp'
+            try:
+                thumbnail.save(tmp_path, image_format, **options)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            created += 1
+
+    root, _ = os.path.splitext(cover_path)
+    for extension in COVER_FORMATS:
+        for path in glob.glob(f'{glob.escape(root)}.*.*.{extension}'):
+            if f'.{version}.' not in os.path.basename(path):
+                os.remove(path)
+    return created
+
+
+def choose_variant(cover_path, requested_size, accept_header):
+    """Kleinste Variante, die mindestens ``requested_size`` groß ist.
+
+    WebP wird nur geliefert, wenn der Client es im Accept-Header anbietet.
+    Gibt (Pfad, MIME-Typ) zurück oder None, wenn keine passende Variante
+    existiert und das Original ausgeliefert werden soll.
+    """
+    if not requested_size:
+        return None
+    sizes = [size for size in COVER_SIZES if size >= requested_size]
+    if not sizes:
+        return None
+    extension = 'webp' if accept_header and 'image/webp' in accept_header else 'jpg'
+    path = variant_path(cover_path, cover_version(cover_path), sizes[0], extension)
+    if not os.path.exists(path):
+        return None
+    return path, COVER_FORMATS[extension][1]
+
+
+def missing_variants(cover_path):
+    version = cover_version(cover_path)
+    return any(
+        not os.path.exists(variant_path(cover_path, version, size, extension))
+        for size in COVER_SIZES for extension in COVER_FORMATS
+    )
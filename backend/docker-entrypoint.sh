@@ -9,15 +9,26 @@ mkdir -p /app/uploads
 chmod -R 777 /app/data
 chmod -R 777 /app/uploads
 
-# Initialisiere die Datenbank falls noch nicht vorhanden
-if [ ! -f "/app/data/spordle.db" ]; then
-    echo "Erstelle neue Datenbank..."
-    python -c "from app import init_database; init_database()"
-fi
+# create_app legt die Datenbank bzw. fehlende Tabellen/Spalten an, im selben Prozess werden
+# Audio und Cover aus alten Song-Ordnern in die inhaltsadressierte Ablage übernommen
+flask --app 'app:create_app()' migrate-media
+
+# Neue oder geänderte Songs prüfen und als spielbar markieren
+flask --app 'app:create_app()' scan-library --only-unverified &
+
+# Fehlende Cover-Vorschaubilder im Hintergrund nachziehen
+flask --app 'app:create_app()' backfill-covers &
+
+# Tagesrätsel für heute und morgen vorab rendern
+flask --app 'app:create_app()' prepare-daily --days 2 &
 
 echo "Datenbank-Status:"
 ls -la /app/data/
 
-# Starte Gunicorn
-echo "Starte Gunicorn Server..."
-exec gunicorn --bind 0.0.0.0:5000 --workers 1 --threads 2 --timeout 120 app:app
+# Starte Gunicorn: Sessions liegen in SQLite, Clips auf dem Datenvolume,
+# daher kann jeder Worker jede Anfrage bedienen. --preload importiert die App
+# einmal im Master, neue Worker (auch nach einem Absturz) entstehen per fork
+WORKERS=${GUNICORN_WORKERS:-$(nproc)}
+THREADS=${GUNICORN_THREADS:-4}
+echo "Starte Gunicorn Server mit $WORKERS Workern und $THREADS Threads..."
+exec gunicorn --bind 0.0.0.0:5000 --workers "$WORKERS" --threads "$THREADS" --timeout 120 --preload 'app:create_app()'
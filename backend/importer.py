@@ -0,0 +1,108 @@
+import hashlib
+import os
+import zipfile
+
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'ogg'}
+
+COVER_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+}
+
+
+def is_audio_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in AUDIO_EXTENSIONS
+
+
+def find_audio_files(directory):
+    files = []
+    for root, dirs, filenames in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        files += [os.path.join(root, f) for f in sorted(filenames) if is_audio_file(f) and not f.startswith('.')]
+    return files
+
+
+def extract_archive(archive, target_dir):
+    # Nur Audiodateien entpacken, Pfade aus dem Archiv werden nicht übernommen (Zip-Slip)
+    os.makedirs(target_dir, exist_ok=True)
+    with zipfile.ZipFile(archive) as zf:
+        for index, info in enumerate(zf.infolist()):
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name.startswith('.') or not is_audio_file(name):
+                continue
+            target = os.path.join(target_dir, f'{index:06d}_{name}')
+            with zf.open(info) as src, open(target, 'wb') as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+    return target_dir
+
+
+def probe_audio_file(path):
+    """Liest Metadaten, Cover und Dauer einer Datei. Läuft im Prozess-Pool.
+
+    Gibt ein dict zurück; bei Fehlern enthält es ``error`` statt Metadaten.
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        result = {
+            'path': path,
+            'sha256': digest.hexdigest(),
+            'title': None,
+            'artist': None,
+            'year': None,
+            'genre': None,
+            'length': None,
+            'cover': None,
+            'cover_mime': None,
+        }
+
+        import eyed3
+        eyed3.log.setLevel('ERROR')
+        audiofile = eyed3.load(path)
+        if audiofile and audiofile.tag:
+            tag = audiofile.tag
+            result['title'] = tag.title or None
+            result['artist'] = tag.artist or None
+            best_date = tag.getBestDate()
+            result['year'] = best_date.year if best_date else None
+            result['genre'] = tag.genre.name if tag.genre else None
+            for image in tag.images:
+                if image.image_data:
+                    result['cover'] = image.image_data
+                    result['cover_mime'] = (image.mime_type or 'image/jpeg').lower()
+                    break
+        if audiofile and audiofile.info and audiofile.info.time_secs:
+            result['length'] = int(audiofile.info.time_secs)
+        else:
+            from clip_engine import probe_duration_ms
+            result['length'] = probe_duration_ms(path) // 1000
+
+        if not result['title']:
+            # Dateiname ohne Endung und ohne Präfix aus extract_archive
+            stem = os.path.splitext(os.path.basename(path))[0]
+            result['title'] = stem.split('_', 1)[1] if stem[:6].isdigit() and '_' in stem else stem
+        return result
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+
+def probe_files(paths, workers=None):
+    """Liefert die Ergebnisse von probe_audio_file in Eingabereihenfolge,
+    sobald sie vorliegen. Nutzt 'spawn', damit keine Threads oder
+    DB-Verbindungen des Elternprozesses in die Worker geforkt werden."""
+    # Erst hier importieren, Web-Worker brauchen multiprocessing nicht
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        yield from executor.map(probe_audio_file, paths, chunksize=8)
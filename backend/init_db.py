@@ -2,7 +2,7 @@ import os
 import sys
 from pathlib import Path
 
-from app import app, db, init_database
+from app import create_app
 
 def check_and_init():
 
@@ -19,11 +19,14 @@ def check_and_init():
     except:
         pass  # Windows unterstützt chmod nicht
 
-    # Initialisiere Datenbank wenn sie nicht existiert
+    # create_app legt fehlende Tabellen, Spalten und Indizes an, auch in
+    # einer bestehenden Datenbank
     if not db_path.exists():
         print("Initialisiere neue Datenbank...")
-        with app.app_context():
-            db.create_all()
-            print("Datenbank erfolgreich erstellt!")
     else:
-        print("Datenbank existiert bereits.")
+        print("Datenbank existiert bereits, prüfe Schema...")
+    create_app()
+
+
+if __name__ == '__main__':
+    check_and_init()
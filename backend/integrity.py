@@ -0,0 +1,124 @@
+import os
+import subprocess
+import time
+
+from blob_store import file_digest
+from clip_engine import FFMPEG_BINARY
+
+# Zeitlimit für das vollständige Dekodieren einer Datei
+DECODE_TIMEOUT = 300
+# Höchstens so viele Zeichen der ffmpeg-Fehlerausgabe landen im Bericht
+_MAX_ERROR_LENGTH = 300
+
+# Kategorien des Berichts in Ausgabereihenfolge
+REPORT_CATEGORIES = (
+    'missing_audio',
+    'corrupt_audio',
+    'stale_covers',
+    'stale_clips',
+    'orphan_folders',
+    'orphan_blobs',
+    'stale_files',
+    'refcount_drift',
+)
+
+
+def check_file(path, expected_digest=None):
+    """Stat und optional SHA-256 einer Datei, läuft im Thread-Pool.
+    ``digest_ok`` ist None, wenn nicht gehasht wurde."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {'path': path, 'exists': False, 'size': 0, 'mtime': 0.0, 'digest_ok': None}
+    digest_ok = None
+    if expected_digest:
+        try:
+            digest_ok = file_digest(path) == expected_digest
+        except OSError:
+            digest_ok = False
+    return {'path': path, 'exists': True, 'size': st.st_size, 'mtime': st.st_mtime, 'digest_ok': digest_ok}
+
+
+def decode_audio(path):
+    """Dekodiert die Datei vollständig ohne Ausgabe, läuft im Prozess-Pool.
+    Liefert (Pfad, Fehlermeldung oder None)."""
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-hide_banner', '-v', 'error', '-xerror',
+        '-i', path, '-map', '0:a:0', '-f', 'null', '-',
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=DECODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return path, 'Zeitlimit beim Dekodieren überschritten'
+    except OSError as e:
+        return path, f'ffmpeg nicht ausführbar: {e}'
+    if result.returncode != 0:
+        # Die erste Meldung nennt die Ursache, danach folgen Folgefehler
+        lines = result.stderr.strip().splitlines()
+        return path, (lines[0] if lines else f'ffmpeg beendet mit Code {result.returncode}')[:_MAX_ERROR_LENGTH]
+    return path, None
+
+
+def list_folders(root, skip=()):
+    # Unterordner der ersten Ebene, z.B. alte Song-Ordner in uploads/
+    skip = {os.path.abspath(path) for path in skip}
+    folders = []
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False) and os.path.abspath(entry.path) not in skip:
+                folders.append(entry.path)
+    return folders
+
+
+def older_than(mtime, seconds, now=None):
+    return (now or time.time()) - mtime > seconds
+
+
+class IntegrityReport:
+    """Befunde des Scans, pro Kategorie eine Liste von Einträgen mit
+    mindestens ``path`` oder ``song_id`` und einem ``reason``. ``repaired``
+    zählt, was mit --repair behoben wurde."""
+
+    def __init__(self):
+        self.findings = {category: [] for category in REPORT_CATEGORIES}
+        self.repaired = {category: 0 for category in REPORT_CATEGORIES}
+        self.checked = {'songs': 0, 'files': 0, 'decoded': 0}
+        self.playable = 0
+        self.started = time.monotonic()
+        self.duration = None
+
+    def add(self, category, reason, **details):
+        self.findings[category].append({'reason': reason, **details})
+
+    def finish(self):
+        self.duration = round(time.monotonic() - self.started, 2)
+
+    def total(self):
+        return sum(len(entries) for entries in self.findings.values())
+
+    def as_dict(self):
+        return {
+            'checked': self.checked,
+            'playable': self.playable,
+            'duration_seconds': self.duration,
+            'findings': self.findings,
+            'repaired': self.repaired,
+        }
+
+    def summary_lines(self):
+        lines = [
+            f"{self.checked['songs']} Songs, {self.checked['files']} Dateien geprüft, "
+            f"{self.checked['decoded']} Audio-Dateien dekodiert, {self.playable} spielbar ({self.duration}s)"
+        ]
+        for category in REPORT_CATEGORIES:
+            entries = self.findings[category]
+            if not entries:
+                continue
+            repaired = f", {self.repaired[category]} behoben" if self.repaired[category] else ''
+            lines.append(f"{category}: {len(entries)}{repaired}")
+            for entry in entries[:10]:
+                target = entry.get('path') or f"Song {entry.get('song_id') or entry.get('song_ids')}"
+                lines.append(f"  {target}: {entry['reason']}")
+            if len(entries) > 10:
+                lines.append(f"  ... {len(entries) - 10} weitere")
+        return lines
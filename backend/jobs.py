@@ -0,0 +1,63 @@
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from locks import lock_name, try_lock
+
+
+class JobQueue:
+    """Kleine Hintergrund-Warteschlange für Arbeit außerhalb des Request-Pfads.
+
+    Jobs mit gleichem Schlüssel werden nur einmal eingereiht, solange einer
+    noch wartet oder läuft. ``context_factory`` liefert z.B. ``app.app_context``, damit
+    Jobs auf die Datenbank zugreifen können. Mit ``lock_dir`` gilt das auch
+    über mehrere Worker-Prozesse: läuft derselbe Job schon in einem anderen
+    Prozess, wird er hier übersprungen.
+    """
+
+    def __init__(self, max_workers=1, context_factory=None, name='jobs', lock_dir=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._context_factory = context_factory
+        self._lock_dir = lock_dir
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        return self._executor.submit(self._run, key, fn, args, kwargs)
+
+    def _run(self, key, fn, args, kwargs):
+        try:
+            if not self._lock_dir:
+                return self._call(fn, args, kwargs)
+            with try_lock(os.path.join(self._lock_dir, f'{lock_name(key)}.lock')) as acquired:
+                if not acquired:
+                    return None
+                return self._call(fn, args, kwargs)
+        except Exception as e:
+            print(f"Fehler im Hintergrund-Job {key}: {e}")
+            traceback.print_exc()
+            raise
+        finally:
+            # Erst nach Abschluss freigeben, sonst startet derselbe Job doppelt
+            with self._lock:
+                self._pending.discard(key)
+
+    def _call(self, fn, args, kwargs):
+        if self._context_factory:
+            with self._context_factory():
+                return fn(*args, **kwargs)
+        return fn(*args, **kwargs)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
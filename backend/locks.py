@@ -0,0 +1,48 @@
+import fcntl
+import os
+import re
+from contextlib import contextmanager
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def lock_name(key):
+    # ('clips', 12) -> "clips-12"
+    parts = key if isinstance(key, tuple) else (key,)
+    return _UNSAFE.sub('_', '-'.join(str(part) for part in parts))
+
+
+@contextmanager
+def try_lock(path):
+    """Nicht blockierende Sperre über Prozessgrenzen hinweg (flock).
+
+    Liefert True, wenn die Sperre gehalten wird, sonst False. Der Kernel gibt
+    die Sperre auch dann frei, wenn der Prozess abstürzt.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def hold_lock(path):
+    # Blockierende Variante, z.B. damit nur ein Prozess gleichzeitig das Schema anlegt
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,149 @@
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from flask import Response, request
+
+from metrics import metrics
+
+# Clips und versionierte Cover-URLs ändern ihren Inhalt nie
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Inhalt kann sich unter derselben URL ändern: immer per ETag revalidieren
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+_CHUNK_SIZE = 64 * 1024
+_ETAG_CACHE_LIMIT = 10000
+_etag_cache = {}
+_etag_lock = threading.Lock()
+
+
+def content_etag(path, st=None):
+    """Starker ETag aus dem SHA-256 des Dateiinhalts.
+
+    Das Ergebnis wird pro Pfad zusammen mit inode, Größe und mtime gemerkt,
+    damit die Datei nur nach einer Änderung erneut gehasht wird.
+    """
+    st = st or os.stat(path)
+    stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+    cached = _etag_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+
+    with _etag_lock:
+        if len(_etag_cache) >= _ETAG_CACHE_LIMIT:
+            _etag_cache.clear()
+        _etag_cache[path] = (stamp, etag)
+    return etag
+
+
+def _observe_serving(started):
+    metrics.observe('spordle_stage_duration_seconds', time.perf_counter() - started, stage='file_serving')
+
+
+class _TimedFile:
+    """Reicht alle Zugriffe an die Datei durch und misst beim Schließen die
+    Dauer seit Beginn der Anfrage. gunicorn ruft close() nach dem sendfile
+    auf, braucht aber nur fileno()/seek()/tell() und bleibt so beim sendfile."""
+
+    def __init__(self, f, started):
+        self._f = f
+        self._started = started
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            _observe_serving(self._started)
+        self._f.close()
+
+
+def _read_range(f, length):
+    try:
+        while length > 0:
+            chunk = f.read(min(_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _range_allowed(etag, st):
+    # If-Range: Teilantwort nur, wenn der Client noch dieselbe Version hat
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return int(st.st_mtime) <= int(if_range.date.timestamp())
+    return True
+
+
+def send_media(path, mimetype=None, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Liefert eine Datei mit ETag, If-None-Match/304 und Range/206 aus.
+
+    Der Body ist das geöffnete File-Objekt hinter ``wsgi.file_wrapper``;
+    gunicorn überträgt es per sendfile, bei Range-Anfragen ab dem
+    gesetzten Offset mit der Content-Length als Länge. Gemessen wird bis
+    die Übertragung abgeschlossen und die Datei geschlossen ist.
+    """
+    started = time.perf_counter()
+    st = os.stat(path)
+    etag = content_etag(path, st)
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    headers = {
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        _observe_serving(started)
+        return response
+
+    size = st.st_size
+    start, length, status = 0, size, 200
+    # Mehrere Bereiche (multipart/byteranges) werden nicht unterstützt und
+    # wie eine Anfrage ohne Range mit der ganzen Datei beantwortet
+    if request.range and len(request.range.ranges) == 1 and _range_allowed(etag, st):
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            response = Response(status=416, headers=headers)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            response.set_etag(etag)
+            _observe_serving(started)
+            return response
+        start, stop = byte_range
+        length = stop - start
+        status = 206
+        headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+    f = _TimedFile(open(path, 'rb'), started)
+    if start:
+        f.seek(start)
+
+    file_wrapper = request.environ.get('wsgi.file_wrapper')
+    if file_wrapper is not None:
+        # Der Server begrenzt die Ausgabe auf Content-Length
+        body = file_wrapper(f, _CHUNK_SIZE)
+    else:
+        body = _read_range(f, length)
+
+    response = Response(body, status=status, mimetype=mimetype, headers=headers, direct_passthrough=True)
+    response.content_length = length
+    response.last_modified = st.st_mtime
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,234 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Obergrenzen der Histogramm-Buckets in Sekunden
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Live-Werte (z.B. laufende Renderings) aus Dateien, die länger nicht geschrieben
+# wurden, gehören zu beendeten Workern und werden ignoriert
+LIVE_MAX_AGE = 60
+# Dateien beendeter Worker werden nach dieser Zeit gelöscht
+FILE_RETENTION = 7 * 24 * 60 * 60
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Zähler, Histogramme und Live-Werte im Prometheus-Textformat.
+
+    Jeder Worker-Prozess zählt im Speicher und schreibt seinen Stand aus
+    einem Hintergrund-Thread regelmäßig nach ``shared_dir``. ``collect``
+    summiert die Dateien aller Worker, sodass ``/metrics`` unabhängig davon
+    stimmt, welcher Worker die Anfrage bedient. Eine Messung kostet ein Lock
+    und eine binäre Suche.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._live = {}
+        self._shared_dir = None
+        self._flush_interval = 5
+        self._flusher = None
+        # gunicorn --preload forkt die Worker aus dem Master: ohne Reset
+        # würde jeder Worker dessen Messwerte in seiner Datei erneut melden
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._live = {}
+        self._flusher = None
+
+    def configure(self, shared_dir=None, flush_interval=5):
+        self._shared_dir = shared_dir
+        self._flush_interval = flush_interval
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Bucket-Zähler (nicht kumuliert), +Inf, Summe
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def add_live(self, name, delta, **labels):
+        # Gauge, den dieser Prozess selbst hält, z.B. laufende Renderings
+        key = _key(name, labels)
+        with self._lock:
+            self._live[key] = self._live.get(key, 0) + delta
+
+    def set_live(self, name, value, **labels):
+        with self._lock:
+            self._live[_key(name, labels)] = value
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('spordle_stage_duration_seconds', time.perf_counter() - started, stage=stage)
+
+    @contextmanager
+    def in_flight(self, name, **labels):
+        self.add_live(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.add_live(name, -1, **labels)
+
+    def _state(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+                'live': [[name, list(labels), value] for (name, labels), value in self._live.items()],
+            }
+
+    def _path(self):
+        return os.path.join(self._shared_dir, f'{os.getpid()}.json')
+
+    def flush(self):
+        if not self._shared_dir:
+            return
+        path = self._path()
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state(), f)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self):
+        # Erst beim ersten Request starten, damit CLI-Befehle keine Dateien schreiben
+        if not self._shared_dir or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Metriken konnten nicht geschrieben werden: {e}")
+
+    def collect(self):
+        """Summe über alle Worker: eigener Stand aus dem Speicher, die
+        anderen aus ihren Dateien."""
+        states = [self._state()]
+        if self._shared_dir:
+            own = self._path()
+            now = time.time()
+            for path in glob.glob(os.path.join(self._shared_dir, '*.json')):
+                if path == own:
+                    continue
+                try:
+                    age = now - os.path.getmtime(path)
+                    if age > FILE_RETENTION:
+                        os.remove(path)
+                        continue
+                    with open(path) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if age > LIVE_MAX_AGE:
+                    state['live'] = []
+                states.append(state)
+
+        counters, histograms, live = {}, {}, {}
+        for state in states:
+            for name, labels, value in state['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in state['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                current = histograms.get(key)
+                histograms[key] = values if current is None else [a + b for a, b in zip(current, values)]
+            for name, labels, value in state['live']:
+                key = (name, tuple(map(tuple, labels)))
+                live[key] = live.get(key, 0) + value
+        return counters, histograms, live
+
+    def counter_value(self, name, **labels):
+        counters, _, _ = self.collect()
+        return counters.get(_key(name, labels), 0)
+
+    def render(self, gauges=()):
+        """Prometheus-Textformat. ``gauges`` sind zusätzliche (Name, Labels, Wert),
+        die beim Abruf berechnet werden, z.B. Plattenbelegung."""
+        counters, histograms, live = self.collect()
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for (name, labels), value in live.items():
+            families.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for name, labels, value in gauges:
+            families.setdefault(name, []).append(
+                f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}'
+            )
+        for (name, labels), values in histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            cumulative += values[len(self.buckets)]
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+        output = []
+        for name in sorted(families):
+            kind, text = self._help.get(name, ('untyped', ''))
+            if text:
+                output.append(f'# HELP {name} {text}')
+            output.append(f'# TYPE {name} {kind}')
+            output.extend(sorted(families[name]))
+        return '\n'.join(output) + '\n'
+
+
+metrics = Metrics()
+metrics.describe('spordle_request_duration_seconds', 'histogram', 'Dauer der HTTP-Anfragen bis zur Antwort')
+metrics.describe('spordle_stage_duration_seconds', 'histogram', 'Dauer einzelner Arbeitsschritte')
+metrics.describe('spordle_renders_in_flight', 'gauge', 'Laufende Clip-Renderings')
@@ -0,0 +1,98 @@
+import os
+import random
+import time
+
+# Versuche, bevor draw() bei fast vollständig ausgeschlossenem Katalog linear sucht
+_MAX_REJECTIONS = 16
+
+
+def _is_playable(song):
+    if not song.audio_path or song.playable is False:
+        return False
+    return song.playable or os.path.exists(song.audio_path)
+
+
+class AliasTable:
+    """Gewichtete Ziehung in O(1) nach Vose: eine Zufallszahl wählt eine
+    Spalte, eine zweite entscheidet zwischen der Spalte und ihrem Alias.
+    Der Aufbau ist O(n)."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError('Mindestens ein Gewicht muss positiv sein')
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Reste sind durch Rundung ~1.0
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class SongSampler:
+    """Zieht zufällige spielbare Songs in O(1).
+
+    Beim Aufbau (nach jeder Katalogänderung) wird einmal geprüft, welche
+    Songs spielbar sind: das ``playable``-Flag aus scan-library gilt
+    unbesehen, nur ungeprüfte Songs kosten ein os.path.exists. Die Ziehung
+    selbst greift nicht auf das Dateisystem zu. ``weight(song)`` liefert optional ein
+    Gewicht pro Song, gezogen wird dann über eine AliasTable. Songs, deren
+    Datei sich später als kaputt herausstellt, werden mit
+    ``mark_unplayable`` bis zum nächsten Aufbau übersprungen.
+    """
+
+    def __init__(self, songs, weight=None, version=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        playable = [song for song in songs if _is_playable(song)]
+        weights = [weight(song) for song in playable] if weight else None
+        if weights is not None:
+            # Songs mit Gewicht 0 (z.B. Genre-Quote 0) gar nicht erst aufnehmen
+            playable = [song for song, w in zip(playable, weights) if w > 0]
+            weights = [w for w in weights if w > 0]
+        self.songs = tuple(playable)
+        self.ids = frozenset(song.id for song in self.songs)
+        self._table = AliasTable(weights) if weights and len(set(weights)) > 1 else None
+        self._unplayable = set()
+
+    def __len__(self):
+        return len(self.songs)
+
+    def mark_unplayable(self, song_id):
+        self._unplayable.add(song_id)
+
+    def playable(self):
+        return [song for song in self.songs if song.id not in self._unplayable]
+
+    def draw(self, exclude=(), rng=random):
+        """Ein Song, der nicht in ``exclude`` liegt (z.B. die zuletzt
+        gespielten). Sind fast alle ausgeschlossen, wird unter den übrigen
+        gleichverteilt gewählt, notfalls ohne Ausschluss."""
+        if not self.songs:
+            return None
+        for _ in range(_MAX_REJECTIONS):
+            index = self._table.draw(rng) if self._table else rng.randrange(len(self.songs))
+            song = self.songs[index]
+            if song.id not in exclude and song.id not in self._unplayable:
+                return song
+        candidates = self.playable()
+        remaining = [song for song in candidates if song.id not in exclude]
+        if remaining or candidates:
+            return rng.choice(remaining or candidates)
+        return None
@@ -0,0 +1,162 @@
+from collections import namedtuple
+
+CORRECT = 'correct'
+PARTIAL = 'partial'
+WRONG = 'wrong'
+UNKNOWN = 'Unbekannt'
+
+# Status pro Vergleichsfeld für Batch-Auswertungen
+FieldStatus = namedtuple('FieldStatus', ['artist', 'year', 'genre', 'type', 'length'])
+
+
+def _mask(values, vocabulary):
+    mask = 0
+    for value in values:
+        bit = vocabulary.get(value)
+        if bit is None:
+            bit = vocabulary[value] = 1 << len(vocabulary)
+        mask |= bit
+    return mask
+
+
+def _direction(guess, target):
+    if guess and target and guess < target:
+        return 'up'
+    if guess and target and guess > target:
+        return 'down'
+    return None
+
+
+def format_length(length):
+    return f"{length//60}:{length%60:02d}" if length else UNKNOWN
+
+
+class FeatureTable:
+    """Vorberechnete Vergleichsmerkmale aller Songs, spaltenweise abgelegt.
+
+    Genres und Typen werden als Bitmasken über ein gemeinsames Vokabular
+    gespeichert, ein Teiltreffer ist dann ein einzelnes ``&``. Der Typ hat
+    zwei Masken, weil die Zielseite historisch ungetrimmt verglichen wird.
+    """
+
+    def __init__(self, songs):
+        self.genre_vocabulary = {}
+        self.type_vocabulary = {}
+        self.rows = {}
+        self.ids = []
+        self.artist = []
+        self.artist_lower = []
+        self.artist_words = []
+        self.year = []
+        self.genre = []
+        self.genre_mask = []
+        self.type = []
+        self.type_guess_mask = []
+        self.type_target_mask = []
+        self.length = []
+        for song in songs:
+            self.rows[song.id] = len(self.ids)
+            self.ids.append(song.id)
+            self.artist.append(song.artist)
+            self.artist_lower.append(song.artist.lower() if song.artist else '')
+            self.artist_words.append(tuple(
+                word.lower() for word in (song.artist or '').split() if len(word) > 2
+            ))
+            self.year.append(song.year)
+            self.genre.append(song.genre)
+            self.genre_mask.append(_mask(
+                (g.strip().lower() for g in song.genre.split(',')) if song.genre else (), self.genre_vocabulary
+            ))
+            self.type.append(song.type)
+            self.type_guess_mask.append(_mask(
+                (t.strip() for t in song.type.split(', ')) if song.type else (), self.type_vocabulary
+            ))
+            self.type_target_mask.append(_mask(
+                song.type.split(', ') if song.type else (), self.type_vocabulary
+            ))
+            self.length.append(song.length)
+
+    def __contains__(self, song_id):
+        return song_id in self.rows
+
+    def _artist_status(self, g, t):
+        if self.artist[g] == self.artist[t]:
+            return CORRECT
+        if self.artist[g] and self.artist[t] and (
+                any(word in self.artist_lower[t] for word in self.artist_words[g]) or
+                any(word in self.artist_lower[g] for word in self.artist_words[t])):
+            return PARTIAL
+        return WRONG
+
+    def _set_status(self, raw, guess_masks, target_masks, g, t):
+        if raw[g] == raw[t]:
+            return CORRECT
+        if raw[g] and raw[t] and guess_masks[g] & target_masks[t]:
+            return PARTIAL
+        return WRONG
+
+    def compare(self, guess_id, target_id):
+        # Vergleich eines Rateversuchs mit dem Ziel-Song, Format der Guess-Antwort
+        g, t = self.rows[guess_id], self.rows[target_id]
+        return {
+            'artist': {
+                'value': self.artist[g] or UNKNOWN,
+                'status': self._artist_status(g, t),
+            },
+            'year': {
+                'value': self.year[g] or UNKNOWN,
+                'status': CORRECT if self.year[g] == self.year[t] else WRONG,
+                'direction': _direction(self.year[g], self.year[t]),
+            },
+            'genre': {
+                'value': self.genre[g] or UNKNOWN,
+                'status': self._set_status(self.genre, self.genre_mask, self.genre_mask, g, t),
+            },
+            'type': {
+                'value': self.type[g] or UNKNOWN,
+                'status': self._set_status(self.type, self.type_guess_mask, self.type_target_mask, g, t),
+            },
+            'length': {
+                'value': format_length(self.length[g]),
+                'status': CORRECT if self.length[g] == self.length[t] else WRONG,
+                'direction': _direction(self.length[g], self.length[t]),
+            },
+        }
+
+    def score_batch(self, candidate_ids, target_id):
+        """Bewertet viele Kandidaten gegen ein Ziel, z.B. für Hinweise oder Bots.
+
+        Die Spalten sind normale Python-Listen, ausgewertet wird pro Spalte
+        mit einer Schleife über die Kandidaten; gespart werden nur die
+        Dict-Zugriffe pro Song und die Zerlegung von Genre und Typ. Der
+        Künstler-Status hängt nur vom Künstlernamen ab und wird pro Name
+        einmal berechnet. Ergebnis ist eine Liste von FieldStatus in
+        Eingabereihenfolge.
+        """
+        t = self.rows[target_id]
+        rows = [self.rows[song_id] for song_id in candidate_ids]
+
+        year_t, length_t = self.year[t], self.length[t]
+        genre_t, genre_mask_t = self.genre[t], self.genre_mask[t]
+        type_t, type_mask_t = self.type[t], self.type_target_mask[t]
+
+        artist_status = {}
+        artist = []
+        for g in rows:
+            status = artist_status.get(self.artist[g])
+            if status is None:
+                status = artist_status[self.artist[g]] = self._artist_status(g, t)
+            artist.append(status)
+        year = [CORRECT if self.year[g] == year_t else WRONG for g in rows]
+        length = [CORRECT if self.length[g] == length_t else WRONG for g in rows]
+        genre = [
+            CORRECT if self.genre[g] == genre_t else
+            PARTIAL if self.genre[g] and genre_t and self.genre_mask[g] & genre_mask_t else WRONG
+            for g in rows
+        ]
+        types = [
+            CORRECT if self.type[g] == type_t else
+            PARTIAL if self.type[g] and type_t and self.type_guess_mask[g] & type_mask_t else WRONG
+            for g in rows
+        ]
+        return [FieldStatus(*statuses) for statuses in zip(artist, year, genre, types, length)]
@@ -0,0 +1,123 @@
+import bisect
+import threading
+from collections import OrderedDict, defaultdict
+
+from title_index import normalize_title, trigrams
+
+# Rangstufen, kleiner ist besser
+RANK_EXACT_TITLE = 0
+RANK_TITLE_PREFIX = 1
+RANK_TITLE_WORD = 2
+RANK_ARTIST_WORD = 3
+RANK_FUZZY = 4
+
+# Obergrenze gescannter Einträge pro Präfixbereich, hält kurze Anfragen wie "a" billig
+MAX_PREFIX_SCAN = 256
+FUZZY_MIN_SCORE = 0.3
+FUZZY_MIN_LENGTH = 3
+QUERY_CACHE_SIZE = 2048
+
+
+class SearchIndex:
+    """Autovervollständigung über Titel und Künstler.
+
+    Präfixe werden per binärer Suche in sortierten Listen gefunden (ganzer
+    Titel sowie einzelne Wörter von Titel und Künstler). Die Stufen werden
+    der Reihe nach abgearbeitet, bis genug Treffer vorliegen; erst dann
+    ergänzt eine Trigramm-Suche über die Titel. Ergebnisse werden pro
+    normalisierter Anfrage in einem LRU-Cache gehalten.
+    """
+
+    def __init__(self, songs):
+        self._songs = list(songs)
+        self._titles = [normalize_title(song.title) for song in self._songs]
+        title_words = []
+        artist_words = []
+        self._tokens = []
+        self._gram_counts = []
+        postings = defaultdict(list)
+        for position, song in enumerate(self._songs):
+            title_tokens = self._titles[position].split()
+            artist_tokens = normalize_title(song.artist).split()
+            self._tokens.append(frozenset(title_tokens) | frozenset(artist_tokens))
+            for token in set(title_tokens):
+                title_words.append((token, position))
+            for token in set(artist_tokens):
+                artist_words.append((token, position))
+            grams = trigrams(self._titles[position])
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        self._title_keys = sorted((title, position) for position, title in enumerate(self._titles) if title)
+        self._title_words = sorted(title_words)
+        self._artist_words = sorted(artist_words)
+        self._postings = dict(postings)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def _prefix_range(entries, prefix):
+        start = bisect.bisect_left(entries, (prefix,))
+        end = start
+        limit = min(len(entries), start + MAX_PREFIX_SCAN)
+        while end < limit and entries[end][0].startswith(prefix):
+            end += 1
+        return entries[start:end]
+
+    def _matches_all(self, position, leading_tokens):
+        # Alle Wörter vor dem letzten müssen als Wortpräfix vorkommen
+        tokens = self._tokens[position]
+        return all(any(token.startswith(word) for token in tokens) for word in leading_tokens)
+
+    def search(self, query, limit=10):
+        key = normalize_title(query)
+        if not key:
+            return []
+        cache_key = (key, limit)
+        with self._cache_lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+
+        results = self._search(key, limit)
+
+        with self._cache_lock:
+            self._cache[cache_key] = results
+            if len(self._cache) > QUERY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return results
+
+    def _search(self, key, limit):
+        ranked = {}
+
+        def offer(position, rank, score=0.0):
+            current = ranked.get(position)
+            if current is None or (rank, -score) < current:
+                ranked[position] = (rank, -score)
+
+        for title, position in self._prefix_range(self._title_keys, key):
+            offer(position, RANK_EXACT_TITLE if title == key else RANK_TITLE_PREFIX)
+
+        words = key.split()
+        leading, last = words[:-1], words[-1]
+        for rank, entries in ((RANK_TITLE_WORD, self._title_words), (RANK_ARTIST_WORD, self._artist_words)):
+            # Schlechtere Stufen können volle Ergebnislisten nicht mehr verbessern
+            if len(ranked) >= limit:
+                break
+            for _, position in self._prefix_range(entries, last):
+                if self._matches_all(position, leading):
+                    offer(position, rank)
+
+        if len(ranked) < limit and len(key) >= FUZZY_MIN_LENGTH:
+            grams = trigrams(key)
+            shared = defaultdict(int)
+            for gram in grams:
+                for position in self._postings.get(gram, ()):
+                    shared[position] += 1
+            for position, count in shared.items():
+                score = count / (len(grams) + self._gram_counts[position] - count)
+                if score >= FUZZY_MIN_SCORE:
+                    offer(position, RANK_FUZZY, score)
+
+        best = sorted(ranked.items(), key=lambda item: (item[1], len(self._titles[item[0]]), self._titles[item[0]]))
+        return [self._songs[position] for position, _ in best[:limit]]
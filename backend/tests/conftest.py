@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Backend-Module liegen flach in backend/, wie beim Start über gunicorn
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
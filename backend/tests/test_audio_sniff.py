@@ -0,0 +1,131 @@
+import io
+import struct
+
+from audio_sniff import FRAME_SEARCH_BYTES, sniff_audio_metadata
+
+# MPEG-1 Layer III, 128 kbit/s, 44,1 kHz, Stereo
+FRAME_HEADER = b'\xff\xfb\x90\x00'
+SIDE_INFO = 32
+SAMPLES_PER_FRAME = 1152
+
+
+def syncsafe(value):
+    return bytes((value >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def text_frame(frame_id, text, major=3):
+    body = b'\x03' + text.encode('utf-8') if major == 4 else b'\x00' + text.encode('latin-1')
+    size = syncsafe(len(body)) if major == 4 else struct.pack('>I', len(body))
+    return frame_id.encode('ascii') + size + b'\x00\x00' + body
+
+
+def picture_frame(size, major=3):
+    body = b'\x00image/jpeg\x00\x03\x00' + b'\xaa' * size
+    header_size = syncsafe(len(body)) if major == 4 else struct.pack('>I', len(body))
+    return b'APIC' + header_size + b'\x00\x00' + body
+
+
+def id3v2(frames, major=3, padding=64):
+    body = b''.join(frames) + b'\x00' * padding
+    return b'ID3' + bytes((major, 0, 0)) + syncsafe(len(body)) + body
+
+
+def mpeg_frame(payload=b''):
+    frame = FRAME_HEADER + b'\x00' * SIDE_INFO + payload
+    # Framegröße bei 128 kbit/s und 44,1 kHz ohne Padding
+    return frame + b'\x00' * (417 - len(frame))
+
+
+def xing_frame(frames, tag=b'Xing'):
+    return mpeg_frame(tag + struct.pack('>II', 0x01, frames))
+
+
+def vbri_frame(frames):
+    # VBRI liegt 32 Bytes nach dem Frame-Header, unabhängig von der Side-Info:
+    # Version, Verzögerung, Qualität, Bytes, Frames
+    payload = b'VBRI' + struct.pack('>HHHII', 1, 0, 75, 0, frames)
+    frame = FRAME_HEADER + b'\x00' * 32 + payload
+    return frame + b'\x00' * (417 - len(frame))
+
+
+def duration_ms(frames):
+    return frames * SAMPLES_PER_FRAME * 1000 // 44100
+
+
+def sniff(data, total_size=None):
+    return sniff_audio_metadata(io.BytesIO(data), total_size)
+
+
+def test_id3v23_text_frames_and_cover():
+    tag = id3v2([
+        text_frame('TIT2', 'Chandelier'),
+        picture_frame(200 * 1024),
+        text_frame('TPE1', 'Sia'),
+        text_frame('TYER', '2014'),
+    ])
+    result = sniff(tag + xing_frame(1000))
+    assert result == {
+        'title': 'Chandelier',
+        'artist': 'Sia',
+        'year': 2014,
+        'duration_ms': duration_ms(1000),
+        'has_cover': True,
+    }
+
+
+def test_id3v24_utf8_and_recording_date():
+    tag = id3v2([
+        text_frame('TIT2', 'Señorita', major=4),
+        text_frame('TPE1', 'Shawn Mendes\x00Camila Cabello', major=4),
+        text_frame('TDRC', '2019-06-21', major=4),
+    ], major=4)
+    result = sniff(tag + xing_frame(500))
+    assert result['title'] == 'Señorita'
+    assert result['artist'] == 'Shawn Mendes'
+    assert result['year'] == 2019
+    assert result['has_cover'] is False
+
+
+def test_cover_data_is_skipped_not_buffered():
+    # Das Cover ist größer als das Suchfenster, trotzdem wird der Frame danach gefunden
+    tag = id3v2([picture_frame(FRAME_SEARCH_BYTES * 3), text_frame('TIT2', 'Hinter dem Cover')])
+    result = sniff(tag + xing_frame(100))
+    assert result['title'] == 'Hinter dem Cover'
+    assert result['duration_ms'] == duration_ms(100)
+
+
+def test_stream_is_not_read_past_search_window():
+    audio = xing_frame(100) + b'\x00' * (FRAME_SEARCH_BYTES * 4)
+    stream = io.BytesIO(id3v2([text_frame('TIT2', 'x')]) + audio)
+    sniff_audio_metadata(stream)
+    assert stream.tell() < len(stream.getvalue())
+
+
+def test_xing_and_info_headers():
+    assert sniff(xing_frame(2500))['duration_ms'] == duration_ms(2500)
+    assert sniff(xing_frame(2500, tag=b'Info'))['duration_ms'] == duration_ms(2500)
+
+
+def test_vbri_header():
+    assert sniff(vbri_frame(3000))['duration_ms'] == duration_ms(3000)
+
+
+def test_cbr_estimate_from_file_size():
+    tag = id3v2([text_frame('TIT2', 'CBR')])
+    audio = mpeg_frame() * 100
+    data = tag + audio
+    # 128 kbit/s = 16000 Bytes pro Sekunde, der Tag zählt nicht mit
+    assert sniff(data, total_size=len(data))['duration_ms'] == len(audio) * 1000 // 16000
+
+
+def test_cbr_without_size_has_no_duration():
+    assert sniff(mpeg_frame() * 10)['duration_ms'] is None
+
+
+def test_tlen_is_used_without_mpeg_frame():
+    result = sniff(id3v2([text_frame('TLEN', '215000')]) + b'OggS' + b'\x00' * 100)
+    assert result['duration_ms'] == 215000
+
+
+def test_garbage_before_first_frame():
+    assert sniff(b'\x00' * 37 + xing_frame(10))['duration_ms'] == duration_ms(10)
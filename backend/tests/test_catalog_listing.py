@@ -0,0 +1,108 @@
+import json
+from collections import namedtuple
+
+import pytest
+
+from catalog_listing import MAX_LIMIT, CatalogListing, ListingQuery, LISTING_FIELDS
+
+Song = namedtuple('Song', ['id', 'title', 'artist', 'year', 'genre', 'type', 'length',
+                           'audio_path', 'cover_path', 'hint1', 'hint2'])
+
+DEFAULT_FIELDS = ('id', 'title', 'artist')
+
+
+def make_songs(count):
+    return [
+        Song(
+            id=song_id,
+            title=f'Song {song_id % 7}',
+            artist=['ABBA', 'Queen', None][song_id % 3],
+            year=[None, 1980, 1990, 2000][song_id % 4],
+            genre=['Pop', 'Rock, Pop', None][song_id % 3],
+            type='Single',
+            length=180,
+            audio_path='a.mp3',
+            cover_path=None,
+            hint1=None,
+            hint2=None,
+        )
+        for song_id in range(1, count + 1)
+    ]
+
+
+def query(**args):
+    return ListingQuery(args, LISTING_FIELDS, DEFAULT_FIELDS)
+
+
+def page_ids(listing, **args):
+    page, _ = listing.page(query(**args))
+    return [row['id'] for row in json.loads(page.body)], page.next_cursor
+
+
+def walk(listing, **args):
+    ids, cursor, pages = [], None, 0
+    while True:
+        extra = {'cursor': cursor} if cursor else {}
+        page, cursor = page_ids(listing, **args, **extra)
+        ids += page
+        pages += 1
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize('sort', ['id', 'title', '-title', 'artist', 'year', '-year'])
+def test_cursor_round_trip_visits_every_song_once(sort):
+    songs = make_songs(50)
+    listing = CatalogListing(songs)
+    everything, _ = page_ids(listing, sort=sort)
+    ids, pages = walk(listing, sort=sort, limit='7')
+    assert ids == everything
+    assert sorted(ids) == [song.id for song in songs]
+    assert pages == 8
+
+
+def test_cursor_round_trip_with_filter():
+    listing = CatalogListing(make_songs(50))
+    ids, _ = walk(listing, artist='queen', limit='4', sort='-year')
+    everything, _ = page_ids(listing, artist='queen', sort='-year')
+    assert ids == everything
+    assert ids and all(song_id % 3 == 1 for song_id in ids)
+
+
+def test_cursor_stays_valid_after_catalog_change():
+    songs = make_songs(20)
+    first, cursor = page_ids(CatalogListing(songs), limit='5')
+    # Ein neuer Song vor dem Cursor verschiebt die folgende Seite nicht
+    changed = CatalogListing([songs[0]._replace(id=0)] + songs)
+    second, _ = page_ids(changed, limit='5', cursor=cursor)
+    assert second == [6, 7, 8, 9, 10]
+
+
+def test_without_limit_and_cursor_the_whole_catalog_is_returned():
+    listing = CatalogListing(make_songs(MAX_LIMIT + 20))
+    ids, cursor = page_ids(listing, fields='id')
+    assert len(ids) == MAX_LIMIT + 20
+    assert cursor is None
+
+
+def test_cursor_without_limit_uses_max_limit():
+    listing = CatalogListing(make_songs(MAX_LIMIT + 20))
+    _, cursor = page_ids(listing, limit='10')
+    ids, next_cursor = page_ids(listing, cursor=cursor)
+    assert len(ids) == MAX_LIMIT
+    assert next_cursor is not None
+
+
+def test_invalid_cursors_are_rejected():
+    listing = CatalogListing(make_songs(20))
+    with pytest.raises(ValueError):
+        query(cursor='not-a-cursor')
+    _, title_cursor = page_ids(listing, sort='title', limit='5')
+    with pytest.raises(ValueError):
+        listing.page(query(sort='year', cursor=title_cursor))
+
+
+def test_invalid_parameters_are_rejected():
+    for args in ({'limit': 'x'}, {'fields': 'id,password'}, {'sort': 'plays'}, {'year': 'neunzehn'}):
+        with pytest.raises(ValueError):
+            query(**args)
@@ -0,0 +1,109 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from chunked_uploads import UploadError, UploadStore
+
+DATA = os.urandom(300 * 1024 + 17)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'uploads'), max_bytes=1024 * 1024)
+
+
+def send(store, upload_id, offset, chunk, length=None):
+    return store.append(upload_id, offset, io.BytesIO(chunk), len(chunk) if length is None else length)
+
+
+def test_upload_in_chunks_and_finalize(store, tmp_path):
+    info = store.create('song.mp3', len(DATA), SHA256)
+    offset = 0
+    for start in range(0, len(DATA), 100 * 1024):
+        offset = send(store, info['upload_id'], offset, DATA[start:start + 100 * 1024])
+    assert offset == len(DATA)
+
+    target = tmp_path / 'song.mp3'
+    assert store.finalize(info['upload_id'], str(target)) == SHA256
+    assert target.read_bytes() == DATA
+    assert os.listdir(store.root) == []
+
+
+def test_resume_after_interrupted_chunk(store, tmp_path):
+    upload_id = store.create('song.mp3', len(DATA), SHA256)['upload_id']
+    send(store, upload_id, 0, DATA[:1000])
+
+    # Verbindung bricht mitten im zweiten Chunk ab: der gelesene Teil bleibt
+    send(store, upload_id, 1000, DATA[1000:1500], length=len(DATA) - 1000)
+    assert store.status(upload_id)['offset'] == 1500
+
+    # Wiederholen ab dem alten Offset wird mit dem tatsächlichen Stand abgelehnt
+    with pytest.raises(UploadError) as error:
+        send(store, upload_id, 1000, DATA[1000:])
+    assert error.value.status == 409
+    assert error.value.offset == 1500
+
+    send(store, upload_id, 1500, DATA[1500:])
+    assert store.finalize(upload_id, str(tmp_path / 'song.mp3')) == SHA256
+
+
+def test_resume_in_another_process_recomputes_hash(store, tmp_path):
+    upload_id = store.create('song.mp3', len(DATA), SHA256)['upload_id']
+    send(store, upload_id, 0, DATA[:5000])
+
+    # Eine zweite Instanz auf demselben Ordner steht für einen anderen Worker
+    other = UploadStore(store.root)
+    send(other, upload_id, 5000, DATA[5000:])
+    assert other.finalize(upload_id, str(tmp_path / 'song.mp3')) == SHA256
+
+
+def test_checksum_mismatch_discards_upload(store, tmp_path):
+    upload_id = store.create('song.mp3', len(DATA), hashlib.sha256(b'anders').hexdigest())['upload_id']
+    send(store, upload_id, 0, DATA)
+    with pytest.raises(UploadError) as error:
+        store.finalize(upload_id, str(tmp_path / 'song.mp3'))
+    assert error.value.status == 422
+    assert not (tmp_path / 'song.mp3').exists()
+    with pytest.raises(UploadError) as error:
+        store.status(upload_id)
+    assert error.value.status == 404
+
+
+def test_finalize_incomplete_upload(store, tmp_path):
+    upload_id = store.create('song.mp3', len(DATA))['upload_id']
+    send(store, upload_id, 0, DATA[:100])
+    with pytest.raises(UploadError) as error:
+        store.finalize(upload_id, str(tmp_path / 'song.mp3'))
+    assert error.value.status == 409
+    assert error.value.offset == 100
+
+
+def test_chunk_beyond_announced_size(store):
+    upload_id = store.create('song.mp3', 10)['upload_id']
+    with pytest.raises(UploadError):
+        send(store, upload_id, 0, b'x' * 11)
+
+
+def test_size_limits(store):
+    with pytest.raises(UploadError) as error:
+        store.create('song.mp3', 2 * 1024 * 1024)
+    assert error.value.status == 413
+    assert store.create('library.zip', 2 * 1024 * 1024, max_bytes=4 * 1024 * 1024)['offset'] == 0
+    with pytest.raises(UploadError):
+        store.create('empty.mp3', 0)
+
+
+def test_invalid_upload_id(store):
+    with pytest.raises(UploadError) as error:
+        store.status('../../etc/passwd')
+    assert error.value.status == 404
+
+
+def test_purge_expired(store):
+    upload_id = store.create('song.mp3', 10)['upload_id']
+    assert store.purge_expired(now=os.path.getmtime(os.path.join(store.root, f'{upload_id}.part')) + store.max_age + 1) == 1
+    with pytest.raises(UploadError):
+        store.status(upload_id)
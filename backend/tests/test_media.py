@@ -0,0 +1,88 @@
+import pytest
+from flask import Flask
+
+from media import IMMUTABLE_CACHE_CONTROL, send_media
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / 'clip.mp3'
+    path.write_bytes(CONTENT)
+    app = Flask(__name__)
+
+    @app.route('/clip')
+    def clip():
+        return send_media(str(path), 'audio/mpeg', IMMUTABLE_CACHE_CONTROL)
+
+    client = app.test_client()
+    client.path = path
+    return client
+
+
+def test_full_response_with_etag(client):
+    response = client.get('/clip')
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.content_length == len(CONTENT)
+    assert response.mimetype == 'audio/mpeg'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response.get_etag()[0]
+
+
+def test_etag_follows_content(client):
+    etag = client.get('/clip').get_etag()[0]
+    client.path.write_bytes(CONTENT[::-1])
+    assert client.get('/clip').get_etag()[0] != etag
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get('/clip').get_etag()[0]
+    response = client.get('/clip', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag()[0] == etag
+
+    response = client.get('/clip', headers={'If-None-Match': '"anders"'})
+    assert response.status_code == 200
+
+
+def test_range_returns_206(client):
+    response = client.get('/clip', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[100:200]
+    assert response.content_length == 100
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+
+
+def test_open_and_suffix_ranges(client):
+    response = client.get('/clip', headers={'Range': 'bytes=10000-'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[10000:]
+
+    response = client.get('/clip', headers={'Range': 'bytes=-24'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[-24:]
+
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get('/clip', headers={'Range': f'bytes={len(CONTENT)}-'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+def test_if_range_with_stale_etag_returns_whole_file(client):
+    etag = client.get('/clip').get_etag()[0]
+    response = client.get('/clip', headers={'Range': 'bytes=0-9', 'If-Range': f'"{etag}"'})
+    assert response.status_code == 206
+    response = client.get('/clip', headers={'Range': 'bytes=0-9', 'If-Range': '"veraltet"'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_multiple_ranges_return_whole_file(client):
+    response = client.get('/clip', headers={'Range': 'bytes=0-9,20-29'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
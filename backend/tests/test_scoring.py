@@ -0,0 +1,90 @@
+import random
+from collections import namedtuple
+
+import pytest
+
+from scoring import FeatureTable
+
+Song = namedtuple('Song', ['id', 'artist', 'year', 'genre', 'type', 'length'])
+
+
+def inline_compare(guessed_song, correct_song):
+    # Vergleich, wie ihn make_guess vor FeatureTable direkt auf den Models berechnet hat
+    return {
+        'artist': {
+            'value': guessed_song.artist or 'Unbekannt',
+            'status': 'correct' if guessed_song.artist == correct_song.artist else
+            'partial' if correct_song.artist and guessed_song.artist and (
+                    any(word.strip().lower() in correct_song.artist.lower()
+                        for word in guessed_song.artist.split()
+                        if len(word.strip()) > 2) or
+                    any(word.strip().lower() in guessed_song.artist.lower()
+                        for word in correct_song.artist.split()
+                        if len(word.strip()) > 2)
+            ) else 'wrong'
+        },
+        'year': {
+            'value': guessed_song.year or 'Unbekannt',
+            'status': 'correct' if guessed_song.year == correct_song.year else 'wrong',
+            'direction': 'up' if guessed_song.year and correct_song.year and guessed_song.year < correct_song.year else
+            'down' if guessed_song.year and correct_song.year and guessed_song.year > correct_song.year else None
+        },
+        'genre': {
+            'value': guessed_song.genre or 'Unbekannt',
+            'status': 'correct' if guessed_song.genre == correct_song.genre else
+            'partial' if correct_song.genre and guessed_song.genre and
+                         any(g.strip().lower() in [cg.strip().lower() for cg in correct_song.genre.split(',')]
+                             for g in guessed_song.genre.split(',')) else 'wrong'
+        },
+        'type': {
+            'value': guessed_song.type or 'Unbekannt',
+            'status': 'correct' if guessed_song.type == correct_song.type else
+            'partial' if correct_song.type and guessed_song.type and
+                         any(t.strip() in correct_song.type.split(', ') for t in guessed_song.type.split(', ')) else 'wrong'
+        },
+        'length': {
+            'value': f"{guessed_song.length//60}:{guessed_song.length%60:02d}" if guessed_song.length else 'Unbekannt',
+            'status': 'correct' if guessed_song.length == correct_song.length else 'wrong',
+            'direction': 'up' if guessed_song.length and correct_song.length and guessed_song.length < correct_song.length else
+            'down' if guessed_song.length and correct_song.length and guessed_song.length > correct_song.length else None
+        }
+    }
+
+
+ARTISTS = ['The Beatles', 'Beatles Tribute Band', 'ABBA', 'Queen', 'Queen Latifah', 'Ed Sheeran', 'ed sheeran', None, '']
+GENRES = ['Pop', 'Pop, Rock', 'Rock', 'rock, Jazz', 'Jazz ,Pop', 'Hip-Hop', None, '']
+TYPES = ['Single', 'Album', 'Album, Single', 'Single, Album', 'Single ,Album', 'EP', None, '']
+
+
+def random_songs(count, seed):
+    rng = random.Random(seed)
+    return [
+        Song(
+            id=song_id,
+            artist=rng.choice(ARTISTS),
+            year=rng.choice([None, 1999, 2000, 2001]),
+            genre=rng.choice(GENRES),
+            type=rng.choice(TYPES),
+            length=rng.choice([None, 0, 59, 200, 201]),
+        )
+        for song_id in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compare_matches_inline_scoring(seed):
+    songs = random_songs(60, seed)
+    table = FeatureTable(songs)
+    for guess in songs:
+        for target in songs:
+            assert table.compare(guess.id, target.id) == inline_compare(guess, target)
+
+
+def test_score_batch_matches_compare():
+    songs = random_songs(80, seed=42)
+    table = FeatureTable(songs)
+    candidate_ids = [song.id for song in songs]
+    for target in songs[::7]:
+        for song_id, statuses in zip(candidate_ids, table.score_batch(candidate_ids, target.id)):
+            expected = table.compare(song_id, target.id)
+            assert statuses == tuple(expected[field]['status'] for field in statuses._fields)
@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+from title_index import TitleIndex, normalize_title
+
+Song = namedtuple('Song', ['id', 'title'])
+
+SONGS = [
+    Song(1, 'Chandelier'),
+    Song(2, "Don't Stop Me Now"),
+    Song(3, 'Bohemian Rhapsody'),
+    Song(4, 'Blinding Lights (feat. Rosalía)'),
+    Song(5, 'Shape of You'),
+    Song(6, 'Shake It Off'),
+    Song(7, 'Señorita'),
+    Song(8, 'Chandelier'),
+]
+
+
+def test_normalize_title():
+    assert normalize_title("Don't Stop Me Now") == 'dont stop me now'
+    assert normalize_title('Blinding Lights (feat. Rosalía)') == 'blinding lights'
+    assert normalize_title('Señorita - ft. Camila') == 'senorita'
+    assert normalize_title('') == ''
+
+
+def test_exact_match_ignores_case_accents_and_feat():
+    index = TitleIndex(SONGS)
+    assert index.resolve('dont stop me now').id == 2
+    assert index.resolve('SENORITA').id == 7
+    assert index.resolve('Blinding Lights').id == 4
+    assert index.resolve('Blinding Lights [ft. Someone Else]').id == 4
+
+
+def test_duplicate_titles_resolve_to_oldest_song():
+    index = TitleIndex(SONGS)
+    assert len(index) == 7
+    assert index.resolve('Chandelier').id == 1
+
+
+def test_unique_prefix():
+    index = TitleIndex(SONGS)
+    assert index.resolve('Bohem').id == 3
+    assert index.resolve('shape').id == 5
+
+
+def test_ambiguous_prefix_is_not_a_prefix_match():
+    # "sha" passt auf "shape of you" und "shake it off"; die Trigramme reichen für keinen der beiden
+    index = TitleIndex(SONGS)
+    assert index._unique_prefix('sha') is None
+    assert index.resolve('sha') is None
+
+
+def test_exact_match_wins_over_prefix():
+    index = TitleIndex([Song(1, 'Hello'), Song(2, 'Hello World')])
+    assert index.resolve('hello').id == 1
+    assert index.resolve('hello w').id == 2
+
+
+def test_trigram_match_for_typos():
+    index = TitleIndex(SONGS)
+    assert index.resolve('Bohemain Rhapsody').id == 3
+    assert index.resolve('Shake It Of').id == 6
+
+
+def test_no_match_below_threshold():
+    index = TitleIndex(SONGS)
+    assert index.resolve('Something Completely Different') is None
+    assert index.resolve('   ') is None
@@ -0,0 +1,97 @@
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+# "(feat. X)", "[ft. X]", "- feat. X" bzw. "featuring X" bis zum Ende
+_FEAT_PATTERN = re.compile(r'[\(\[]\s*(?:feat\.?|ft\.?|featuring)\s[^\)\]]*[\)\]]|\s-?\s*(?:feat\.?|ft\.?|featuring)\s.*$')
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]+')
+_SPACE_PATTERN = re.compile(r'\s+')
+
+# Ab diesem Jaccard-Wert gilt ein Trigramm-Treffer als gemeint
+FUZZY_THRESHOLD = 0.5
+
+
+def normalize_title(title):
+    """Vergleichsform eines Titels: ohne Akzente, Satzzeichen und "feat."-Zusatz."""
+    if not title:
+        return ''
+    text = unicodedata.normalize('NFKD', title.casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = _FEAT_PATTERN.sub(' ', text)
+    # Apostrophe entfernen statt trennen: "don't" -> "dont"
+    text = text.replace("'", '').replace('’', '')
+    text = _NON_WORD_PATTERN.sub(' ', text).replace('_', ' ')
+    return _SPACE_PATTERN.sub(' ', text).strip()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Nachschlagen von Songs über den normalisierten Titel.
+
+    Reihenfolge: exakter Treffer (Hash), eindeutiger Präfix (binäre Suche in
+    den sortierten Schlüsseln), sonst bester Trigramm-Treffer oberhalb von
+    FUZZY_THRESHOLD.
+    """
+
+    def __init__(self, songs):
+        self._exact = {}
+        self._trigram_counts = {}
+        postings = defaultdict(list)
+        for song in songs:
+            key = normalize_title(song.title)
+            if not key:
+                continue
+            # Bei gleichen Titeln gewinnt der älteste Song (kleinste ID)
+            if key in self._exact:
+                continue
+            self._exact[key] = song
+            grams = trigrams(key)
+            self._trigram_counts[key] = len(grams)
+            for gram in grams:
+                postings[gram].append(key)
+        self._keys = sorted(self._exact)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def exact(self, title):
+        return self._exact.get(normalize_title(title))
+
+    def resolve(self, title):
+        key = normalize_title(title)
+        if not key:
+            return None
+        song = self._exact.get(key)
+        if song is not None:
+            return song
+        return self._unique_prefix(key) or self._fuzzy(key)
+
+    def _unique_prefix(self, key):
+        position = bisect.bisect_left(self._keys, key)
+        if position >= len(self._keys) or not self._keys[position].startswith(key):
+            return None
+        following = position + 1
+        if following < len(self._keys) and self._keys[following].startswith(key):
+            return None
+        return self._exact[self._keys[position]]
+
+    def _fuzzy(self, key):
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+        best_key, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = count / (len(grams) + self._trigram_counts[candidate] - count)
+            if score > best_score or (score == best_score and best_key is not None and candidate < best_key):
+                best_key, best_score = candidate, score
+        if best_key is None or best_score < FUZZY_THRESHOLD:
+            return None
+        return self._exact[best_key]
@@ -1,8 +1,14 @@
 import React, { useState, useEffect } from 'react';
 import './admin.css';
 
+// Felder für die Listenansicht; Hinweise werden erst beim Bearbeiten geladen
+const LIST_FIELDS = 'id,title,artist,year,genre,type,length,has_audio,has_cover';
+const PAGE_SIZE = 60;
+
 export default function Admin() {
     const [songs, setSongs] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [listFilter, setListFilter] = useState({ artist: '', genre: '', year: '', sort: 'title' });
     const [editingSong, setEditingSong] = useState(null);
     const [formData, setFormData] = useState({
         title: '',
@@ -30,7 +36,6 @@ export default function Admin() {
     const songTypes = ['Album', 'Single', 'EP'];
 
     useEffect(() => {
-        fetchSongs();
         // Lade gespeicherte custom genres
         const savedGenres = localStorage.getItem('spordle_custom_genres');
         if (savedGenres) {
@@ -39,14 +44,27 @@ export default function Admin() {
         }
     }, []);
 
-    const fetchSongs = async () => {
+    // Filter erst nach einer kurzen Tipp-Pause anwenden
+    useEffect(() => {
+        const timer = setTimeout(() => fetchSongs(), 300);
+        return () => clearTimeout(timer);
+    }, [listFilter]);
+
+    // Ohne Cursor wird die Liste ersetzt, mit Cursor die nächste Seite angehängt
+    const fetchSongs = async (cursor = null) => {
         try {
-            const response = await fetch('/api/admin/songs');
+            const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE, sort: listFilter.sort });
+            ['artist', 'genre', 'year'].forEach(key => {
+                if (listFilter[key].trim()) params.set(key, listFilter[key].trim());
+            });
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`/api/admin/songs?${params}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             const data = await response.json();
-            setSongs(data);
+            setSongs(prev => cursor ? [...prev, ...data] : data);
+            setNextCursor(response.headers.get('X-Next-Cursor'));
         } catch (error) {
             console.error('Fehler beim Laden der Songs:', error);
             setMessage('Fehler beim Laden der Songs');
@@ -157,11 +175,11 @@ export default function Admin() {
         formDataToSend.append('hint1', formData.hint1 || '');
         formDataToSend.append('hint2', formData.hint2 || '');
 
-        if (audioFile) {
-            formDataToSend.append('audio', audioFile);
-        }
-
         try {
+            if (audioFile) {
+                formDataToSend.append('upload_id', await uploadAudioInChunks(audioFile));
+            }
+
             const url = editingSong
                 ? `/api/admin/songs/${editingSong.id}`
                 : '/api/admin/songs';
@@ -208,7 +226,16 @@ export default function Admin() {
         }
     };
 
-    const handleEdit = (song) => {
+    const handleEdit = async (listedSong) => {
+        let song = listedSong;
+        try {
+            const response = await fetch(`/api/admin/songs/${listedSong.id}`);
+            if (response.ok) {
+                song = await response.json();
+            }
+        } catch (error) {
+            console.error('Fehler beim Laden des Songs:', error);
+        }
         setEditingSong(song);
         setFormData({
             title: song.title || '',
@@ -222,6 +249,14 @@ export default function Admin() {
         setShowList(false);
     };
 
+    const handleFilterChange = (e) => {
+        const { name, value } = e.target;
+        setListFilter({
+            ...listFilter,
+            [name]: value
+        });
+    };
+
     const handleDelete = async (songId) => {
         if (!window.confirm('Bist du sicher, dass du diesen Song löschen möchtest?')) {
             return;
@@ -272,16 +307,75 @@ export default function Admin() {
         if (audioInput) audioInput.value = '';
     };
 
+    // Lädt die Audio-Datei in Teilstücken hoch. Bricht ein Chunk ab, wird der
+    // Stand beim Server erfragt und ab dort weitergemacht.
+    const uploadAudioInChunks = async (file) => {
+        const createResponse = await fetch('/api/admin/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        const upload = await createResponse.json();
+        if (!createResponse.ok) {
+            throw new Error(upload.error || 'Upload konnte nicht gestartet werden');
+        }
+
+        let offset = 0;
+        let retries = 0;
+        while (offset < file.size) {
+            try {
+                const response = await fetch(`/api/admin/uploads/${upload.upload_id}`, {
+                    method: 'PATCH',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'Upload-Offset': String(offset)
+                    },
+                    body: file.slice(offset, offset + upload.chunk_size)
+                });
+                const data = await response.json();
+                if (response.ok || response.status === 409) {
+                    if (!response.ok && data.offset === undefined) {
+                        throw new Error(data.error);
+                    }
+                    offset = data.offset;
+                    retries = 0;
+                    setMessage(`Audio wird hochgeladen: ${Math.round(offset / file.size * 100)}%`);
+                    continue;
+                }
+                throw new Error(data.error || `Server Error: ${response.status}`);
+            } catch (error) {
+                if (++retries > 5) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                // Stand beim Server abfragen und ab dort fortsetzen
+                const statusResponse = await fetch(`/api/admin/uploads/${upload.upload_id}`);
+                if (statusResponse.ok) {
+                    offset = (await statusResponse.json()).offset;
+                }
+            }
+        }
+        return upload.upload_id;
+    };
+
     const getAudioMetadata = async (file) => {
         if (!file) return;
 
         try {
-            const formData = new FormData();
-            formData.append('audio', file);
+            // Nur den ID3v2-Tag und den Anfang der Audiodaten schicken, die Dauer
+            // schätzt der Server aus dem ersten Frame und der Gesamtgröße
+            const header = new Uint8Array(await file.slice(0, 10).arrayBuffer());
+            let length = 64 * 1024;
+            if (header[0] === 0x49 && header[1] === 0x44 && header[2] === 0x33) {
+                const tagSize = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9];
+                length += 10 + tagSize + ((header[5] & 0x10) ? 10 : 0);
+            }
 
             const response = await fetch('/api/admin/metadata', {
                 method: 'POST',
-                body: formData
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'X-File-Size': String(file.size)
+                },
+                body: file.slice(0, length)
             });
 
             if (response.ok) {
@@ -516,6 +610,36 @@ export default function Admin() {
                 ) : (
                     <div className="song-list">
                         <h2>📋 Song-Verwaltung</h2>
+                        <div className="list-filter">
+                            <input
+                                type="text"
+                                name="artist"
+                                placeholder="Künstler"
+                                value={listFilter.artist}
+                                onChange={handleFilterChange}
+                            />
+                            <input
+                                type="text"
+                                name="genre"
+                                placeholder="Genre"
+                                value={listFilter.genre}
+                                onChange={handleFilterChange}
+                            />
+                            <input
+                                type="text"
+                                name="year"
+                                placeholder="Jahr, z.B. 2010-2019"
+                                value={listFilter.year}
+                                onChange={handleFilterChange}
+                            />
+                            <select name="sort" value={listFilter.sort} onChange={handleFilterChange}>
+                                <option value="title">Titel</option>
+                                <option value="artist">Künstler</option>
+                                <option value="-year">Jahr (neueste zuerst)</option>
+                                <option value="year">Jahr (älteste zuerst)</option>
+                                <option value="-id">Zuletzt hinzugefügt</option>
+                            </select>
+                        </div>
                         <div className="songs-grid">
                             {songs.map(song => (
                                 <div key={song.id} className="song-card">
@@ -548,6 +672,11 @@ export default function Admin() {
                                 </div>
                             ))}
                         </div>
+                        {nextCursor && (
+                            <button type="button" className="toggle-btn load-more" onClick={() => fetchSongs(nextCursor)}>
+                                Weitere Songs laden
+                            </button>
+                        )}
                         {songs.length === 0 && (
                             <p className="no-songs">Noch keine Songs vorhanden</p>
                         )}
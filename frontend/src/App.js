@@ -4,6 +4,20 @@ import './style.css';
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
 
 
+// Kleinste Formate zuerst, der Browser nimmt die erste Quelle, die er abspielen kann
+const CLIP_FORMATS = [
+    { format: 'opus', type: 'audio/ogg; codecs=opus' },
+    { format: 'aac', type: 'audio/aac' },
+    { format: 'mp3', type: 'audio/mpeg' },
+];
+
+function ClipSources({ url }) {
+    const separator = url.includes('?') ? '&' : '?';
+    return CLIP_FORMATS.map(({ format, type }) => (
+        <source key={format} src={`${url}${separator}format=${format}`} type={type}/>
+    ));
+}
+
 function StreakBox({ count }) {
     return (
         <div className="streak-box">
@@ -96,7 +110,7 @@ function HintSection({ misses = 0, hints = [] }) {
                                 {hints.find(hint => typeof hint === 'object' && hint.type === 'audio').text}
                             </p>
                             <audio controls style={{width: '100%'}}>
-                                <source src={hints.find(hint => typeof hint === 'object' && hint.type === 'audio').url} type="audio/mpeg"/>
+                                <ClipSources url={hints.find(hint => typeof hint === 'object' && hint.type === 'audio').url}/>
                                 Dein Browser unterstützt kein Audio-Element.
                             </audio>
                         </div>
@@ -107,37 +121,59 @@ function HintSection({ misses = 0, hints = [] }) {
     );
 }
 
-function GuessInput({ onGuess, availableSongs, errorMessage }) {
+function GuessInput({ onGuess, errorMessage }) {
     const [input, setInput] = useState('');
+    const [selectedSongId, setSelectedSongId] = useState(null);
     const [suggestions, setSuggestions] = useState([]);
     const [showSuggestions, setShowSuggestions] = useState(false);
 
     const handleInputChange = (e) => {
         const value = e.target.value;
         setInput(value);
+        setSelectedSongId(null);
 
-        if (value.length > 1) {
-            const filtered = availableSongs.filter(song =>
-                song.title.toLowerCase().includes(value.toLowerCase())
-            );
-            setSuggestions(filtered.slice(0, 5));
-            setShowSuggestions(true);
-        } else {
+        if (value.trim().length <= 1) {
             setShowSuggestions(false);
         }
     };
 
+    // Vorschläge vom Server holen, kurz verzögert damit nicht jeder Tastendruck eine Anfrage auslöst
+    useEffect(() => {
+        const query = input.trim();
+        if (query.length <= 1 || selectedSongId !== null) return;
+
+        const controller = new AbortController();
+        const timer = setTimeout(() => {
+            fetch(`/api/songs/search?q=${encodeURIComponent(query)}&limit=5`, { signal: controller.signal })
+                .then(res => res.json())
+                .then(data => {
+                    setSuggestions(Array.isArray(data) ? data : []);
+                    setShowSuggestions(true);
+                })
+                .catch(err => {
+                    if (err.name !== 'AbortError') console.error('Fehler bei der Songsuche:', err);
+                });
+        }, 150);
+
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [input, selectedSongId]);
+
     const handleSubmit = (e) => {
         e.preventDefault();
         if (input.trim()) {
-            onGuess(input.trim());
+            onGuess(input.trim(), selectedSongId);
             setInput('');
+            setSelectedSongId(null);
             setShowSuggestions(false);
         }
     };
 
-    const handleSuggestionClick = (title) => {
-        setInput(title);
+    const handleSuggestionClick = (song) => {
+        setInput(song.title);
+        setSelectedSongId(song.id);
         setShowSuggestions(false);
     };
 
@@ -158,7 +194,7 @@ function GuessInput({ onGuess, availableSongs, errorMessage }) {
                                 <div
                                     key={song.id}
                                     className="suggestion-item"
-                                    onClick={() => handleSuggestionClick(song.title)}
+                                    onClick={() => handleSuggestionClick(song)}
                                 >
                                     {song.title}
                                 </div>
@@ -235,7 +271,6 @@ export default function App() {
     const [accessible, setAccessible] = useState(false);
     const [sessionId, setSessionId] = useState(null);
     const [audioUrl, setAudioUrl] = useState(null);
-    const [availableSongs, setAvailableSongs] = useState([]);
     const [guesses, setGuesses] = useState([]);
     const [hints, setHints] = useState([]);
     const [misses, setMisses] = useState(0);
@@ -243,6 +278,7 @@ export default function App() {
     const [gameWon, setGameWon] = useState(false);
     const [gameLost, setGameLost] = useState(false);
     const [solution, setSolution] = useState(null);
+    const [revealUrl, setRevealUrl] = useState(null);
     const [streak, setStreak] = useState(() => {
         const saved = localStorage.getItem('spordle_streak');
         return saved ? parseInt(saved) : 0;
@@ -264,33 +300,32 @@ export default function App() {
     }, [accessible]);
 
     useEffect(() => {
-        // Lade verfügbare Songs
-        fetch('/api/songs')
-            .then(res => res.json())
-            .then(data => setAvailableSongs(data))
-            .catch(err => console.error('Fehler beim Laden der Songs:', err));
-
         // Starte neues Spiel
         startNewGame();
     }, []);
 
-    const startNewGame = async () => {
+    const startNewGame = async (mode = 'random') => {
         try {
 
             setAudioUrl(null);
 
-            const response = await fetch('/api/game/start', {
+            const response = await fetch(mode === 'daily' ? '/api/game/start?mode=daily' : '/api/game/start', {
                 method: 'POST'
             });
             const data = await response.json();
+            if (!response.ok) {
+                setErrorMessage(data.error);
+                setTimeout(() => setErrorMessage(''), 5000);
+                return;
+            }
             setSessionId(data.session_id);
 
             const audioUrl = data.audio_url.startsWith('http')
                 ? data.audio_url
                 : `${API_BASE_URL.replace('/api', '')}${data.audio_url}`;
 
-            const audioUrlWithTimestamp = `${audioUrl}?t=${Date.now()}`;
-            setAudioUrl(audioUrlWithTimestamp);
+            // Die URL ist pro Session eindeutig, ein Cache-Buster ist nicht nötig
+            setAudioUrl(audioUrl);
 
             setGuesses([]);
             setHints([]);
@@ -299,12 +334,13 @@ export default function App() {
             setGameWon(false);
             setGameLost(false);
             setSolution(null);
+            setRevealUrl(null);
         } catch (error) {
             console.error('Fehler beim erstellen der temporären Audio dateien:', error);
         }
     };
 
-    const handleGuess = async (guessTitle) => {
+    const handleGuess = async (guessTitle, songId = null) => {
         if (!sessionId || gameWon || gameLost) return;
 
         try {
@@ -313,7 +349,7 @@ export default function App() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ title: guessTitle })
+                body: JSON.stringify({ title: guessTitle, song_id: songId })
             });
 
             const data = await response.json();
@@ -326,6 +362,9 @@ export default function App() {
 
             setErrorMessage('');
             setGuesses([...guesses, data.guess]);
+            if (data.reveal_url) {
+                setRevealUrl(data.reveal_url);
+            }
 
             if (data.correct) {
                 setGameWon(true);
@@ -514,7 +553,7 @@ export default function App() {
 
                 {audioUrl && (
                     <audio key={audioUrl} controls style={{ width: '100%', marginTop: '1rem' }}>
-                        <source src={audioUrl} type="audio/mpeg" />
+                        <ClipSources url={audioUrl} />
                         Dein Browser unterstützt kein Audio-Element.
                     </audio>
                 )}
@@ -524,11 +563,12 @@ export default function App() {
                         🎉 Glückwunsch! Du hast den Song erraten!
                         <div style={{margin: '10px 0'}}>
                             <audio controls style={{width: '100%'}}>
-                                <source src={`/api/audio/${sessionId}/reveal`} type="audio/mpeg"/>
+                                <ClipSources url={revealUrl || `/api/audio/${sessionId}/reveal`}/>
                                 Dein Browser unterstützt kein Audio-Element.
                             </audio>
                         </div>
-                        <button onClick={startNewGame} className="play-again-btn">Neues Spiel</button>
+                        <button onClick={() => startNewGame()} className="play-again-btn">Neues Spiel</button>
+                        <button onClick={() => startNewGame('daily')} className="play-again-btn">Tagesrätsel</button>
                     </div>
                 )}
 
@@ -537,18 +577,18 @@ export default function App() {
                         😢 Leider verloren! Der Song war: {solution.title}
                         <div style={{margin: '10px 0'}}>
                             <audio controls style={{width: '100%'}}>
-                                <source src={`/api/audio/${sessionId}/reveal`} type="audio/mpeg"/>
+                                <ClipSources url={revealUrl || `/api/audio/${sessionId}/reveal`}/>
                                 Dein Browser unterstützt kein Audio-Element.
                             </audio>
                         </div>
-                        <button onClick={startNewGame} className="play-again-btn">Neues Spiel</button>
+                        <button onClick={() => startNewGame()} className="play-again-btn">Neues Spiel</button>
+                        <button onClick={() => startNewGame('daily')} className="play-again-btn">Tagesrätsel</button>
                     </div>
                 )}
 
                 {!gameWon && !gameLost && (
                     <GuessInput
                         onGuess={handleGuess}
-                        availableSongs={availableSongs}
                         errorMessage={errorMessage}
                     />
                 )}